@@ -1,19 +1,17 @@
-import type { DailyPuzzle, GameConfig } from "@/types"
+import type { DailyPuzzle, GameConfig, WordListPayload } from "@/types"
+import { decodeWordList } from "@/utils/wordList"
 
 const BASE_URL = import.meta.env.VITE_API_BASE_URL || "/api"
 
 export async function fetchWordList(): Promise<Set<string>> {
-    const response = await fetch("/words-full.txt")
+    // The server sends a precompressed, front-coded list with an ETag, so after the first visit
+    // the browser's cache revalidates it with a cheap 304 unless the list has changed.
+    const response = await fetch(`${BASE_URL}/wordlist`)
     if (!response.ok) {
         throw response
     }
-    const text = await response.text()
-    // Split by newline, trim whitespace, convert to uppercase, and filter out empty lines
-    const words = text
-        .split("\n")
-        .map((w) => w.trim().toUpperCase())
-        .filter(Boolean)
-    return new Set(words)
+    const payload: WordListPayload = await response.json()
+    return new Set(decodeWordList(payload))
 }
 
 export async function fetchGameConfig(): Promise<GameConfig> {
@@ -28,6 +28,13 @@ export interface GameConfig {
     currentDate: string // ISO date string
 }
 
+/** The front-coded word list served by /api/wordlist; see `decodeWordList`. */
+export interface WordListPayload {
+    version: string
+    wordCount: number
+    buckets: { [length: string]: string }
+}
+
 export type GameState = "pre-game" | "playing" | "finished"
 
 export interface PlayHistoryRecord {
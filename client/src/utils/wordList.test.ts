@@ -0,0 +1,17 @@
+import { decodeWordList } from "./wordList"
+
+describe("decodeWordList", () => {
+    it("should decode front-coded buckets of each length", () => {
+        const words = decodeWordList({
+            version: "v1",
+            wordCount: 5,
+            buckets: { "3": "0CAB2T1OT0DOG", "4": "0BIRD" },
+        })
+
+        expect(words).toEqual(["CAB", "CAT", "COT", "DOG", "BIRD"])
+    })
+
+    it("should return no words for empty buckets", () => {
+        expect(decodeWordList({ version: "v1", wordCount: 0, buckets: {} })).toEqual([])
+    })
+})
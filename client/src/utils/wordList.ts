@@ -0,0 +1,29 @@
+import type { WordListPayload } from "@/types"
+
+/**
+ * Decodes the word list served by /api/wordlist.
+ *
+ * Each bucket holds the words of one length, sorted and front-coded: every word is a single digit
+ * giving how many leading letters it shares with the previous word, followed by its remaining
+ * letters.  Since the words in a bucket all have the same length, no separators are needed.
+ * @param payload - The parsed /api/wordlist response.
+ * @returns Every word in the list, upper-cased.
+ */
+export function decodeWordList(payload: WordListPayload): string[] {
+    const words: string[] = []
+    for (const [lengthKey, bucket] of Object.entries(payload.buckets)) {
+        const length = Number(lengthKey)
+        let previous = ""
+        let position = 0
+        while (position < bucket.length) {
+            const shared = Number(bucket[position])
+            const suffixLength = length - shared
+            const word =
+                previous.slice(0, shared) + bucket.slice(position + 1, position + 1 + suffixLength)
+            words.push(word)
+            previous = word
+            position += 1 + suffixLength
+        }
+    }
+    return words
+}
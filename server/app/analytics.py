@@ -0,0 +1,210 @@
+"""
+Difficulty statistics for puzzles: how many legal words of each length their tiles can spell, and
+how many full solutions (one word per rack, using every tile) they have.
+
+Everything is done with NumPy over a letter-count matrix of the full word list, with one row per
+set of anagrams (they're all spelled by the same tiles) and one column per letter, which for the
+real word list is viewed in place in the compiled index (see app.lexicon_index):
+
+1. A word fits in a puzzle's tiles if its row is at most the tiles' letter counts in every column.
+   A bitmask of the letters in each row rules out most rows first, so that the full comparison
+   only runs on the few thousand that use nothing but the puzzle's letters.
+2. Full solutions are counted by meeting in the middle.  The racks are split into two halves,
+   (3, 5) and (4, 6).  For each half, every combination of fitting words that fit together is
+   enumerated as one vectorized outer sum, and a histogram is kept of the letters each combination
+   uses.  A full solution is a combination from each half whose letters add up to exactly the
+   tiles, so the count is the dot product of one histogram with the other reversed.
+
+The combinations' letters are indexed by a mixed-radix number (digit i counts the puzzle's i-th
+letter, in base count + 1), under which the complement of a sub-multiset of the tiles is just the
+tiles' own index minus its index.  Whether two words fit together is checked on a second packed
+form with a guard bit per letter, as in app.solver, so that it's a few whole-array operations
+rather than one per letter.
+
+NumPy is only needed for this module (and the scripts and generator that use it), not by the API.
+"""
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from app.compact import RACK_LENGTHS
+from app.lexicon_index import IN_FULL, LexiconIndex, get_lexicon_index
+
+ALPHABET_SIZE = 26
+LETTER_BITS = 1 << np.arange(ALPHABET_SIZE, dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class LetterCountMatrix:
+    """The legal words as letter counts, one row per set of anagrams."""
+
+    # (rows, 26) letter counts, A to Z
+    counts: np.ndarray
+    # The word length of each row
+    lengths: np.ndarray
+    # How many words each row stands for
+    words: np.ndarray
+    # Bitmask of the letters each row uses (A = bit 0)
+    letter_masks: np.ndarray
+    version: str
+
+    @classmethod
+    def from_words(cls, words: Mapping[int, Iterable[str]], version: str) -> "LetterCountMatrix":
+        anagrams: dict[str, int] = {}
+        for bucket in words.values():
+            for word in bucket:
+                if word.isascii() and word.isalpha() and word.isupper():
+                    signature = "".join(sorted(word))
+                    anagrams[signature] = anagrams.get(signature, 0) + 1
+
+        counts = np.zeros((len(anagrams), ALPHABET_SIZE), dtype=np.uint8)
+        for row, signature in enumerate(anagrams):
+            for letter in signature:
+                counts[row, ord(letter) - ord("A")] += 1
+        return cls(
+            counts=counts,
+            lengths=counts.sum(axis=1, dtype=np.int64),
+            words=np.fromiter(anagrams.values(), dtype=np.int64, count=len(anagrams)),
+            letter_masks=(counts > 0).astype(np.int64) @ LETTER_BITS,
+            version=version,
+        )
+
+    @classmethod
+    def from_index(cls, index: LexiconIndex) -> "LetterCountMatrix":
+        """Views the letter counts of a compiled lexicon index in place, without copying them."""
+        buckets = list(index.buckets.values())
+        rows = sum(bucket.signature_count for bucket in buckets)
+        counts = np.frombuffer(
+            index.buffer,
+            dtype=np.uint8,
+            count=rows * ALPHABET_SIZE,
+            offset=buckets[0].counts_offset if buckets else 0,
+        ).reshape(rows, ALPHABET_SIZE)
+
+        words = []
+        for bucket in buckets:
+            # A signature's words are the ones in the full list between its group's offsets.
+            in_full = np.frombuffer(
+                index.buffer, dtype=np.uint8, count=bucket.word_count, offset=bucket.flags_offset
+            )
+            totals = np.concatenate(([0], np.cumsum(in_full & IN_FULL, dtype=np.int64)))
+            starts = np.frombuffer(
+                index.buffer,
+                dtype="<u4",
+                count=bucket.signature_count + 1,
+                offset=bucket.groups_offset,
+            )
+            words.append(totals[starts[1:]] - totals[starts[:-1]])
+        return cls(
+            counts=counts,
+            lengths=np.repeat(
+                [bucket.length for bucket in buckets],
+                [bucket.signature_count for bucket in buckets],
+            ).astype(np.int64),
+            words=np.concatenate(words) if words else np.zeros(0, dtype=np.int64),
+            letter_masks=(counts > 0).astype(np.int64) @ LETTER_BITS,
+            version=index.version,
+        )
+
+
+@lru_cache(maxsize=1)
+def _letter_count_matrix(index: LexiconIndex) -> LetterCountMatrix:
+    return LetterCountMatrix.from_index(index)
+
+
+def get_letter_count_matrix() -> LetterCountMatrix:
+    """Returns the full word list as a LetterCountMatrix, backed by the compiled index."""
+    return _letter_count_matrix(get_lexicon_index())
+
+
+@dataclass(frozen=True)
+class PuzzleAnalysis:
+    # How many legal words of each rack length the tiles can spell
+    words_by_length: Mapping[int, int]
+    full_solutions: int
+
+
+def _combination_histogram(
+    racks: list[tuple[np.ndarray, np.ndarray, np.ndarray]], tiles: int, guards: int, size: int
+) -> np.ndarray:
+    """
+    Counts the combinations of one word per rack that fit in the tiles together, by the index of
+    the letters they use.  Each rack is given as (packed letters, index, number of words) arrays.
+    """
+    if racks:
+        packed, index, weight = racks[0]
+    else:
+        # With no racks, there's just the one (empty) combination.
+        packed = index = np.zeros(1, dtype=np.int64)
+        weight = np.ones(1, dtype=np.int64)
+    for next_packed, next_index, next_weight in racks[1:]:
+        # Each field of `tiles | guards` has its guard bit set, which survives the subtraction
+        # only if the combination uses no more of that letter than there are tiles.
+        combined = (tiles | guards) - (packed[:, None] + next_packed[None, :])
+        first, second = np.nonzero(combined & guards == guards)
+        packed = packed[first] + next_packed[second]
+        index = index[first] + next_index[second]
+        weight = weight[first] * next_weight[second]
+    # bincount only takes float weights, which are exact for any count that fits in a puzzle.
+    return np.rint(np.bincount(index, weights=weight, minlength=size)).astype(np.int64)
+
+
+def analyze_tiles(
+    letters: Iterable[str],
+    matrix: LetterCountMatrix,
+    *,
+    rack_lengths: tuple[int, ...] = RACK_LENGTHS,
+) -> PuzzleAnalysis:
+    """
+    Counts the legal words of each rack length that the tiles (given as their letters) can spell,
+    and the full solutions: ways to spell one word per rack using every tile.  Tiles with the
+    same letter are interchangeable, so two solutions only differ if some rack's word does.
+    """
+    letters = [letter.upper() for letter in letters]
+    tile_counts = np.zeros(ALPHABET_SIZE, dtype=np.int64)
+    for letter in letters:
+        if len(letter) == 1 and "A" <= letter <= "Z":
+            tile_counts[ord(letter) - ord("A")] += 1
+
+    # Rows that only use the puzzle's letters, and then only as many of each as it has.
+    tile_mask = int((tile_counts > 0).astype(np.int64) @ LETTER_BITS)
+    rows = np.flatnonzero((matrix.letter_masks & ~tile_mask) == 0)
+    rows = rows[(matrix.counts[rows] <= tile_counts).all(axis=1)]
+    lengths = matrix.lengths[rows]
+    word_counts = {
+        length: int(matrix.words[rows[lengths == length]].sum()) for length in rack_lengths
+    }
+
+    if int(tile_counts.sum()) != len(letters) or len(letters) != sum(rack_lengths):
+        # Some tiles can't be in any word, or the tiles don't exactly fill the racks.
+        return PuzzleAnalysis(words_by_length=word_counts, full_solutions=0)
+
+    # From here on, only the puzzle's letters matter.
+    columns = np.flatnonzero(tile_counts)
+    column_counts = tile_counts[columns]
+    # Each letter's field has room for twice its count (two words' worth) plus a guard bit.
+    widths = np.array([int(count).bit_length() + 1 for count in column_counts], dtype=np.int64)
+    shifts = np.concatenate(([0], np.cumsum(widths)[:-1]))
+    strides = np.concatenate(([1], np.cumprod(column_counts + 1)[:-1]))
+    tiles = int(column_counts @ (1 << shifts))
+    guards = int((1 << (widths - 1 + shifts)).sum())
+    size = int(column_counts @ strides) + 1
+
+    fitting_counts = matrix.counts[rows][:, columns].astype(np.int64)
+    packed = fitting_counts @ (1 << shifts)
+    index = fitting_counts @ strides
+    words = matrix.words[rows]
+    by_length = {
+        length: (packed[lengths == length], index[lengths == length], words[lengths == length])
+        for length in rack_lengths
+    }
+
+    first_half = [by_length[length] for length in rack_lengths[0::2]]
+    second_half = [by_length[length] for length in rack_lengths[1::2]]
+    first = _combination_histogram(first_half, tiles, guards, size)
+    second = _combination_histogram(second_half, tiles, guards, size)
+    # The second half has to use exactly the tiles the first half doesn't.
+    return PuzzleAnalysis(words_by_length=word_counts, full_solutions=int(first @ second[::-1]))
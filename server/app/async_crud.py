@@ -0,0 +1,144 @@
+"""
+Async counterparts of the functions in app.crud, for use when `Settings.async_mode` is enabled.
+
+These take an `AsyncSession` and a `redis.asyncio.Redis` client, and run the same flows as their
+sync versions (see app.io_steps), so the cache keys, formats, tiers and counters are identical and
+sync and async workers can share Redis.
+"""
+
+import datetime
+from collections.abc import AsyncIterator
+
+from redis.asyncio import Redis
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.cache import AsyncSingleFlight, LocalCache
+from app.config import get_game_rules_file
+from app.crud import (
+    PuzzleRange,
+    build_game_rules,
+    cache_puzzle_json_steps,
+    cached_puzzle_json_steps,
+    date_batches,
+    load_puzzle_json_steps,
+    puzzle_from_json,
+    puzzle_jsons_for_dates_steps,
+    puzzle_range_steps,
+    with_current_date,
+)
+from app.io_steps import run_async
+from app.models import PuzzleWithDate
+
+
+async def get_cached_puzzle_json(
+    date: datetime.date,
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
+) -> str | None:
+    """Async version of crud.get_cached_puzzle_json."""
+    return await run_async(cached_puzzle_json_steps(date, redis_client, local_cache))
+
+
+async def cache_puzzle_json(
+    date: datetime.date,
+    puzzle_json: str,
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
+):
+    """Async version of crud.cache_puzzle_json."""
+    await run_async(cache_puzzle_json_steps(date, puzzle_json, redis_client, local_cache))
+
+
+async def get_puzzle_by_date(
+    db: AsyncSession,
+    date: datetime.date,
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
+) -> PuzzleWithDate | None:
+    """Async version of crud.get_puzzle_by_date."""
+    return puzzle_from_json(
+        await get_puzzle_json_by_date(db, date, redis_client=redis_client, local_cache=local_cache)
+    )
+
+
+async def get_puzzle_json_by_date(
+    db: AsyncSession,
+    date: datetime.date,
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
+) -> str | None:
+    """Async version of crud.get_puzzle_json_by_date."""
+    cached_puzzle = await get_cached_puzzle_json(
+        date, redis_client=redis_client, local_cache=local_cache
+    )
+    if cached_puzzle:
+        return cached_puzzle
+
+    return await load_puzzle_json(db, date, redis_client=redis_client, local_cache=local_cache)
+
+
+_puzzle_loads: AsyncSingleFlight[str | None] = AsyncSingleFlight()
+
+
+async def load_puzzle_json(
+    db: AsyncSession,
+    date: datetime.date,
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
+) -> str | None:
+    """
+    Async version of crud.load_puzzle_json, with the same stampede protection.  The shared load
+    outlives the request that started it if that request is cancelled, and FastAPI then closes its
+    session, so the load uses a session of its own.
+    """
+
+    async def load() -> str | None:
+        async with AsyncSession(db.bind) as load_db:
+            return await run_async(load_puzzle_json_steps(load_db, date, redis_client, local_cache))
+
+    return await _puzzle_loads.do(date, load)
+
+
+async def get_puzzle_jsons_for_dates(
+    db: AsyncSession,
+    dates: list[datetime.date],
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
+) -> list[str]:
+    """Async version of crud.get_puzzle_jsons_for_dates."""
+    return await run_async(puzzle_jsons_for_dates_steps(db, dates, redis_client, local_cache))
+
+
+async def iter_puzzle_jsons_in_range(
+    db: AsyncSession,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
+) -> AsyncIterator[str]:
+    """Async version of crud.iter_puzzle_jsons_in_range."""
+    for dates in date_batches(start_date, end_date):
+        for puzzle_json in await get_puzzle_jsons_for_dates(
+            db, dates, redis_client=redis_client, local_cache=local_cache
+        ):
+            yield puzzle_json
+
+
+async def get_puzzle_range(db: AsyncSession) -> PuzzleRange:
+    """Async version of crud.get_puzzle_range, sharing its snapshot."""
+    return await run_async(puzzle_range_steps(db))
+
+
+async def get_game_rules(db: AsyncSession) -> dict:
+    """
+    Async version of crud.get_game_rules.  Raises the same exceptions as
+    crud.get_stable_game_rules.
+    """
+    return with_current_date(build_game_rules(get_game_rules_file(), await get_puzzle_range(db)))
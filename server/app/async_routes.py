@@ -0,0 +1,208 @@
+"""
+Async versions of the endpoints in app.main, mounted instead of the sync ones when
+`Settings.async_mode` is enabled.
+
+The sync endpoints each hold one of Starlette's threadpool slots while they block on SQLite and
+Redis, so a burst of requests at midnight can exhaust the pool.  These run on the event loop
+instead (via aiosqlite and redis.asyncio), so a single worker can hold many more requests open at
+once.  The paths, responses and caching behavior are identical: validation and responses come
+from app.route_helpers, and the lookups run the same flows as app.crud (see app.async_crud).
+Their dependencies are coroutines too, so nothing here touches the threadpool.
+"""
+
+import datetime
+
+from fastapi import APIRouter, Depends, Header
+from sqlalchemy.exc import NoResultFound
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import async_crud, scoring
+from .cache import AsyncRedisDep, LocalCacheDep
+from .crud import dates_between
+from .database import get_async_session
+from .http_caching import puzzle_response
+from .models import (
+    BatchScoreRequest,
+    BatchScoreResponse,
+    GameRules,
+    PuzzleWithDate,
+    ScoreResult,
+    ScoreSubmission,
+)
+from .route_helpers import (
+    batch_score_response,
+    check_batch_size,
+    check_not_spoiler,
+    check_puzzle_range,
+    clamp_stream_range,
+    game_rules_errors,
+    get_wordlist_response,
+    puzzle_stream_response,
+    puzzles_response,
+    require_puzzle,
+    score_response,
+)
+from .scoring import ScoringRulesDep
+from .settings import get_settings
+
+router = APIRouter()
+
+
+@router.get("/api/puzzle/today", response_model=PuzzleWithDate, tags=["Puzzles"])
+async def get_todays_puzzle(
+    redis_client: AsyncRedisDep,
+    local_cache: LocalCacheDep,
+    db: AsyncSession = Depends(get_async_session),
+    if_none_match: str | None = Header(default=None),
+):
+    """
+    Get the puzzle for the current date.  The response may be cached until local midnight.
+
+    The puzzle is returned as pre-serialized JSON (see crud.get_puzzle_json_by_date) in a raw
+    Response, which FastAPI passes through untouched, so response_model only documents the
+    payload.  The response carries an ETag (see app.http_caching), and honors If-None-Match.
+    """
+    today = datetime.date.today()
+    puzzle_json = await async_crud.get_puzzle_json_by_date(
+        db, today, redis_client=redis_client, local_cache=local_cache
+    )
+    return puzzle_response(require_puzzle(puzzle_json, today, today=True), today, if_none_match)
+
+
+@router.get("/api/puzzle/{date}", response_model=PuzzleWithDate, tags=["Puzzles"])
+async def get_puzzle_by_date(
+    date: datetime.date,
+    redis_client: AsyncRedisDep,
+    local_cache: LocalCacheDep,
+    db: AsyncSession = Depends(get_async_session),
+    if_none_match: str | None = Header(default=None),
+):
+    """
+    Get the puzzle for a specific date.  Past puzzles never change, so they are served as
+    immutable.  Otherwise served the same way as /api/puzzle/today.
+    """
+    check_not_spoiler(date)
+    puzzle_json = await async_crud.get_puzzle_json_by_date(
+        db, date, redis_client=redis_client, local_cache=local_cache
+    )
+    return puzzle_response(require_puzzle(puzzle_json, date), date, if_none_match)
+
+
+@router.get("/api/puzzles", response_model=list[PuzzleWithDate], tags=["Puzzles"])
+async def get_puzzles(
+    redis_client: AsyncRedisDep,
+    local_cache: LocalCacheDep,
+    start: datetime.date,
+    end: datetime.date | None = None,
+    db: AsyncSession = Depends(get_async_session),
+    if_none_match: str | None = Header(default=None),
+):
+    """
+    Get the puzzles from `start` to `end` (inclusive, default today) as an array in date order,
+    skipping dates without a puzzle.  Ranges entirely in the past are served as immutable.
+    The array is joined from the pre-serialized puzzles, and otherwise served the same way as
+    /api/puzzle/today.
+    """
+    end = end or datetime.date.today()
+    check_puzzle_range(start, end, get_settings().puzzles_request_max_days)
+    puzzle_jsons = await async_crud.get_puzzle_jsons_for_dates(
+        db, list(dates_between(start, end)), redis_client=redis_client, local_cache=local_cache
+    )
+    return puzzles_response(puzzle_jsons, end, if_none_match)
+
+
+@router.get("/api/puzzles/stream", tags=["Puzzles"])
+async def stream_puzzles(
+    redis_client: AsyncRedisDep,
+    local_cache: LocalCacheDep,
+    start: datetime.date,
+    end: datetime.date | None = None,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """
+    Like /api/puzzles, but streamed as newline-delimited JSON (one puzzle per line), for ranges
+    up to `puzzles_stream_max_days` long once narrowed to the dates that have puzzles.
+    """
+    end = end or datetime.date.today()
+    check_puzzle_range(start, end)
+    try:
+        puzzle_range = await async_crud.get_puzzle_range(db)
+    except NoResultFound:
+        puzzle_range = None
+    dates = clamp_stream_range(start, end, puzzle_range)
+
+    async def puzzle_jsons(first: datetime.date, last: datetime.date):
+        # The request's session may be closed before the body is streamed (depending on the
+        # FastAPI version), so the stream uses its own.
+        async with AsyncSession(db.bind) as stream_db:
+            async for puzzle_json in async_crud.iter_puzzle_jsons_in_range(
+                stream_db, first, last, redis_client=redis_client, local_cache=local_cache
+            ):
+                yield puzzle_json
+
+    return puzzle_stream_response(puzzle_jsons(*dates) if dates else (), end)
+
+
+@router.get("/api/wordlist", tags=["Configuration"])
+async def get_wordlist(
+    if_none_match: str | None = Header(default=None),
+    accept_encoding: str | None = Header(default=None),
+):
+    """
+    Get the full list of legal words, length-bucketed and front-coded (see app.wordlist).  The
+    response is precompressed, and carries a content-hash ETag that clients should revalidate.
+    """
+    return get_wordlist_response(if_none_match, accept_encoding)
+
+
+@router.post("/api/puzzle/{date}/score", response_model=ScoreResult, tags=["Scoring"])
+async def score_puzzle(
+    date: datetime.date,
+    submission: ScoreSubmission,
+    redis_client: AsyncRedisDep,
+    local_cache: LocalCacheDep,
+    rules: ScoringRulesDep,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """
+    Score a submitted arrangement of a puzzle's tiles (given as racks of tile ids), validating
+    each word against the full word list, exactly as the client does.
+    """
+    check_not_spoiler(date)
+    puzzle_json = await async_crud.get_puzzle_json_by_date(
+        db, date, redis_client=redis_client, local_cache=local_cache
+    )
+    return score_response(puzzle_json, date, submission, rules)
+
+
+@router.post("/api/puzzles/score", response_model=BatchScoreResponse, tags=["Scoring"])
+async def score_puzzles(
+    request: BatchScoreRequest,
+    redis_client: AsyncRedisDep,
+    local_cache: LocalCacheDep,
+    rules: ScoringRulesDep,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """
+    Score many submissions, possibly for different dates, in one call (e.g. for replaying or
+    verifying saved games).  Each submission gets either a result or an error.
+    """
+    check_batch_size(request)
+    dates = scoring.dates_to_score(request.submissions)
+    puzzle_jsons = (
+        await async_crud.get_puzzle_jsons_for_dates(
+            db, dates, redis_client=redis_client, local_cache=local_cache
+        )
+        if dates
+        else []
+    )
+    return batch_score_response(request, puzzle_jsons, rules)
+
+
+@router.get("/api/config", tags=["Configuration"])
+async def get_config(db: AsyncSession = Depends(get_async_session)):
+    """
+    Get the game configuration rules.
+    """
+    with game_rules_errors():
+        return GameRules.model_validate(await async_crud.get_game_rules(db))
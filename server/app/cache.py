@@ -1,11 +1,30 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from dataclasses import dataclass, field
 from functools import cache
 from typing import Annotated
 
 import redis
+import redis.asyncio
 from fastapi import Depends
+from redis.client import PubSubWorkerThread
+from redis.exceptions import WatchError
 
+from app.io_steps import Pause, Steps, run
 from app.settings import get_settings
 
+# Published (with a cache key, or "*" for everything) whenever a cached value becomes stale, so
+# that every API worker can drop its in-process copy.
+INVALIDATION_CHANNEL = "lexo:cache-invalidate"
+
+# How often a process waiting on another process's cache fill re-checks Redis, in seconds.
+FILL_POLL_INTERVAL = 0.02
+
 
 @cache
 def get_redis_client() -> redis.Redis | None:
@@ -16,3 +35,352 @@ def get_redis_client() -> redis.Redis | None:
 
 
 RedisDep = Annotated[redis.Redis | None, Depends(get_redis_client)]
+
+
+@cache
+def get_async_redis_client() -> redis.asyncio.Redis | None:
+    settings = get_settings()
+    if settings.redis_url:
+        return redis.asyncio.Redis.from_url(settings.redis_url, decode_responses=True)
+    return None
+
+
+async def async_redis_dependency() -> redis.asyncio.Redis | None:
+    # A coroutine, so that FastAPI calls it on the event loop rather than in a worker thread.
+    return get_async_redis_client()
+
+
+AsyncRedisDep = Annotated[redis.asyncio.Redis | None, Depends(async_redis_dependency)]
+
+# Either kind of client, for the flows in app.io_steps.
+type AnyRedis = redis.Redis | redis.asyncio.Redis
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for one cache tier."""
+
+    hits: int = 0
+    misses: int = 0
+
+    def as_dict(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+
+# Counters for the shared Redis tier, updated by crud.get_puzzle_json_by_date.
+redis_stats = CacheStats()
+
+
+@dataclass
+class _Entry:
+    value: str
+    expires_at: float
+
+
+@dataclass
+class LocalCache:
+    """
+    A small, thread-safe, in-process LRU cache with a per-entry TTL, used as a tier in front of
+    Redis.
+
+    One key at a time can be pinned (the API pins today's puzzle); the pinned entry neither expires
+    nor counts towards LRU eviction, so the hottest key is never pushed out by archive browsing.
+    Pinning a new key unpins the old one, which then ages out like any other entry.
+
+    Expired entries are kept (until evicted or invalidated) so that `get_stale` can still serve
+    them while another process is refreshing the key.
+    """
+
+    max_entries: int
+    ttl_seconds: float
+    clock: Callable[[], float] = time.monotonic
+    stats: CacheStats = field(default_factory=CacheStats)
+    _entries: OrderedDict[str, _Entry] = field(default_factory=OrderedDict, init=False)
+    _pinned: tuple[str, str] | None = field(default=None, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            pinned = self._pinned
+            if pinned is not None and pinned[0] == key:
+                self.stats.hits += 1
+                return pinned[1]
+
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= self.clock():
+                self.stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry.value
+
+    def get_stale(self, key: str) -> str | None:
+        """Like `get`, but also returns expired entries.  Doesn't count towards the stats."""
+        with self._lock:
+            pinned = self._pinned
+            if pinned is not None and pinned[0] == key:
+                return pinned[1]
+            entry = self._entries.get(key)
+            return entry.value if entry is not None else None
+
+    def set(self, key: str, value: str, *, pin: bool = False):
+        with self._lock:
+            if pin:
+                previous = self._pinned
+                self._pinned = (key, value)
+                self._entries.pop(key, None)
+                if previous is not None and previous[0] != key:
+                    self._store(*previous)
+            elif self._pinned is not None and self._pinned[0] == key:
+                self._pinned = (key, value)
+            else:
+                self._store(key, value)
+
+    def _store(self, key: str, value: str):
+        self._entries[key] = _Entry(value, self.clock() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._pinned is not None and self._pinned[0] == key:
+                self._pinned = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pinned = None
+
+    def __len__(self) -> int:
+        return len(self._entries) + (self._pinned is not None)
+
+    def stats_dict(self) -> dict[str, int | float]:
+        return {**self.stats.as_dict(), "size": len(self), "maxEntries": self.max_entries}
+
+
+@cache
+def get_local_cache() -> LocalCache | None:
+    settings = get_settings()
+    if settings.local_cache_max_entries > 0:
+        return LocalCache(
+            max_entries=settings.local_cache_max_entries,
+            ttl_seconds=settings.local_cache_ttl_seconds,
+        )
+    return None
+
+
+async def local_cache_dependency() -> LocalCache | None:
+    # A coroutine, so that FastAPI calls it on the event loop rather than in a worker thread.
+    return get_local_cache()
+
+
+LocalCacheDep = Annotated[LocalCache | None, Depends(local_cache_dependency)]
+
+
+class SingleFlight[T]:
+    """
+    Coalesces concurrent calls for the same key within a process: the first caller runs the
+    function, and callers arriving while it's still running wait for and share its result (or
+    exception) instead of repeating the work.
+    """
+
+    @dataclass
+    class _Call:
+        done: threading.Event = field(default_factory=threading.Event)
+        result: object = None
+        error: BaseException | None = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, SingleFlight._Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = SingleFlight._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result  # type: ignore[return-value]
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight[T]:
+    """
+    The asyncio counterpart of SingleFlight, for coroutines running on one event loop.  The shared
+    call runs as its own task, which carries on if the caller that started it is cancelled, so
+    `fn` mustn't use anything that caller cleans up, like its request's database session.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task[T]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Shielded so that one cancelled request doesn't cancel the load for everyone else.
+        return await asyncio.shield(task)
+
+
+def fill_lock_key(key: str) -> str:
+    return f"lock:{key}"
+
+
+def acquire_fill_lock_steps(redis_client: AnyRedis, key: str) -> Steps[str | None]:
+    """
+    Tries to take the short-lived, cross-process lock that marks this process as the one filling
+    `key` after a miss.  Returns a token to pass to `release_fill_lock`, or None if another process
+    already holds it.  The lock expires on its own after `Settings.cache_fill_lock_ms`, so a
+    crashed holder can't wedge the key.
+    """
+    token = uuid.uuid4().hex
+    ttl = get_settings().cache_fill_lock_ms
+    if (yield redis_client.set(fill_lock_key(key), token, nx=True, px=ttl)):
+        return token
+    return None
+
+
+def release_fill_lock_steps(redis_client: AnyRedis, key: str, token: str) -> Steps[None]:
+    """Releases a lock taken by `acquire_fill_lock`, unless it has expired and been re-taken."""
+    lock_key = fill_lock_key(key)
+    pipe = redis_client.pipeline()
+    try:
+        yield pipe.watch(lock_key)
+        if (yield pipe.get(lock_key)) == token:
+            pipe.multi()
+            pipe.delete(lock_key)
+            yield pipe.execute()
+    except WatchError:
+        pass
+    finally:
+        yield pipe.reset()
+
+
+def wait_for_fill_steps(redis_client: AnyRedis, key: str) -> Steps[str | None]:
+    """
+    Waits (up to `Settings.cache_fill_wait_seconds`) for the process holding the fill lock for
+    `key` to populate it.  Returns the value, or None if the lock was released (or expired, or the
+    wait timed out) without the key being set.
+    """
+    deadline = time.monotonic() + get_settings().cache_fill_wait_seconds
+    lock_key = fill_lock_key(key)
+    while True:
+        value, lock = yield redis_client.mget(key, lock_key)
+        if value or lock is None or time.monotonic() >= deadline:
+            return value
+        yield Pause(FILL_POLL_INTERVAL)
+
+
+def acquire_fill_lock(redis_client: redis.Redis, key: str) -> str | None:
+    """acquire_fill_lock_steps, with a sync client."""
+    return run(acquire_fill_lock_steps(redis_client, key))
+
+
+def release_fill_lock(redis_client: redis.Redis, key: str, token: str):
+    """release_fill_lock_steps, with a sync client."""
+    run(release_fill_lock_steps(redis_client, key, token))
+
+
+def wait_for_fill(redis_client: redis.Redis, key: str) -> str | None:
+    """wait_for_fill_steps, with a sync client."""
+    return run(wait_for_fill_steps(redis_client, key))
+
+
+# Functions called with each invalidated key (or "*"), for in-process caches other than
+# LocalCache.  Register them with add_invalidation_callback.
+_invalidation_callbacks: list[Callable[[str], None]] = []
+
+
+def add_invalidation_callback(callback: Callable[[str], None]):
+    """
+    Registers a function to be called with each key invalidated by this process or announced
+    by another one (or "*" to invalidate everything).
+    """
+    _invalidation_callbacks.append(callback)
+
+
+def _run_invalidation_callbacks(key: str):
+    for callback in _invalidation_callbacks:
+        callback(key)
+
+
+def invalidate_cached_keys(redis_client: redis.Redis | None, keys: Iterable[str]):
+    """
+    Deletes keys from Redis and tells every worker (including this one) to drop its local copy.
+    """
+    keys = list(keys)
+    local_cache = get_local_cache()
+    for key in keys:
+        if local_cache is not None:
+            local_cache.invalidate(key)
+        _run_invalidation_callbacks(key)
+
+    if redis_client is None or not keys:
+        return
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.delete(*keys)
+        for key in keys:
+            pipe.publish(INVALIDATION_CHANNEL, key)
+        pipe.execute()
+
+
+def start_invalidation_listener(
+    redis_client: redis.Redis, local_cache: LocalCache | None
+) -> PubSubWorkerThread:
+    """
+    Subscribes to INVALIDATION_CHANNEL in a background thread, evicting keys from `local_cache`
+    (and running the invalidation callbacks) as other processes announce them.  Call `.stop()` on
+    the returned thread to unsubscribe.
+    """
+
+    def handle_message(message: dict):
+        key = message["data"]
+        if local_cache is not None:
+            if key == "*":
+                local_cache.clear()
+            else:
+                local_cache.invalidate(key)
+        _run_invalidation_callbacks(key)
+
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(**{INVALIDATION_CHANNEL: handle_message})
+
+    def handle_exception(exc: BaseException, pubsub, thread: PubSubWorkerThread):
+        # Losing the connection would leave stale entries around until they expire, so drop
+        # everything rather than risk serving an outdated puzzle.
+        logging.warning(f"Cache invalidation listener error: {exc!r}; clearing local caches.")
+        if local_cache is not None:
+            local_cache.clear()
+        _run_invalidation_callbacks("*")
+        time.sleep(1)
+
+    return pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=handle_exception)
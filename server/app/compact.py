@@ -0,0 +1,121 @@
+"""
+A compact binary encoding for puzzles, used for the `compact` column of the puzzles table.
+
+Every generated puzzle has the same shape: four solution words of 3, 4, 5 and 6 letters whose 18
+tiles are numbered `tile-1` to `tile-18`, with the initial racks being those tiles in id order,
+split 3/4/5/6.  So rather than storing 36 tile dicts as JSON, a puzzle can be stored as:
+
+    1 byte   format version (currently 1)
+    18 bytes the solution's letters, in order
+    18 bytes the tile number of each solution tile
+    18 bytes the value of each solution tile
+
+That's 55 bytes instead of roughly 2 KB.  Tile values are stored rather than looked up in
+`game_rules.yaml`, so that editing the letter values never changes published puzzles.
+
+Puzzles that don't have this shape (hand-edited ones, say) can't be encoded; `encode_puzzle`
+returns None for them and they stay in the JSON columns.
+"""
+
+import datetime
+import json
+
+from .models import Tile, tile_from_stored_dict
+
+FORMAT_VERSION = 1
+RACK_LENGTHS = (3, 4, 5, 6)
+TILE_COUNT = sum(RACK_LENGTHS)
+ENCODED_LENGTH = 1 + 3 * TILE_COUNT
+
+
+def _split_racks[T](items: list[T]) -> list[list[T]]:
+    racks = []
+    start = 0
+    for length in RACK_LENGTHS:
+        racks.append(items[start : start + length])
+        start += length
+    return racks
+
+
+def encode_puzzle(
+    initial_racks: list[list[Tile]], target_solution: list[list[Tile]]
+) -> bytes | None:
+    """
+    Encodes a puzzle in the compact format, or returns None if it doesn't have the standard shape.
+    """
+    if [len(rack) for rack in target_solution] != list(RACK_LENGTHS):
+        return None
+
+    solution_tiles = [tile for rack in target_solution for tile in rack]
+    letters = bytearray()
+    numbers = bytearray()
+    values = bytearray()
+    for tile in solution_tiles:
+        prefix, _, number = tile.id.partition("-")
+        if (
+            prefix != "tile"
+            or not number.isdigit()
+            or not 1 <= int(number) <= TILE_COUNT
+            or len(tile.letter) != 1
+            or not tile.letter.isascii()
+            or not 0 <= tile.value <= 255
+        ):
+            return None
+        letters.append(ord(tile.letter))
+        numbers.append(int(number))
+        values.append(tile.value)
+
+    if sorted(numbers) != list(range(1, TILE_COUNT + 1)):
+        return None
+
+    # The initial racks must be exactly the solution tiles in id order, or they can't be rebuilt.
+    expected_initial_racks = _split_racks(sorted(solution_tiles, key=lambda tile: int(tile.id[5:])))
+    if initial_racks != expected_initial_racks:
+        return None
+
+    return bytes([FORMAT_VERSION]) + bytes(letters) + bytes(numbers) + bytes(values)
+
+
+def _decode_fields(data: bytes) -> tuple[bytes, bytes, bytes]:
+    if len(data) != ENCODED_LENGTH or data[0] != FORMAT_VERSION:
+        raise ValueError(f"Unrecognized compact puzzle encoding ({len(data)} bytes).")
+    return (
+        data[1 : 1 + TILE_COUNT],
+        data[1 + TILE_COUNT : 1 + 2 * TILE_COUNT],
+        data[1 + 2 * TILE_COUNT :],
+    )
+
+
+def decode_puzzle(data: bytes) -> tuple[list[list[Tile]], list[list[Tile]]]:
+    """Expands a compact puzzle into `(initial_racks, target_solution)`."""
+    letters, numbers, values = _decode_fields(data)
+    tiles = [
+        tile_from_stored_dict({"id": f"tile-{number}", "letter": chr(letter), "value": value})
+        for letter, number, value in zip(letters, numbers, values)
+    ]
+    by_number = sorted(zip(numbers, tiles))
+    return _split_racks([tile for _, tile in by_number]), _split_racks(tiles)
+
+
+def compact_puzzle_json(date: datetime.date, data: bytes) -> str:
+    """
+    Builds the API's JSON for a compact puzzle directly from the bytes, without creating Tile
+    objects.  The output is identical to `PuzzleWithDate.model_dump_json()` for the same puzzle.
+    """
+    letters, numbers, values = _decode_fields(data)
+    tiles = [
+        f'{{"id":"tile-{number}","letter":{json.dumps(chr(letter))},"value":{value}}}'
+        for letter, number, value in zip(letters, numbers, values)
+    ]
+    by_number = [tile for _, tile in sorted(zip(numbers, tiles))]
+
+    def racks_json(ordered_tiles: list[str]) -> str:
+        return (
+            "[" + ",".join("[" + ",".join(rack) + "]" for rack in _split_racks(ordered_tiles)) + "]"
+        )
+
+    return (
+        f'{{"initialRacks":{racks_json(by_number)},'
+        f'"targetSolution":{racks_json(tiles)},'
+        f'"date":"{date.isoformat()}"}}'
+    )
@@ -0,0 +1,178 @@
+"""
+Process-wide, reloadable views of the files in the config directory.
+
+The word lists and game rules rarely change, but they used to be re-read and re-parsed every time
+they were needed (e.g. once per puzzle when generating a year's worth of puzzles).  The helpers
+here parse each file once per process and hand back the same immutable object on later calls.
+
+Before returning a cached value, the source files are stat()ed (at most once per
+`check_interval` seconds, for values read on hot paths).  If their mtime or size changed, the
+files are re-read and hashed, and the value is only rebuilt if the content actually differs, so
+an edited config file is picked up without restarting the process.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+
+import yaml
+
+from app.settings import get_settings
+
+
+class ConfigFileCache[T]:
+    """
+    Caches a value built from the contents of one or more files in the config directory.
+
+    Instances are callable with no arguments, like a function wrapped in `functools.cache`, and
+    similarly expose `cache_clear()` (mostly useful for tests).
+    """
+
+    def __init__(
+        self, filenames: tuple[str, ...], build: Callable[..., T], check_interval: float = 0.0
+    ):
+        self.filenames = filenames
+        self.build = build
+        self.check_interval = check_interval
+        self.__doc__ = build.__doc__
+        self._lock = threading.Lock()
+        # (stat signature, content digest, value), swapped as a single tuple so readers never
+        # see a value paired with the wrong signature.
+        self._state: tuple[tuple, str, T] | None = None
+        # time.monotonic() of the last stat() check.
+        self._checked_at = 0.0
+
+    def paths(self) -> tuple[Path, ...]:
+        config_directory = get_settings().config_directory
+        return tuple(config_directory / filename for filename in self.filenames)
+
+    def __call__(self) -> T:
+        state = self._state
+        now = time.monotonic()
+        if state is not None and now - self._checked_at < self.check_interval:
+            return state[2]
+
+        paths = self.paths()
+        signature = _stat_signature(paths)
+        if state is not None and state[0] == signature:
+            self._checked_at = now
+            return state[2]
+
+        with self._lock:
+            state = self._state
+            if state is not None and state[0] == signature:
+                return state[2]
+
+            contents = []
+            for path in paths:
+                with open(path, "r", encoding="utf-8") as f:
+                    contents.append(f.read())
+            digest = content_digest(contents)
+
+            if state is not None and state[1] == digest:
+                # Touched, but not actually changed.
+                value = state[2]
+            else:
+                value = self.build(*contents, version=digest)
+            self._state = (signature, digest, value)
+            self._checked_at = now
+            return value
+
+    @property
+    def version(self) -> str | None:
+        """The content digest of the currently cached value, or None if nothing is cached."""
+        state = self._state
+        return state[1] if state else None
+
+    def cache_clear(self):
+        with self._lock:
+            self._state = None
+
+
+def config_file_cache[T](
+    *filenames: str, check_interval: float = 0.0
+) -> Callable[[Callable[..., T]], ConfigFileCache[T]]:
+    """
+    Decorator that turns a builder function into a cached, reloadable config accessor.
+
+    The decorated function receives the text of each named file (relative to
+    `Settings.config_directory`) as positional arguments, in order, plus a `version` keyword
+    argument holding a digest of those contents.  Callers invoke the result with no arguments.
+
+    With a `check_interval`, the files are only checked for changes if at least that many seconds
+    have passed since the last check, so edits may take that long to be noticed.
+    """
+
+    def decorator(build: Callable[..., T]) -> ConfigFileCache[T]:
+        return ConfigFileCache(filenames, build, check_interval)
+
+    return decorator
+
+
+def _stat_signature(paths: tuple[Path, ...]) -> tuple:
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def content_digest(contents: list[str]) -> str:
+    """The version digest `config_file_cache` gives for these file contents, in order."""
+    hasher = hashlib.sha256()
+    for content in contents:
+        hasher.update(content.encode("utf-8"))
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+@dataclass(frozen=True)
+class PuzzleLexicon:
+    """The inputs `generate_puzzle` needs: common words bucketed by length, and letter values."""
+
+    words_by_length: Mapping[int, tuple[str, ...]]
+    letter_values: Mapping[str, int]
+    version: str
+
+
+@config_file_cache("words-common.txt", "game_rules.yaml")
+def get_puzzle_lexicon(words_text: str, rules_text: str, *, version: str) -> PuzzleLexicon:
+    """
+    Returns the common word list grouped by word length, along with the letter values from
+    `game_rules.yaml`.  Words are upper-cased and blank lines are dropped.
+    """
+    words_by_length: dict[int, list[str]] = {}
+    for line in words_text.splitlines():
+        word = line.strip().upper()
+        if word:
+            words_by_length.setdefault(len(word), []).append(word)
+
+    rules = yaml.safe_load(rules_text)
+    letter_values = rules.get("letter_values", {})
+
+    return PuzzleLexicon(
+        words_by_length=MappingProxyType(
+            {length: tuple(words) for length, words in words_by_length.items()}
+        ),
+        letter_values=MappingProxyType(dict(letter_values)),
+        version=version,
+    )
+
+
+# How often the API re-checks game_rules.yaml for edits, in seconds.  /api/config (which is also
+# the container healthcheck) reads the rules on every request, so this keeps it off the disk.
+RULES_CHECK_INTERVAL = 5.0
+
+
+@config_file_cache("game_rules.yaml", check_interval=RULES_CHECK_INTERVAL)
+def get_game_rules_file(rules_text: str, *, version: str) -> Mapping:
+    """
+    Returns the parsed contents of `game_rules.yaml` as a read-only mapping.  Raises YAMLError if
+    the file is malformed.
+    """
+    return MappingProxyType(yaml.safe_load(rules_text))
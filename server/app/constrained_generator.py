@@ -0,0 +1,184 @@
+"""
+Generates puzzles whose difficulty falls within given constraints.
+
+`generate_puzzle` picks each solution word uniformly at random, so some days are trivially easy
+and others have huge target scores.  `generate_constrained_puzzle` instead draws candidate word
+quadruples (one common word per rack length) in batches of thousands, and rejects those that
+don't satisfy a `PuzzleConstraints`:
+
+1. The cheap constraints, the target score and the vowel ratio, are checked for a whole batch at
+   once, with NumPy, from per-word base score and vowel count arrays built once per process.
+2. The number of alternative solutions is only counted (with app.analytics, a few milliseconds
+   each) for the candidates that survive that, in the order they were drawn, and only for a
+   limited number per batch, so that constraints that can't be met fail in seconds rather than
+   hours.
+
+The first candidate to pass becomes the puzzle, with its tiles laid out exactly as
+`generate_puzzle` does.  Everything is drawn from the puzzle's private random number generator,
+so the same seed and constraints always give the same puzzle.
+"""
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+import numpy as np
+import yaml
+
+from app.analytics import analyze_tiles, get_letter_count_matrix
+from app.compact import RACK_LENGTHS
+from app.config import config_file_cache, get_puzzle_lexicon
+from app.models import Puzzle
+from app.puzzle_generator import build_puzzle, puzzle_rng
+
+VOWELS = frozenset("AEIOU")
+
+# How many candidate quadruples to draw at once, and how many batches to try before giving up.
+DEFAULT_BATCH_SIZE = 4096
+DEFAULT_MAX_BATCHES = 25
+# How many of a batch's candidates to count the solutions of, at most.
+SOLUTION_CHECKS_PER_BATCH = 32
+
+
+@dataclass(frozen=True)
+class PuzzleConstraints:
+    """
+    Bounds on a generated puzzle's difficulty.  Any bound left as None isn't checked.
+
+    The score is the target solution's: each word's letter values times its rack's multiplier.
+    The vowel ratio is the fraction of the tiles that are A, E, I, O or U.  Alternative solutions
+    are the other ways to spell one word of the full word list per rack using every tile.
+    """
+
+    min_score: int | None = None
+    max_score: int | None = None
+    min_vowel_ratio: float | None = None
+    max_vowel_ratio: float | None = None
+    max_alternative_solutions: int | None = None
+
+    def __post_init__(self):
+        if (
+            self.min_score is not None
+            and self.max_score is not None
+            and self.min_score > self.max_score
+        ):
+            raise ValueError("min_score cannot be greater than max_score.")
+        if (
+            self.min_vowel_ratio is not None
+            and self.max_vowel_ratio is not None
+            and self.min_vowel_ratio > self.max_vowel_ratio
+        ):
+            raise ValueError("min_vowel_ratio cannot be greater than max_vowel_ratio.")
+
+    @property
+    def is_empty(self) -> bool:
+        return all(value is None for value in vars(self).values())
+
+
+@dataclass(frozen=True)
+class CandidateArrays:
+    """The common words of each rack length, with per-word arrays for scoring them in bulk."""
+
+    words: Mapping[int, tuple[str, ...]]
+    # Each word's letter values times its rack's multiplier
+    scores: Mapping[int, np.ndarray]
+    vowel_counts: Mapping[int, np.ndarray]
+    letter_values: Mapping[str, int]
+    version: str
+
+
+@config_file_cache("words-common.txt", "game_rules.yaml")
+def get_candidate_arrays(words_text: str, rules_text: str, *, version: str) -> CandidateArrays:
+    """
+    Returns the common word list, as `generate_puzzle` sees it, with each word's score and vowel
+    count.  Raises ValueError if there are no words of one of the rack lengths.
+    """
+    lexicon = get_puzzle_lexicon.build(words_text, rules_text, version=version)
+    multipliers = yaml.safe_load(rules_text).get("multipliers", {})
+    words = {length: lexicon.words_by_length.get(length, ()) for length in RACK_LENGTHS}
+    if not all(words.values()):
+        raise ValueError(
+            "Could not find words of all required lengths (3, 4, 5, 6) in words-common.txt"
+        )
+    return CandidateArrays(
+        words=words,
+        scores={
+            length: np.array(
+                [
+                    multipliers.get(length, 1)
+                    * sum(lexicon.letter_values.get(letter, 0) for letter in word)
+                    for word in bucket
+                ],
+                dtype=np.int64,
+            )
+            for length, bucket in words.items()
+        },
+        vowel_counts={
+            length: np.array(
+                [sum(letter in VOWELS for letter in word) for word in bucket], dtype=np.int64
+            )
+            for length, bucket in words.items()
+        },
+        letter_values=lexicon.letter_values,
+        version=version,
+    )
+
+
+def generate_constrained_puzzle(
+    seed: int | str | None = None,
+    constraints: PuzzleConstraints | None = None,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_batches: int = DEFAULT_MAX_BATCHES,
+) -> Puzzle:
+    """
+    Generates a puzzle satisfying `constraints`, deterministically for a given seed.
+
+    Args:
+        seed: As for `generate_puzzle`, e.g. the date's ISO format string.
+        constraints: The bounds the puzzle must be within (by default, none).
+        batch_size: How many candidate word quadruples to draw and check at once.
+        max_batches: How many batches to try before giving up.
+
+    Raises:
+        ValueError: If no candidate satisfied the constraints, or the common word list does not
+            contain words of all required lengths.
+    """
+    if constraints is None:
+        constraints = PuzzleConstraints()
+    rng = puzzle_rng(seed)
+    arrays = get_candidate_arrays()
+    tile_count = sum(RACK_LENGTHS)
+    # A separate NumPy generator for the candidates, seeded from the puzzle's own.
+    candidate_rng = np.random.default_rng(rng.getrandbits(128))
+
+    for _ in range(max_batches):
+        indices = {
+            length: candidate_rng.integers(len(arrays.words[length]), size=batch_size)
+            for length in RACK_LENGTHS
+        }
+        scores = sum(arrays.scores[length][indices[length]] for length in RACK_LENGTHS)
+        vowels = sum(arrays.vowel_counts[length][indices[length]] for length in RACK_LENGTHS)
+
+        accepted = np.ones(batch_size, dtype=bool)
+        if constraints.min_score is not None:
+            accepted &= scores >= constraints.min_score
+        if constraints.max_score is not None:
+            accepted &= scores <= constraints.max_score
+        # Compare counts rather than ratios, so a ratio of exactly 1/3 isn't lost to rounding.
+        if constraints.min_vowel_ratio is not None:
+            accepted &= vowels >= np.ceil(constraints.min_vowel_ratio * tile_count - 1e-9)
+        if constraints.max_vowel_ratio is not None:
+            accepted &= vowels <= np.floor(constraints.max_vowel_ratio * tile_count + 1e-9)
+
+        for candidate in np.flatnonzero(accepted)[:SOLUTION_CHECKS_PER_BATCH]:
+            words = [arrays.words[length][indices[length][candidate]] for length in RACK_LENGTHS]
+            if constraints.max_alternative_solutions is not None:
+                analysis = analyze_tiles("".join(words), get_letter_count_matrix())
+                # The target solution is one of the full solutions.
+                if analysis.full_solutions - 1 > constraints.max_alternative_solutions:
+                    continue
+            return build_puzzle(words, arrays.letter_values, rng)
+
+    raise ValueError(
+        f"No puzzle satisfying {constraints} was found in {max_batches * batch_size} candidates."
+    )
@@ -1,13 +1,32 @@
 import datetime
 import json
-from functools import cache
-from typing import cast
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import batched
 
-import yaml
 from redis import Redis
+from redis.exceptions import RedisError
 from sqlalchemy.exc import NoResultFound
-from sqlmodel import Session, func, select
+from sqlmodel import Session, col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.cache import (
+    AnyRedis,
+    LocalCache,
+    SingleFlight,
+    acquire_fill_lock_steps,
+    add_invalidation_callback,
+    redis_stats,
+    release_fill_lock_steps,
+    wait_for_fill_steps,
+)
+from app.compact import compact_puzzle_json, decode_puzzle
+from app.config import get_game_rules_file
+from app.io_steps import Steps, run
+from app.metrics import HistogramSeries, redis_errors, redis_get_duration, redis_mget_duration
 from app.models import PuzzleWithDate
 from app.settings import get_settings
 
@@ -17,8 +36,157 @@ def redis_key_for_date(date: datetime.date) -> str:
     return f"puzzle:{date.isoformat()}"
 
 
+def serialize_puzzle(puzzle: PuzzleWithDate) -> str:
+    """
+    Serializes a puzzle to the JSON that is cached and sent to clients.
+
+    The puzzle is re-validated first so the fields come out in declaration order; an ORM-loaded
+    row serializes them in whatever order SQLAlchemy populated them.  That keeps the cached JSON
+    identical to what get_puzzle_by_date's callers would re-serialize.
+    """
+    if puzzle.compact is not None:
+        return compact_puzzle_json(puzzle.date, puzzle.compact)
+    return PuzzleWithDate.model_validate(puzzle).model_dump_json()
+
+
+def puzzle_json_statement():
+    """
+    Selects the raw columns needed by puzzle_json_from_row, bypassing the ORM (and its
+    reconstructor), so compact rows go straight from bytes to JSON without building any Tiles.
+    """
+    return select(
+        PuzzleWithDate.date,
+        PuzzleWithDate.compact,
+        col(PuzzleWithDate.initial_racks),
+        col(PuzzleWithDate.target_solution),
+    )
+
+
+def puzzle_json_from_row(row: tuple) -> str:
+    """Serializes a row from puzzle_json_statement, exactly as serialize_puzzle would."""
+    date, compact, initial_racks, target_solution = row
+    if compact is not None:
+        return compact_puzzle_json(date, compact)
+    return PuzzleWithDate.model_validate(
+        {"date": date, "initial_racks": initial_racks, "target_solution": target_solution}
+    ).model_dump_json()
+
+
+def stored_tiles(compact: bytes | None, initial_racks: list | None) -> list[tuple[str, int]]:
+    """
+    Returns the (letter, value) of each tile of a stored puzzle, from its raw `compact` and
+    `initial_racks` columns, in whichever encoding it has.
+    """
+    if compact is not None:
+        racks, _ = decode_puzzle(compact)
+        return [(tile.letter, tile.value) for rack in racks for tile in rack]
+    return [(tile["letter"], tile["value"]) for rack in initial_racks or [] for tile in rack]
+
+
+@contextmanager
+def timed_redis_call(operation: str, duration: HistogramSeries):
+    """Records how long a Redis lookup takes, and counts it if it fails."""
+    started = time.perf_counter()
+    try:
+        yield
+    except RedisError:
+        redis_errors.inc(operation)
+        raise
+    finally:
+        duration.observe(time.perf_counter() - started)
+
+
+def remember_puzzle_json(local_cache: LocalCache | None, date: datetime.date, puzzle_json: str):
+    """
+    Stores a puzzle in the in-process cache, if there is one.  Today's puzzle is pinned since it's
+    by far the most requested.
+    """
+    if local_cache is not None:
+        local_cache.set(redis_key_for_date(date), puzzle_json, pin=date == datetime.date.today())
+
+
+def cached_puzzle_json_steps(
+    date: datetime.date, redis_client: AnyRedis | None, local_cache: LocalCache | None
+) -> Steps[str | None]:
+    """
+    Looks a puzzle up in the in-process cache and then in Redis, back-filling the local cache on a
+    Redis hit.  The flow behind get_cached_puzzle_json and its async version (see app.io_steps).
+
+    Returns:
+        The cached JSON for the puzzle, or None if neither tier has it.
+    """
+    key = redis_key_for_date(date)
+
+    if local_cache is not None:
+        cached_puzzle = local_cache.get(key)
+        if cached_puzzle:
+            return cached_puzzle
+
+    if redis_client:
+        with timed_redis_call("get", redis_get_duration):
+            cached_puzzle = yield redis_client.get(key)
+        if cached_puzzle:
+            redis_stats.hits += 1
+            remember_puzzle_json(local_cache, date, cached_puzzle)
+            return cached_puzzle
+        redis_stats.misses += 1
+
+    return None
+
+
+def get_cached_puzzle_json(
+    date: datetime.date,
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
+) -> str | None:
+    """See cached_puzzle_json_steps."""
+    return run(cached_puzzle_json_steps(date, redis_client, local_cache))
+
+
+def cache_puzzle_json_steps(
+    date: datetime.date,
+    puzzle_json: str,
+    redis_client: AnyRedis | None,
+    local_cache: LocalCache | None,
+) -> Steps[None]:
+    """Stores a serialized puzzle in every cache tier that's available."""
+    if redis_client:
+        yield redis_client.set(redis_key_for_date(date), puzzle_json)
+    remember_puzzle_json(local_cache, date, puzzle_json)
+
+
+def cache_puzzle_json(
+    date: datetime.date,
+    puzzle_json: str,
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
+):
+    """See cache_puzzle_json_steps."""
+    run(cache_puzzle_json_steps(date, puzzle_json, redis_client, local_cache))
+
+
+def puzzle_from_json(puzzle_json: str | None) -> PuzzleWithDate | None:
+    """Deserializes a puzzle cached or returned by get_puzzle_json_by_date."""
+    if puzzle_json is None:
+        return None
+    # It seems like we should be able to use PuzzleWithDate.model_validate_json() rather
+    # than deserializing ourselves, but apparently model_validate_json doesn't actually
+    # validate the JSON, it just parses it, at least for models that are also database
+    # tables.  (This includes not converting, say, the date string into a datetime.date
+    # object).  See:
+    # https://github.com/fastapi/sqlmodel/discussions/961
+    # https://github.com/fastapi/sqlmodel/issues/453
+    return PuzzleWithDate.model_validate(json.loads(puzzle_json))
+
+
 def get_puzzle_by_date(
-    db: Session, date: datetime.date, *, redis_client: Redis | None = None
+    db: Session,
+    date: datetime.date,
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
 ) -> PuzzleWithDate | None:
     """
     Retrieves a puzzle from the database by its date.
@@ -30,69 +198,356 @@ def get_puzzle_by_date(
     Returns:
         The PuzzleWithDate object if found, otherwise None.
     """
-    if redis_client:
-        cached_puzzle = redis_client.get(redis_key_for_date(date))
-        cached_puzzle = cast(str | None, cached_puzzle)
-        if cached_puzzle:
-            # It seems like we should be able to use PuzzleWithDate.model_validate_json() rather
-            # than deserializing ourselves, but apparently model_validate_json doesn't actually
-            # validate the JSON, it just parses it, at least for models that are also database
-            # tables.  (This includes not converting, say, the date string into a datetime.date
-            # object).  See:
-            # https://github.com/fastapi/sqlmodel/discussions/961
-            # https://github.com/fastapi/sqlmodel/issues/453
-            cached_puzzle = json.loads(cached_puzzle)
-            return PuzzleWithDate.model_validate(cached_puzzle)
+    return puzzle_from_json(
+        get_puzzle_json_by_date(db, date, redis_client=redis_client, local_cache=local_cache)
+    )
 
-    db_puzzle = db.get(PuzzleWithDate, date)
-    if db_puzzle and redis_client:
-        redis_client.set(redis_key_for_date(date), db_puzzle.model_dump_json())
 
-    return db_puzzle
+def get_puzzle_json_by_date(
+    db: Session,
+    date: datetime.date,
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
+) -> str | None:
+    """
+    Retrieves a puzzle as the camelCase JSON document that is sent to clients.
 
+    This is the fast path for the API: the cached value is already exactly what goes on the wire,
+    so a cache hit skips deserializing, validating, and re-serializing the puzzle entirely.  The
+    cache key and format are shared with get_puzzle_by_date.
 
-@cache
-def get_stable_game_rules(db: Session) -> dict:
+    Args:
+        db: The database session.
+        date: The date of the puzzle to retrieve.
+
+    Returns:
+        The serialized puzzle if found, otherwise None.
+    """
+    cached_puzzle = get_cached_puzzle_json(date, redis_client=redis_client, local_cache=local_cache)
+    if cached_puzzle:
+        return cached_puzzle
+
+    return load_puzzle_json(db, date, redis_client=redis_client, local_cache=local_cache)
+
+
+def load_puzzle_json_steps(
+    db: Session | AsyncSession,
+    date: datetime.date,
+    redis_client: AnyRedis | None,
+    local_cache: LocalCache | None,
+) -> Steps[str | None]:
     """
-    Loads and parses the game rules from game_rules.yaml and finds the earliest puzzle date
-    in the DB.
+    Handles a cache miss for a puzzle: loads it from the database and populates the caches.
 
-    The game rules and earliest puzzle date shouldn't change often (or maybe ever), so the
-    results of this can be safely cached.  It will raise FileNotFoundError or YAMLError if the
-    file is missing or malformed,  NoResultFound if there are no puzzles in the DB (suggesting
-    larger problems), or MultipleResultsFound if multiple puzzles have the same minimum date
-    (which shouldn't be possible due to uniqueness constraints in the DB).
+    At midnight every client asks for the new puzzle at once, so misses are coalesced to avoid a
+    stampede.  Within a process, concurrent misses for the same date share a single load (see
+    load_puzzle_json).  Across processes, a short Redis lock picks one to read the database; the
+    others serve a stale local copy if they have one, or else wait for the lock holder to fill
+    Redis.  If it never does (the puzzle doesn't exist, or the holder died), they fall back to
+    reading the database themselves.
 
     Returns:
-        A dictionary containing the game rules and earliest puzzle date
+        The serialized puzzle if found, otherwise None.
     """
-    settings = get_settings()
-    rules_path = settings.config_directory / "game_rules.yaml"
-    with open(rules_path, "r", encoding="utf-8") as f:
-        rules = yaml.safe_load(f)
+    key = redis_key_for_date(date)
+    token = (yield from acquire_fill_lock_steps(redis_client, key)) if redis_client else None
+    if redis_client and token is None:
+        puzzle_json = local_cache.get_stale(key) if local_cache is not None else None
+        puzzle_json = puzzle_json or (yield from wait_for_fill_steps(redis_client, key))
+        if puzzle_json:
+            remember_puzzle_json(local_cache, date, puzzle_json)
+            return puzzle_json
+
+    try:
+        # Another process may have filled the key between our miss and taking the lock.
+        puzzle_json = (yield redis_client.get(key)) if token else None  # type: ignore[union-attr]
+        if puzzle_json is None:
+            result = yield db.exec(puzzle_json_statement().where(PuzzleWithDate.date == date))
+            row = result.first()
+            if row is None:
+                return None
+            puzzle_json = puzzle_json_from_row(row)
+            if token:
+                yield redis_client.set(key, puzzle_json)  # type: ignore[union-attr]
+        remember_puzzle_json(local_cache, date, puzzle_json)
+        return puzzle_json
+    finally:
+        if token:
+            yield from release_fill_lock_steps(redis_client, key, token)  # type: ignore[arg-type]
+
+
+# In-flight cache fills in this process, by date.
+_puzzle_loads: SingleFlight[str | None] = SingleFlight()
+
+
+def load_puzzle_json(
+    db: Session,
+    date: datetime.date,
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
+) -> str | None:
+    """See load_puzzle_json_steps."""
+    return _puzzle_loads.do(
+        date, lambda: run(load_puzzle_json_steps(db, date, redis_client, local_cache))
+    )
+
+
+# How many dates iter_puzzle_jsons_in_range looks up per batch (one MGET and one query each).
+PUZZLE_BATCH_DAYS = 100
+
+
+def dates_between(start_date: datetime.date, end_date: datetime.date) -> Iterator[datetime.date]:
+    """Yields every date from start_date to end_date, inclusive."""
+    for n in range((end_date - start_date).days + 1):
+        yield start_date + datetime.timedelta(days=n)
 
-    # This statement correctly uses select() to wrap the aggregate function,
-    # which satisfies type checkers like Pylance.
-    statement = select(func.min(PuzzleWithDate.date))
 
-    # .scalar() will return the date object, or None if the table is empty.
-    earliest_date = db.exec(statement).one()
+def date_batches(
+    start_date: datetime.date, end_date: datetime.date
+) -> Iterator[list[datetime.date]]:
+    """Splits the dates from start_date to end_date into lists of at most PUZZLE_BATCH_DAYS."""
+    for dates in batched(dates_between(start_date, end_date), PUZZLE_BATCH_DAYS):
+        yield list(dates)
 
+
+def _find_in_local_cache(
+    dates: list[datetime.date], local_cache: LocalCache | None, found: dict[datetime.date, str]
+) -> list[datetime.date]:
+    """Adds the dates held by `local_cache` to `found`, and returns the rest."""
+    if local_cache is None:
+        return dates
+    missing = []
+    for date in dates:
+        puzzle_json = local_cache.get(redis_key_for_date(date))
+        if puzzle_json:
+            found[date] = puzzle_json
+        else:
+            missing.append(date)
+    return missing
+
+
+def _record_redis_values(
+    dates: list[datetime.date], values: list, found: dict[datetime.date, str]
+) -> list[datetime.date]:
+    """Adds the results of an MGET for `dates` to `found`, and returns the dates that missed."""
+    missing = []
+    for date, puzzle_json in zip(dates, values):
+        if puzzle_json:
+            found[date] = puzzle_json
+        else:
+            missing.append(date)
+    redis_stats.hits += len(dates) - len(missing)
+    redis_stats.misses += len(missing)
+    return missing
+
+
+def puzzle_rows_statement(dates: list[datetime.date]):
+    """
+    Selects the rows for puzzle_json_from_row covering `dates` (which must be sorted) with a
+    single range scan of the primary key.  Rows for dates in between that aren't in `dates` are
+    included too; see _serialize_rows.
+    """
+    return (
+        puzzle_json_statement()
+        .where(col(PuzzleWithDate.date).between(dates[0], dates[-1]))
+        .order_by(col(PuzzleWithDate.date))
+    )
+
+
+def _serialize_rows(rows: Iterable[tuple], dates: list[datetime.date]) -> dict[datetime.date, str]:
+    wanted = set(dates)
+    return {row[0]: puzzle_json_from_row(row) for row in rows if row[0] in wanted}
+
+
+def puzzle_jsons_for_dates_steps(
+    db: Session | AsyncSession,
+    dates: list[datetime.date],
+    redis_client: AnyRedis | None,
+    local_cache: LocalCache | None,
+) -> Steps[list[str]]:
+    """
+    Retrieves the puzzles for several dates (sorted, and none in the future) as client JSON, in
+    date order, skipping dates that have no puzzle.
+
+    Everything is looked up at once: the dates missing from the local cache with one Redis MGET,
+    and the dates missing from Redis with one range query, whose results are written back to Redis
+    with one MSET.  Unlike get_puzzle_json_by_date, this doesn't fill the local cache (a page of
+    archive dates would just push out the popular ones), and doesn't take fill locks, since old
+    puzzles aren't subject to the midnight stampede.
+    """
+    found: dict[datetime.date, str] = {}
+    missing = _find_in_local_cache(dates, local_cache, found)
+
+    if redis_client and missing:
+        with timed_redis_call("mget", redis_mget_duration):
+            values = yield redis_client.mget([redis_key_for_date(date) for date in missing])
+        missing = _record_redis_values(missing, values, found)
+
+    if missing:
+        loaded = _serialize_rows((yield db.exec(puzzle_rows_statement(missing))), missing)
+        if redis_client and loaded:
+            yield redis_client.mset(
+                {redis_key_for_date(date): value for date, value in loaded.items()}
+            )
+        found.update(loaded)
+
+    return [found[date] for date in dates if date in found]
+
+
+def get_puzzle_jsons_for_dates(
+    db: Session,
+    dates: list[datetime.date],
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
+) -> list[str]:
+    """See puzzle_jsons_for_dates_steps."""
+    return run(puzzle_jsons_for_dates_steps(db, dates, redis_client, local_cache))
+
+
+def iter_puzzle_jsons_in_range(
+    db: Session,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    *,
+    redis_client: Redis | None = None,
+    local_cache: LocalCache | None = None,
+) -> Iterator[str]:
+    """
+    Yields the puzzles from start_date to end_date (inclusive) as client JSON, in date order,
+    looking them up PUZZLE_BATCH_DAYS at a time with get_puzzle_jsons_for_dates so that a long
+    range is never held in memory all at once.
+    """
+    for dates in date_batches(start_date, end_date):
+        yield from get_puzzle_jsons_for_dates(
+            db, dates, redis_client=redis_client, local_cache=local_cache
+        )
+
+
+# Pseudo-key announced through cache.invalidate_cached_keys whenever puzzles are added, so every
+# process drops its PuzzleRange snapshot.
+PUZZLE_RANGE_KEY = "meta:puzzle-range"
+
+
+@dataclass(frozen=True)
+class PuzzleRange:
+    """Which puzzles exist in the database."""
+
+    earliest_date: datetime.date
+    latest_date: datetime.date
+    count: int
+
+
+class PuzzleRangeSnapshot:
+    """
+    A process-wide cached PuzzleRange.  It's dropped when puzzles are added (see
+    PUZZLE_RANGE_KEY), and as a fallback for processes that don't hear about inserts (e.g. when
+    Redis isn't configured) it also expires after `Settings.puzzle_range_ttl_seconds`.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._value: tuple[float, PuzzleRange] | None = None
+        # Bumped on every invalidation, so that a query that raced with an insert isn't stored.
+        self._generation = 0
+
+    def get(self) -> tuple[PuzzleRange | None, int]:
+        """Returns the cached range (or None if it's missing or expired) and the generation."""
+        with self._lock:
+            value = self._value
+            if (
+                value is not None
+                and self.clock() - value[0] < get_settings().puzzle_range_ttl_seconds
+            ):
+                return value[1], self._generation
+            return None, self._generation
+
+    def store(self, puzzle_range: PuzzleRange, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                self._value = (self.clock(), puzzle_range)
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._generation += 1
+
+
+puzzle_range_snapshot = PuzzleRangeSnapshot()
+
+
+def _on_invalidate(key: str):
+    if key in (PUZZLE_RANGE_KEY, "*"):
+        puzzle_range_snapshot.invalidate()
+
+
+add_invalidation_callback(_on_invalidate)
+
+
+def puzzle_range_statement():
+    return select(
+        func.min(PuzzleWithDate.date), func.max(PuzzleWithDate.date), func.count()
+    ).select_from(PuzzleWithDate)
+
+
+def make_puzzle_range(row: tuple) -> PuzzleRange:
+    earliest_date, latest_date, count = row
     if earliest_date is None:
-        # Manually raising NoResultFound is appropriate here. It signals that a
-        # required piece of data could not be found, and it aligns with the
-        # expectations of the test suite.
+        # Not cached, so that the first puzzle to be generated is picked up right away.
         raise NoResultFound("No puzzles found in the database to determine the earliest date.")
+    return PuzzleRange(earliest_date=earliest_date, latest_date=latest_date, count=count)
 
-    rules["earliest_date"] = earliest_date.isoformat()
 
-    return rules
+def puzzle_range_steps(db: Session | AsyncSession) -> Steps[PuzzleRange]:
+    """
+    Returns the range of puzzles in the database, from the process-wide snapshot if possible.
+    Raises NoResultFound if there are no puzzles at all.
+    """
+    puzzle_range, generation = puzzle_range_snapshot.get()
+    if puzzle_range is None:
+        result = yield db.exec(puzzle_range_statement())
+        puzzle_range = make_puzzle_range(result.one())
+        puzzle_range_snapshot.store(puzzle_range, generation)
+    return puzzle_range
+
+
+def get_puzzle_range(db: Session) -> PuzzleRange:
+    """See puzzle_range_steps."""
+    return run(puzzle_range_steps(db))
+
+
+def build_game_rules(rules: Mapping, puzzle_range: PuzzleRange) -> dict:
+    config = dict(rules)
+    config["earliest_date"] = puzzle_range.earliest_date.isoformat()
+    return config
+
+
+def get_stable_game_rules(db: Session) -> dict:
+    """
+    Returns the game rules from game_rules.yaml along with the earliest puzzle date in the DB.
+
+    Both come from process-wide snapshots (see config.get_game_rules_file and
+    get_puzzle_range), so on the steady-state path this touches neither the disk nor the
+    database.  It will raise FileNotFoundError or YAMLError if the file is missing or malformed,
+    or NoResultFound if there are no puzzles in the DB (suggesting larger problems).
+
+    Returns:
+        A new dictionary containing the game rules and earliest puzzle date
+    """
+    return build_game_rules(get_game_rules_file(), get_puzzle_range(db))
 
 
 def get_game_rules(db: Session) -> dict:
     """
     Combines the stable, cached game rules with dynamic, per-request data.
     """
-    config = get_stable_game_rules(db)
+    return with_current_date(get_stable_game_rules(db))
+
+
+def with_current_date(config: dict) -> dict:
+    """Adds today's date to game rules from get_stable_game_rules, and returns them."""
     config["current_date"] = datetime.date.today().isoformat()
     return config
@@ -1,9 +1,14 @@
 import json
-from typing import Generator
+from collections.abc import AsyncGenerator, Generator
+from functools import cache
 
 from fastapi.encoders import jsonable_encoder
-from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy import Engine, inspect, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from .metrics import instrument_engine
 from .settings import get_settings
 
 settings = get_settings()
@@ -19,6 +24,7 @@ engine = create_engine(
     connect_args=settings.database_connect_args,
     json_serializer=custom_serializer,
 )
+instrument_engine(engine)
 
 
 def create_db_and_tables():
@@ -27,6 +33,28 @@ def create_db_and_tables():
     This function is called on application startup.
     """
     SQLModel.metadata.create_all(engine)
+    add_missing_columns(engine)
+
+
+def add_missing_columns(engine: Engine):
+    """
+    Adds any nullable columns that a model has gained since its table was created (e.g.
+    `PuzzleWithDate.compact`), since create_all() only creates missing tables.  There are no
+    migrations beyond this; anything more involved has to be done by hand.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(
+                    text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}')
+                )
 
 
 def get_session() -> Generator[Session, None, None]:
@@ -35,3 +63,37 @@ def get_session() -> Generator[Session, None, None]:
     """
     with Session(engine) as session:
         yield session
+
+
+def async_database_url(database_url: str) -> str:
+    """
+    Converts a database URL to one that uses an async driver (e.g. `sqlite:///db.sqlite3` becomes
+    `sqlite+aiosqlite:///db.sqlite3`).  URLs that already name a driver are returned unchanged.
+    """
+    scheme, separator, rest = database_url.partition("://")
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite{separator}{rest}"
+    return database_url
+
+
+@cache
+def get_async_engine() -> AsyncEngine:
+    """
+    Returns the async counterpart of `engine`, used when `Settings.async_mode` is enabled.  It's
+    created lazily so that sync-only processes (like the scheduler) never load the async driver.
+    """
+    async_engine = create_async_engine(
+        async_database_url(settings.database_url),
+        connect_args=settings.database_connect_args,
+        json_serializer=custom_serializer,
+    )
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession]:
+    """
+    FastAPI dependency to create and yield an async database session.
+    """
+    async with AsyncSession(get_async_engine()) as session:
+        yield session
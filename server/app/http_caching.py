@@ -0,0 +1,129 @@
+"""
+Helpers for HTTP caching of puzzle and word list responses (validators, Cache-Control and
+precompressed bodies).
+
+Past puzzles never change, so browsers and the Caddy front end can keep them indefinitely.
+Today's puzzle can also be cached, but only until local midnight, when "today" moves on.
+"""
+
+import datetime
+import hashlib
+from collections.abc import Iterable
+
+from fastapi import Response, status
+
+from app.wordlist import WordList
+
+# One year, the conventional "forever" for immutable responses.
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def make_etag(body: str) -> str:
+    """Returns a strong ETag derived from a hash of the response body."""
+    return '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Checks an If-None-Match header against an ETag, using the weak comparison that RFC 9110
+    requires for If-None-Match (so `W/"abc"` matches `"abc"`).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+    return etag.removeprefix("W/") in candidates
+
+
+def seconds_until_local_midnight(now: datetime.datetime | None = None) -> int:
+    """
+    Returns the number of seconds from `now` (default: the current local time) until the next
+    local midnight, accounting for DST changes in between.
+    """
+    now = (now or datetime.datetime.now()).astimezone()
+    next_midnight = datetime.datetime.combine(
+        now.date() + datetime.timedelta(days=1), datetime.time()
+    ).astimezone()
+    return max(0, int((next_midnight - now).total_seconds()))
+
+
+def puzzle_cache_control(date: datetime.date, now: datetime.datetime | None = None) -> str:
+    """
+    Returns the Cache-Control header value for the puzzle on `date`: immutable for past dates,
+    and cacheable until the next local midnight for today's puzzle.
+    """
+    now = now or datetime.datetime.now()
+    if date < now.date():
+        return f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    return f"public, max-age={seconds_until_local_midnight(now)}"
+
+
+def puzzle_response(
+    puzzle_json: str,
+    date: datetime.date,
+    if_none_match: str | None,
+    now: datetime.datetime | None = None,
+) -> Response:
+    """
+    Builds the response for a serialized puzzle, including ETag and Cache-Control headers, or a
+    bodyless 304 Not Modified if the client already has this version.
+    """
+    etag = make_etag(puzzle_json)
+    headers = {"ETag": etag, "Cache-Control": puzzle_cache_control(date, now)}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=puzzle_json, media_type="application/json", headers=headers)
+
+
+# Content codings we precompress, in order of preference.
+PREFERRED_ENCODINGS = ("br", "gzip")
+
+
+def choose_encoding(accept_encoding: str | None, available: Iterable[str]) -> str:
+    """
+    Picks the preferred content coding from `available` that an Accept-Encoding header allows,
+    or "identity" if there isn't one.  Codings with q=0 are treated as refused.
+    """
+    accepted: dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            accepted[coding.lower()] = quality
+
+    available = set(available)
+    for coding in PREFERRED_ENCODINGS:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if coding in available and quality > 0:
+            return coding
+    return "identity"
+
+
+def wordlist_response(
+    wordlist: WordList, if_none_match: str | None, accept_encoding: str | None
+) -> Response:
+    """
+    Builds the response for /api/wordlist in the best precompressed coding the client accepts.
+
+    The list can change whenever words-full.txt is edited, so clients must revalidate every time
+    (`no-cache`), but that's just a 304 unless the version has actually changed.  Each coding is a
+    different representation, so each gets its own ETag.
+    """
+    encoding = choose_encoding(accept_encoding, wordlist.bodies)
+    etag = f'"{wordlist.version}"' if encoding == "identity" else f'"{wordlist.version}-{encoding}"'
+    headers = {"ETag": etag, "Cache-Control": "public, no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(
+        content=wordlist.bodies[encoding], media_type="application/json", headers=headers
+    )
@@ -0,0 +1,84 @@
+"""
+Runs I/O flows that are written once for both the sync and the async request paths.
+
+A flow is a generator that yields each Redis or database call it makes, and is sent back the
+result, e.g. `value = yield redis_client.get(key)`.  With a sync client (redis.Redis, Session),
+the call has already happened by the time it's yielded, so `run` just hands the value straight
+back.  With an async one (redis.asyncio.Redis, AsyncSession), the call returns an awaitable, which
+`run_async` awaits, throwing any error back into the generator so that its `try` blocks behave
+exactly as they would in sync code.  Cancellation (or KeyboardInterrupt) isn't thrown in, since
+a cancelled task can't await anything more: the generator is closed, so its `finally` blocks
+still run, but the calls they yield are dropped (see `_abandon`).  Waits are yielded as `Pause`s,
+since sync and async code sleep differently.
+
+This keeps the caching logic (tiers, fill locks, counters) in app.crud and app.cache, with
+app.async_crud only choosing the driver.
+"""
+
+import asyncio
+import inspect
+import time
+from collections.abc import Generator
+from dataclasses import dataclass
+from typing import Any
+
+type Steps[T] = Generator[Any, Any, T]
+
+
+@dataclass(frozen=True)
+class Pause:
+    """Yielded by a flow to sleep for `seconds`."""
+
+    seconds: float
+
+
+def run[T](steps: Steps[T]) -> T:
+    """Runs a flow whose calls are made with sync clients, returning its result."""
+    try:
+        step = next(steps)
+        while True:
+            if isinstance(step, Pause):
+                time.sleep(step.seconds)
+                step = steps.send(None)
+            else:
+                step = steps.send(step)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def run_async[T](steps: Steps[T]) -> T:
+    """Runs a flow whose calls are made with async clients, returning its result."""
+    try:
+        step = next(steps)
+        while True:
+            try:
+                if isinstance(step, Pause):
+                    result = await asyncio.sleep(step.seconds)
+                elif inspect.isawaitable(step):
+                    result = await step
+                else:
+                    result = step
+            except BaseException as exc:
+                if not isinstance(exc, Exception):
+                    _abandon(steps)
+                    raise
+                step = steps.throw(exc)
+            else:
+                step = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+def _abandon(steps: Steps[Any]):
+    """
+    Closes a flow whose task was cancelled mid-call.  Its `finally` blocks run, but the calls they
+    yield are discarded unawaited (e.g. a fill lock is then left to expire).
+    """
+    try:
+        step = steps.throw(GeneratorExit())
+        while True:
+            if inspect.iscoroutine(step):
+                step.close()
+            step = steps.send(None)
+    except (GeneratorExit, StopIteration):
+        pass
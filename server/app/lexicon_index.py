@@ -0,0 +1,353 @@
+"""
+The word lists (`config/words-full.txt` and `config/words-common.txt`) compiled into a single
+binary file that each process memory-maps, rather than parsing the text into Python objects.
+
+Every process that opens the file shares the same pages through the OS page cache, so the API's
+workers, the scheduler's scripts and any other process pay for one copy between them, and opening
+it costs next to nothing.  `app.scripts.compile_lexicon` writes it (the Docker image does this at
+build time), and `get_lexicon_index` compiles it itself if it's missing or out of date.
+
+The file is laid out as (all integers little-endian):
+
+    header:   magic b"LEXIDX01", the 32-byte SHA-256 digest of the two source files (as in
+              app.config), and the number of length buckets (u32)
+    buckets:  for each word length, in increasing order, ten u32s: the length, the number of
+              signatures, the number of words, the number of bits in the hash table's size, and
+              the offsets of its six sections, which are stored kind by kind (every bucket's
+              signatures, then every bucket's slots, and so on):
+    - signatures: each distinct signature (a word's letters, sorted), `length` ASCII bytes each,
+                  in sorted order
+    - slots:      an open-addressing hash table of 2**bits u32s, each 0 (empty) or 1 + the
+                  position of a signature, probed linearly from `slot_for(signature, bits)`
+    - groups:     (signatures + 1) u32s: where each signature's words start in `words`
+    - counts:     26 bytes per signature, counting each letter A to Z
+    - words:      `length` ASCII bytes each, grouped by signature and sorted within each group
+    - flags:      one byte per word, IN_FULL and/or IN_COMMON
+
+Finding a signature takes one or two probes of the hash table, and the rest are reads of
+fixed-width records at known offsets, so nothing is built per word.  Since every bucket's letter
+counts are next to each other, they can be viewed in place as one (signatures, 26) array (see
+app.analytics).
+"""
+
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.config import RULES_CHECK_INTERVAL, config_file_cache
+from app.settings import get_settings
+from app.wordlist import words_by_length
+
+MAGIC = b"LEXIDX01"
+HEADER = struct.Struct("<8s32sI")
+BUCKET = struct.Struct("<10I")
+U32 = struct.Struct("<I")
+TWO_U32 = struct.Struct("<2I")
+ALPHABET_SIZE = 26
+# signatures, slots, groups, counts, words and flags
+SECTION_KINDS = 6
+
+IN_FULL = 1
+IN_COMMON = 2
+
+
+class LexiconIndexError(ValueError):
+    """Raised when a file isn't a lexicon index this code can read."""
+
+
+@dataclass(frozen=True, slots=True)
+class Bucket:
+    """Where one word length's sections are in the file."""
+
+    length: int
+    signature_count: int
+    word_count: int
+    slot_bits: int
+    signatures_offset: int
+    slots_offset: int
+    groups_offset: int
+    counts_offset: int
+    words_offset: int
+    flags_offset: int
+
+
+def slot_for(signature: bytes, bits: int) -> int:
+    """The hash table slot to start probing from for a signature (Fibonacci hashing)."""
+    return ((int.from_bytes(signature, "big") * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> (
+        64 - bits
+    )
+
+
+def _signature(word: str) -> bytes | None:
+    """Returns the sorted letters of an A-Z word as bytes, or None if it has other characters."""
+    if not (word.isascii() and word.isalpha()):
+        return None
+    return "".join(sorted(word.upper())).encode("ascii")
+
+
+def compile_lexicon_index(
+    full_words: Mapping[int, Iterable[str]], common_words: Mapping[int, Iterable[str]], digest: str
+) -> bytes:
+    """
+    Compiles word lists (as from `words_by_length`) into the layout described above.  `digest` is
+    the hex digest of the sources, which `get_lexicon_index` compares to decide if it's stale.
+    Words with characters other than A-Z are left out.
+    """
+    flags: dict[str, int] = {}
+    for words, flag in ((full_words, IN_FULL), (common_words, IN_COMMON)):
+        for bucket in words.values():
+            for word in bucket:
+                word = word.upper()
+                if word.isascii() and word.isalpha():
+                    flags[word] = flags.get(word, 0) | flag
+
+    # Group by length, then by signature, with words sorted within each signature.
+    by_length: dict[int, dict[bytes, list[str]]] = {}
+    for word in sorted(flags):
+        signature = "".join(sorted(word)).encode("ascii")
+        by_length.setdefault(len(word), {}).setdefault(signature, []).append(word)
+    lengths = sorted(by_length)
+
+    parts_by_length = []
+    for length in lengths:
+        groups = by_length[length]
+        signatures = sorted(groups)
+        words = [word for signature in signatures for word in groups[signature]]
+
+        # At most half full, so probe sequences stay short.
+        bits = max(1, (2 * len(signatures) - 1).bit_length())
+        mask = (1 << bits) - 1
+        slots = [0] * (1 << bits)
+        for position, signature in enumerate(signatures):
+            slot = slot_for(signature, bits)
+            while slots[slot]:
+                slot = (slot + 1) & mask
+            slots[slot] = position + 1
+
+        starts = [0]
+        counts = bytearray()
+        for signature in signatures:
+            starts.append(starts[-1] + len(groups[signature]))
+            letter_counts = [0] * ALPHABET_SIZE
+            for letter in signature:
+                letter_counts[letter - ord("A")] += 1
+            counts.extend(letter_counts)
+
+        parts = [
+            b"".join(signatures),
+            struct.pack(f"<{len(slots)}I", *slots),
+            struct.pack(f"<{len(starts)}I", *starts),
+            bytes(counts),
+            "".join(words).encode("ascii"),
+            bytes(flags[word] for word in words),
+        ]
+        parts_by_length.append((length, len(signatures), len(words), bits, parts))
+
+    # Lay the sections out kind by kind, and then fill in each bucket's offsets.
+    offset = HEADER.size + BUCKET.size * len(lengths)
+    offsets: list[list[int]] = [[] for _ in lengths]
+    sections = []
+    for kind in range(SECTION_KINDS):
+        for position, (*_, parts) in enumerate(parts_by_length):
+            offsets[position].append(offset)
+            offset += len(parts[kind])
+            sections.append(parts[kind])
+    table = [
+        BUCKET.pack(length, signature_count, word_count, bits, *bucket_offsets)
+        for (length, signature_count, word_count, bits, _), bucket_offsets in zip(
+            parts_by_length, offsets
+        )
+    ]
+
+    header = HEADER.pack(MAGIC, bytes.fromhex(digest), len(lengths))
+    return b"".join([header, *table, *sections])
+
+
+class LexiconIndex:
+    """
+    Read-only queries over a compiled lexicon index, in a memory-mapped file or any other buffer.
+
+    Word lookups (`in`, `lookup`, `anagrams`, `words_within`) only consider the full word list
+    unless asked for common words; `is_common` checks the common list.
+    """
+
+    def __init__(self, buffer):
+        if len(buffer) < HEADER.size:
+            raise LexiconIndexError("The lexicon index is truncated.")
+        magic, digest, bucket_count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise LexiconIndexError("Not a lexicon index, or one from another version.")
+        self.buffer = buffer
+        self.version = digest.hex()
+        self.buckets: dict[int, Bucket] = {}
+        for position in range(bucket_count):
+            bucket = Bucket(*BUCKET.unpack_from(buffer, HEADER.size + position * BUCKET.size))
+            if bucket.flags_offset + bucket.word_count > len(buffer):
+                raise LexiconIndexError("The lexicon index is truncated.")
+            self.buckets[bucket.length] = bucket
+
+    @classmethod
+    def open(cls, path: Path) -> "LexiconIndex":
+        """Memory-maps the index at `path` (read-only)."""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_words(
+        cls,
+        full_words: Mapping[int, Iterable[str]],
+        common_words: Mapping[int, Iterable[str]] | None = None,
+        version: str = "0" * 64,
+    ) -> "LexiconIndex":
+        """Compiles word lists into an in-memory index (mostly useful for tests)."""
+        return cls(compile_lexicon_index(full_words, common_words or {}, version))
+
+    def __len__(self) -> int:
+        """The number of words in the full list."""
+        return sum(
+            sum(1 for flag in self._flags(bucket, 0, bucket.word_count) if flag & IN_FULL)
+            for bucket in self.buckets.values()
+        )
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and self._word_flags(word) & IN_FULL != 0
+
+    def is_common(self, word: str) -> bool:
+        """Whether the word is in the common word list."""
+        return self._word_flags(word) & IN_COMMON != 0
+
+    def lookup(self, letters: str) -> str | None:
+        """
+        Returns the alphabetically first word made of exactly these (sorted, upper-case) letters,
+        if there is one, like `app.solver.AnagramIndex.lookup`.
+        """
+        return next(self._group_words(letters.encode("ascii"), IN_FULL), None)
+
+    def anagrams(self, letters: str, *, common: bool = False) -> list[str]:
+        """Returns the words made of exactly these letters (in any order and case)."""
+        signature = _signature(letters)
+        if signature is None:
+            return []
+        return list(self._group_words(signature, IN_COMMON if common else IN_FULL))
+
+    def words_within(
+        self, letters: str, lengths: Iterable[int] | None = None, *, common: bool = False
+    ) -> list[str]:
+        """
+        Returns the words (of the given lengths, or any) that can be spelled from a sub-multiset of
+        these letters, shortest first and then alphabetically by signature.  Each distinct
+        sub-multiset is looked up once, so this suits racks of tiles rather than long strings.
+        """
+        signature = _signature(letters)
+        if signature is None:
+            return []
+        wanted = sorted(self.buckets if lengths is None else set(lengths) & set(self.buckets))
+        if not wanted:
+            return []
+
+        letter_counts: dict[int, int] = {}
+        for letter in signature:
+            letter_counts[letter] = letter_counts.get(letter, 0) + 1
+        partial = [b""]
+        for letter, count in sorted(letter_counts.items()):
+            partial = [
+                prefix + bytes([letter]) * repeat
+                for prefix in partial
+                for repeat in range(min(count, wanted[-1] - len(prefix)) + 1)
+            ]
+
+        flag = IN_COMMON if common else IN_FULL
+        wanted_set = set(wanted)
+        candidates = sorted((len(s), s) for s in partial if len(s) in wanted_set)
+        return [word for _, sub in candidates for word in self._group_words(sub, flag)]
+
+    def _flags(self, bucket: Bucket, start: int, stop: int) -> bytes:
+        return self.buffer[bucket.flags_offset + start : bucket.flags_offset + stop]
+
+    def _find_group(self, signature: bytes) -> tuple[Bucket, int, int] | None:
+        """Returns the bucket and range of word positions for a signature, if it has any words."""
+        bucket = self.buckets.get(len(signature))
+        if bucket is None:
+            return None
+        buffer = self.buffer
+        length = bucket.length
+        mask = (1 << bucket.slot_bits) - 1
+        slot = slot_for(signature, bucket.slot_bits)
+        while True:
+            (entry,) = U32.unpack_from(buffer, bucket.slots_offset + slot * U32.size)
+            if not entry:
+                return None
+            start = bucket.signatures_offset + (entry - 1) * length
+            if buffer[start : start + length] == signature:
+                break
+            slot = (slot + 1) & mask
+        start, stop = TWO_U32.unpack_from(buffer, bucket.groups_offset + (entry - 1) * U32.size)
+        return bucket, start, stop
+
+    def _group_words(self, signature: bytes, flag: int) -> Iterator[str]:
+        found = self._find_group(signature)
+        if found is None:
+            return
+        bucket, start, stop = found
+        length = bucket.length
+        for position, word_flags in enumerate(self._flags(bucket, start, stop), start):
+            if word_flags & flag:
+                word_start = bucket.words_offset + position * length
+                yield self.buffer[word_start : word_start + length].decode("ascii")
+
+    def _word_flags(self, word: str) -> int:
+        signature = _signature(word)
+        found = self._find_group(signature) if signature is not None else None
+        if found is None:
+            return 0
+        bucket, start, stop = found
+        encoded = word.upper().encode("ascii")
+        length = bucket.length
+        for position in range(start, stop):
+            word_start = bucket.words_offset + position * length
+            if self.buffer[word_start : word_start + length] == encoded:
+                return self.buffer[bucket.flags_offset + position]
+        return 0
+
+
+def write_lexicon_index(full_text: str, common_text: str, digest: str, path: Path) -> int:
+    """
+    Compiles the word list texts and writes the index to `path`, atomically, so that processes
+    that already have the old file mapped keep reading it undisturbed.  Returns its size.
+    """
+    data = compile_lexicon_index(words_by_length(full_text), words_by_length(common_text), digest)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name, delete=False) as f:
+        f.write(data)
+    os.replace(f.name, path)
+    return len(data)
+
+
+@config_file_cache("words-full.txt", "words-common.txt", check_interval=RULES_CHECK_INTERVAL)
+def get_lexicon_index(full_text: str, common_text: str, *, version: str) -> LexiconIndex:
+    """
+    Returns the compiled index at `Settings.lexicon_index_path`, memory-mapped.  If it's missing,
+    unreadable, or was compiled from other versions of the word lists, it's compiled first (in
+    memory, if it can't be written).
+    """
+    path = get_settings().lexicon_index_path
+    try:
+        index = LexiconIndex.open(path)
+        if index.version == version:
+            return index
+        logging.info(f"{path} is out of date with the word lists; recompiling it.")
+    except (OSError, ValueError) as e:
+        logging.info(f"Could not open {path} ({e}); compiling it.")
+    try:
+        write_lexicon_index(full_text, common_text, version, path)
+    except OSError as e:
+        # E.g. a read-only filesystem: this process can still use a private copy.
+        logging.warning(f"Could not write {path} ({e}); compiling it in memory instead.")
+        full_words, common_words = words_by_length(full_text), words_by_length(common_text)
+        return LexiconIndex(compile_lexicon_index(full_words, common_words, version))
+    return LexiconIndex.open(path)
@@ -1,19 +1,56 @@
+import asyncio
 import datetime
+import logging
 from contextlib import asynccontextmanager
 
+import anyio.to_thread
 import sentry_sdk
-import yaml
-from fastapi import Depends, FastAPI, HTTPException, status
-from sqlalchemy.exc import NoResultFound, MultipleResultsFound
+from fastapi import APIRouter, Depends, FastAPI, Header
+from fastapi.responses import Response
+from sqlalchemy.exc import NoResultFound
 from sqlmodel import Session
 
-from . import crud
-from .cache import RedisDep
-from .database import create_db_and_tables, get_session
+from . import async_routes, crud, scoring
+from .cache import (
+    LocalCacheDep,
+    RedisDep,
+    get_async_redis_client,
+    get_local_cache,
+    get_redis_client,
+    redis_stats,
+    start_invalidation_listener,
+)
+from .database import create_db_and_tables, get_async_engine, get_session
+from .http_caching import puzzle_response
+from .lexicon_index import get_lexicon_index
 from .logging_config import setup_logging
-from .models import GameRules, PuzzleWithDate
+from .metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, Sampled
+from .profiling import ProfilingMiddleware, SamplingProfiler, dump_on_signal
+from .models import (
+    BatchScoreRequest,
+    BatchScoreResponse,
+    GameRules,
+    PuzzleWithDate,
+    ScoreResult,
+    ScoreSubmission,
+)
+from .route_helpers import (
+    batch_score_response,
+    check_batch_size,
+    check_not_spoiler,
+    check_puzzle_range,
+    clamp_stream_range,
+    game_rules_errors,
+    get_wordlist_response,
+    puzzle_stream_response,
+    puzzles_response,
+    require_puzzle,
+    score_response,
+)
+from .scoring import ScoringRulesDep
 from .settings import get_settings
 from .scripts.generate_puzzles import generate_daily_puzzles
+from .scripts.warm_cache import prewarm_before_midnight, warm_dates
 
 
 sentry_sdk.init(
@@ -30,14 +67,70 @@ async def lifespan(app: FastAPI):
     setup_logging()
     create_db_and_tables()
     generate_daily_puzzles(start_date=datetime.date.today(), end_date=datetime.date.today())
+    # Map the word list index now (compiling it, if this is the first process to need it), rather
+    # than on the first scored submission.
+    get_lexicon_index()
+
+    # Keep this worker's in-process caches in sync with puzzles generated elsewhere.
+    redis_client = get_redis_client()
+    local_cache = get_local_cache()
+    invalidation_listener = None
+    if redis_client:
+        invalidation_listener = start_invalidation_listener(redis_client, local_cache)
+
+    # Optionally pre-warm the caches, so the first requests after a deploy (or midnight) don't
+    # all go to the database.
+    prewarm_task = None
+    if redis_client:
+        if settings.cache_warm_days > 0:
+            today = datetime.date.today()
+            start_date = today - datetime.timedelta(days=settings.cache_warm_days - 1)
+            warm_dates(start_date, today, local_cache=local_cache)
+        if settings.cache_prewarm_minutes > 0:
+            prewarm_task = asyncio.create_task(
+                prewarm_before_midnight(settings.cache_prewarm_minutes)
+            )
+
+    if profiler:
+        dump_on_signal(profiler, settings.profile_directory)
+        if settings.profile_header and not settings.profile_token:
+            logging.warning("profile_header is ignored without a profile_token.")
+
     yield
     # Code to run on shutdown
     # (no cleanup needed for SQLite)
+    if profiler:
+        profiler.dump(settings.profile_directory)
+    if prewarm_task:
+        prewarm_task.cancel()
+    if invalidation_listener:
+        invalidation_listener.stop()
+    if settings.async_mode:
+        async_redis_client = get_async_redis_client()
+        if async_redis_client:
+            await async_redis_client.aclose()
+        await get_async_engine().dispose()
 
 
 app = FastAPI(title="Tile Game API", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+
+router = APIRouter()
 
 settings = get_settings()
+
+profiler = None
+if settings.profiling_enabled:
+    profiler = SamplingProfiler(settings.profile_interval_seconds)
+    app.add_middleware(
+        ProfilingMiddleware,
+        profiler=profiler,
+        sample_rate=settings.profile_sample_rate,
+        header=settings.profile_header,
+        token=settings.profile_token,
+        paths=tuple(settings.profile_paths),
+    )
+
 if settings.environment == "dev":
     from fastapi.middleware.cors import CORSMiddleware
 
@@ -50,53 +143,241 @@ if settings.environment == "dev":
     )
 
 
-@app.get("/api/puzzle/today", response_model=PuzzleWithDate, tags=["Puzzles"])
-def get_todays_puzzle(redis_client: RedisDep, db: Session = Depends(get_session)):
+@router.get("/api/puzzle/today", response_model=PuzzleWithDate, tags=["Puzzles"])
+def get_todays_puzzle(
+    redis_client: RedisDep,
+    local_cache: LocalCacheDep,
+    db: Session = Depends(get_session),
+    if_none_match: str | None = Header(default=None),
+):
     """
-    Get the puzzle for the current date.
+    Get the puzzle for the current date.  The response may be cached until local midnight.
+
+    The puzzle is returned as pre-serialized JSON (see crud.get_puzzle_json_by_date) in a raw
+    Response, which FastAPI passes through untouched, so response_model only documents the
+    payload.  The response carries an ETag (see app.http_caching), and honors If-None-Match.
     """
     today = datetime.date.today()
-    puzzle = crud.get_puzzle_by_date(db, today, redis_client=redis_client)
-    if not puzzle:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Puzzle not found for today's date."
-        )
-    return puzzle
+    puzzle_json = crud.get_puzzle_json_by_date(
+        db, today, redis_client=redis_client, local_cache=local_cache
+    )
+    return puzzle_response(require_puzzle(puzzle_json, today, today=True), today, if_none_match)
 
 
-@app.get("/api/puzzle/{date}", response_model=PuzzleWithDate, tags=["Puzzles"])
+@router.get("/api/puzzle/{date}", response_model=PuzzleWithDate, tags=["Puzzles"])
 def get_puzzle_by_date(
-    date: datetime.date, redis_client: RedisDep, db: Session = Depends(get_session)
+    date: datetime.date,
+    redis_client: RedisDep,
+    local_cache: LocalCacheDep,
+    db: Session = Depends(get_session),
+    if_none_match: str | None = Header(default=None),
 ):
     """
-    Get the puzzle for a specific date.
+    Get the puzzle for a specific date.  Past puzzles never change, so they are served as
+    immutable.  Otherwise served the same way as /api/puzzle/today.
     """
-    today = datetime.date.today()
-    if date > today:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No spoilers!")
-
-    puzzle = crud.get_puzzle_by_date(db, date, redis_client=redis_client)
-    if not puzzle:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Puzzle not found for date {date.isoformat()}.",
+    check_not_spoiler(date)
+    puzzle_json = crud.get_puzzle_json_by_date(
+        db, date, redis_client=redis_client, local_cache=local_cache
+    )
+    return puzzle_response(require_puzzle(puzzle_json, date), date, if_none_match)
+
+
+@router.get("/api/puzzles", response_model=list[PuzzleWithDate], tags=["Puzzles"])
+def get_puzzles(
+    redis_client: RedisDep,
+    local_cache: LocalCacheDep,
+    start: datetime.date,
+    end: datetime.date | None = None,
+    db: Session = Depends(get_session),
+    if_none_match: str | None = Header(default=None),
+):
+    """
+    Get the puzzles from `start` to `end` (inclusive, default today) as an array in date order,
+    skipping dates without a puzzle.  Ranges entirely in the past are served as immutable.
+    The array is joined from the pre-serialized puzzles, and otherwise served the same way as
+    /api/puzzle/today.
+    """
+    end = end or datetime.date.today()
+    check_puzzle_range(start, end, settings.puzzles_request_max_days)
+    puzzle_jsons = crud.get_puzzle_jsons_for_dates(
+        db, list(crud.dates_between(start, end)), redis_client=redis_client, local_cache=local_cache
+    )
+    return puzzles_response(puzzle_jsons, end, if_none_match)
+
+
+@router.get("/api/puzzles/stream", tags=["Puzzles"])
+def stream_puzzles(
+    redis_client: RedisDep,
+    local_cache: LocalCacheDep,
+    start: datetime.date,
+    end: datetime.date | None = None,
+    db: Session = Depends(get_session),
+):
+    """
+    Like /api/puzzles, but streamed as newline-delimited JSON (one puzzle per line), for ranges
+    up to `puzzles_stream_max_days` long once narrowed to the dates that have puzzles.
+    """
+    end = end or datetime.date.today()
+    check_puzzle_range(start, end)
+    try:
+        puzzle_range = crud.get_puzzle_range(db)
+    except NoResultFound:
+        puzzle_range = None
+    dates = clamp_stream_range(start, end, puzzle_range)
+
+    def puzzle_jsons(first: datetime.date, last: datetime.date):
+        # The request's session may be closed before the body is streamed (depending on the
+        # FastAPI version), so the stream uses its own.
+        with Session(db.get_bind()) as stream_db:
+            yield from crud.iter_puzzle_jsons_in_range(
+                stream_db, first, last, redis_client=redis_client, local_cache=local_cache
+            )
+
+    return puzzle_stream_response(puzzle_jsons(*dates) if dates else (), end)
+
+
+@router.get("/api/wordlist", tags=["Configuration"])
+def get_wordlist(
+    if_none_match: str | None = Header(default=None),
+    accept_encoding: str | None = Header(default=None),
+):
+    """
+    Get the full list of legal words, length-bucketed and front-coded (see app.wordlist).  The
+    response is precompressed, and carries a content-hash ETag that clients should revalidate.
+    """
+    return get_wordlist_response(if_none_match, accept_encoding)
+
+
+@router.post("/api/puzzle/{date}/score", response_model=ScoreResult, tags=["Scoring"])
+def score_puzzle(
+    date: datetime.date,
+    submission: ScoreSubmission,
+    redis_client: RedisDep,
+    local_cache: LocalCacheDep,
+    rules: ScoringRulesDep,
+    db: Session = Depends(get_session),
+):
+    """
+    Score a submitted arrangement of a puzzle's tiles (given as racks of tile ids), validating
+    each word against the full word list, exactly as the client does.
+    """
+    check_not_spoiler(date)
+    puzzle_json = crud.get_puzzle_json_by_date(
+        db, date, redis_client=redis_client, local_cache=local_cache
+    )
+    return score_response(puzzle_json, date, submission, rules)
+
+
+@router.post("/api/puzzles/score", response_model=BatchScoreResponse, tags=["Scoring"])
+def score_puzzles(
+    request: BatchScoreRequest,
+    redis_client: RedisDep,
+    local_cache: LocalCacheDep,
+    rules: ScoringRulesDep,
+    db: Session = Depends(get_session),
+):
+    """
+    Score many submissions, possibly for different dates, in one call (e.g. for replaying or
+    verifying saved games).  Each submission gets either a result or an error.
+    """
+    check_batch_size(request)
+    dates = scoring.dates_to_score(request.submissions)
+    puzzle_jsons = (
+        crud.get_puzzle_jsons_for_dates(
+            db, dates, redis_client=redis_client, local_cache=local_cache
         )
-    return puzzle
+        if dates
+        else []
+    )
+    return batch_score_response(request, puzzle_jsons, rules)
 
 
-@app.get("/api/config", tags=["Configuration"])
+@router.get("/api/config", tags=["Configuration"])
 def get_config(db: Session = Depends(get_session)):
     """
     Get the game configuration rules.
     """
-    try:
-        rules_dict = crud.get_game_rules(db)
-        return GameRules.model_validate(rules_dict)
-    except (FileNotFoundError, yaml.YAMLError, NoResultFound, MultipleResultsFound):
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Could not load game configuration.",
-        )
+    with game_rules_errors():
+        return GameRules.model_validate(crud.get_game_rules(db))
+
+
+# The diagnostics endpoints are deliberately outside /api, which is all that Caddy proxies to the
+# API, so they're only reachable from inside the deployment (e.g. by Prometheus).
+
+
+@app.get("/cache/stats", tags=["Diagnostics"])
+async def get_cache_stats(local_cache: LocalCacheDep):
+    """
+    Get hit/miss counts for this worker's in-process puzzle cache and for Redis, for sizing the
+    caches.  Counts are per worker process and reset when it restarts.
+    """
+    return {
+        "local": local_cache.stats_dict() if local_cache is not None else None,
+        "redis": redis_stats.as_dict(),
+    }
+
+
+def local_cache_lookups() -> dict[str, int]:
+    local_cache = get_local_cache()
+    if local_cache is None:
+        return {}
+    return {"hit": local_cache.stats.hits, "miss": local_cache.stats.misses}
+
+
+def threadpool_state() -> dict[str, int]:
+    # Sync endpoints and dependencies run in AnyIO's default thread pool, whose limiter is per
+    # event loop, so this has to be read from a request on that loop.
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return {
+        "capacity": int(limiter.total_tokens),
+        "busy": limiter.borrowed_tokens,
+        "waiting": limiter.statistics().tasks_waiting,
+    }
+
+
+REGISTRY.register(
+    Sampled(
+        "lexo_redis_lookups_total",
+        "Puzzle lookups in Redis, by result (see /cache/stats).",
+        lambda: {"hit": redis_stats.hits, "miss": redis_stats.misses},
+        kind="counter",
+        label="result",
+    )
+)
+REGISTRY.register(
+    Sampled(
+        "lexo_local_cache_lookups_total",
+        "Puzzle lookups in this worker's in-process cache, by result.",
+        local_cache_lookups,
+        kind="counter",
+        label="result",
+    )
+)
+REGISTRY.register(
+    Sampled(
+        "lexo_threadpool_threads",
+        "The thread pool that sync endpoints run in: its size, the threads in use, and the "
+        "calls waiting for one.",
+        threadpool_state,
+        label="state",
+    )
+)
+
+
+@app.get("/metrics", tags=["Diagnostics"], response_class=Response)
+async def get_metrics():
+    """
+    Get this worker's metrics in the Prometheus text format: request latency by route, Redis
+    and in-process cache lookups, database statement times, thread pool usage, and puzzle
+    generation.  Like /cache/stats, counts are per worker process.
+    """
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+# The sync endpoints on `router` are only used when async mode is off; otherwise the
+# equivalent endpoints in app.async_routes are.
+app.include_router(async_routes.router if settings.async_mode else router)
 
 
 if settings.environment == "dev":
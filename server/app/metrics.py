@@ -0,0 +1,374 @@
+"""
+Process-wide metrics, served at /metrics in the Prometheus text exposition format.
+
+These are deliberately minimal rather than built on prometheus_client.  Every series is a handful
+of preallocated slots: a counter's label values and a histogram's buckets are fixed when it is
+declared, and a route's histogram is created on the route's first request, so recording a value
+is a dictionary lookup and an addition.  Values that already exist elsewhere (the cache hit
+counters, the threadpool's state) are read when /metrics is scraped instead of being recorded.
+
+Like CacheStats, updates aren't locked: under the GIL an increment can very occasionally be lost
+to a race, which is acceptable for monitoring.  Everything is per process, and resets when it
+restarts, which Prometheus handles as a counter reset.
+
+Puzzles generated by the scheduler's cron jobs aren't seen by the API process, and those processes
+exit long before any scrape.  So with `Settings.metrics_textfile_directory` set, each
+generate_daily_puzzles run also writes gauges describing itself (see generation_run_metrics) to a
+file there for node_exporter's textfile collector, which Prometheus scrapes in their place.
+"""
+
+import abc
+import os
+import tempfile
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from pathlib import Path
+
+from sqlalchemy import Engine, event
+
+# The version of the text format that render() produces.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket upper bounds, in seconds, for request and generation times, and for the much faster
+# Redis and database calls.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+RUN_BUCKETS = (0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: Iterable[tuple[str, str]]) -> str:
+    text = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return "{" + text + "}" if text else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(abc.ABC):
+    """A named metric with HELP and TYPE lines, rendered by `render`."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+
+    @abc.abstractmethod
+    def samples(self) -> Iterable[str]:
+        """The metric's sample lines."""
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self.samples()
+
+
+class Counter(Metric):
+    """
+    A counter, optionally with one label whose values are all given up front, e.g.
+    `Counter("errors_total", "...", "operation", ("get", "mget")).inc("get")`.
+    """
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, label: str | None = None, values: Sequence[str] = ()
+    ):
+        super().__init__(name, documentation)
+        self.label = label
+        self.values: dict[str | None, float] = (
+            {value: 0 for value in values} if label else {None: 0}
+        )
+
+    def inc(self, value: str | None = None, amount: float = 1):
+        self.values[value] += amount
+
+    def samples(self) -> Iterable[str]:
+        for value, count in self.values.items():
+            labels = _labels([(self.label, value)] if self.label and value is not None else [])
+            yield f"{self.name}{labels} {_number(count)}"
+
+
+class Gauge(Counter):
+    """Like Counter, but for values that can go down, so they're `set` rather than incremented."""
+
+    kind = "gauge"
+
+    def set(self, value: str | None = None, amount: float = 0):
+        self.values[value] = amount
+
+
+class HistogramSeries:
+    """One set of labels' buckets, sum and count."""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        # counts[i] is how many values fell in bucket i alone, and counts[-1] how many exceeded
+        # every bound; they're only made cumulative when rendered.
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(Metric):
+    """
+    A histogram of durations in seconds.  Without labels, `observe` records into its only series;
+    with them, `series(*values)` returns (creating on first use) the series for those values.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation)
+        self.labels = tuple(labels)
+        self.bounds = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], HistogramSeries] = {}
+        if not self.labels:
+            self._only = self.series()
+
+    def series(self, *values: str) -> HistogramSeries:
+        series = self._series.get(values)
+        if series is None:
+            series = self._series.setdefault(values, HistogramSeries(self.bounds))
+        return series
+
+    def observe(self, value: float):
+        self._only.observe(value)
+
+    def samples(self) -> Iterable[str]:
+        for values, series in sorted(self._series.items()):
+            pairs = list(zip(self.labels, values))
+            cumulative = 0
+            for bound, count in zip((*self.bounds, "+Inf"), list(series.counts)):
+                cumulative += count
+                le = bound if isinstance(bound, str) else _number(float(bound))
+                yield f"{self.name}_bucket{_labels([*pairs, ('le', le)])} {cumulative}"
+            yield f"{self.name}_sum{_labels(pairs)} {_number(series.sum)}"
+            yield f"{self.name}_count{_labels(pairs)} {cumulative}"
+
+
+class Sampled(Metric):
+    """
+    A counter or gauge whose values are read from elsewhere when scraped: `read` returns either a
+    number, or a mapping from `label` values to numbers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        read: Callable[[], float | Mapping[str, float]],
+        *,
+        kind: str = "gauge",
+        label: str | None = None,
+    ):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.read = read
+        self.label = label
+
+    def samples(self) -> Iterable[str]:
+        value = self.read()
+        if isinstance(value, Mapping):
+            label = self.label or "value"
+            for label_value, number in value.items():
+                yield f"{self.name}{_labels([(label, label_value)])} {_number(number)}"
+        else:
+            yield f"{self.name} {_number(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register[M: Metric](self, metric: M) -> M:
+        """Adds a metric, replacing any with the same name, and returns it."""
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "".join(line + "\n" for metric in self.metrics.values() for line in metric.render())
+
+
+REGISTRY = Registry()
+
+
+# The hot paths' metrics.  Those read at scrape time are registered by app.main.
+
+request_duration = REGISTRY.register(
+    Histogram(
+        "lexo_http_request_duration_seconds",
+        "Time to handle an HTTP request, including streaming its body, by route.",
+        labels=("method", "route"),
+    )
+)
+
+redis_duration = REGISTRY.register(
+    Histogram(
+        "lexo_redis_lookup_duration_seconds",
+        "Time taken by Redis puzzle lookups, by operation.",
+        labels=("operation",),
+        buckets=FAST_BUCKETS,
+    )
+)
+# Series for the two lookups, so that recording one doesn't even build a tuple.
+redis_get_duration = redis_duration.series("get")
+redis_mget_duration = redis_duration.series("mget")
+redis_errors = REGISTRY.register(
+    Counter(
+        "lexo_redis_lookup_errors_total",
+        "Redis puzzle lookups that raised an error, by operation.",
+        "operation",
+        ("get", "mget"),
+    )
+)
+
+query_duration = REGISTRY.register(
+    Histogram(
+        "lexo_db_query_duration_seconds",
+        "Time taken by each SQL statement the API executes.",
+        buckets=FAST_BUCKETS,
+    )
+)
+query_errors = REGISTRY.register(
+    Counter("lexo_db_query_errors_total", "SQL statements that raised an error.")
+)
+
+generation_duration = REGISTRY.register(
+    Histogram(
+        "lexo_puzzle_generation_run_duration_seconds",
+        "Time taken by each generate_daily_puzzles run, including writing the puzzles.",
+        buckets=RUN_BUCKETS,
+    )
+)
+puzzle_dates = REGISTRY.register(
+    Counter(
+        "lexo_puzzle_dates_total",
+        "Dates processed by generate_daily_puzzles: generated and stored, generated but "
+        "already stored by another process, or skipped as already stored.",
+        "outcome",
+        ("inserted", "raced", "skipped"),
+    )
+)
+
+
+def generation_run_metrics(
+    duration: float, dates: Mapping[str, int], finished: float | None = None
+) -> list[Metric]:
+    """
+    Gauges describing one generate_daily_puzzles run, for write_textfile: how long it took, when
+    it finished, and how many dates had each of puzzle_dates' outcomes.
+    """
+    last_duration = Gauge(
+        "lexo_puzzle_generation_last_run_duration_seconds",
+        "Time taken by the last generate_daily_puzzles run, including writing the puzzles.",
+    )
+    last_duration.set(amount=duration)
+    last_finished = Gauge(
+        "lexo_puzzle_generation_last_run_timestamp_seconds",
+        "When the last generate_daily_puzzles run finished, in seconds since the epoch.",
+    )
+    last_finished.set(amount=time.time() if finished is None else finished)
+    last_dates = Gauge(
+        "lexo_puzzle_generation_last_run_dates",
+        "Dates processed by the last generate_daily_puzzles run, by outcome (see "
+        "lexo_puzzle_dates_total).",
+        "outcome",
+        tuple(dates),
+    )
+    for outcome, count in dates.items():
+        last_dates.set(outcome, count)
+    return [last_duration, last_finished, last_dates]
+
+
+def write_textfile(directory: Path, name: str, metrics: Iterable[Metric]) -> Path:
+    """
+    Writes `metrics` to `<directory>/<name>.prom` for node_exporter's textfile collector, via a
+    temporary file and a rename so the collector never reads a partial file.  Returns the path.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}.prom"
+    text = "".join(line + "\n" for metric in metrics for line in metric.render())
+    # The collector only reads *.prom files, so the temporary one is ignored until renamed.
+    fd, temp_name = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.chmod(temp_name, 0o644)
+        os.replace(temp_name, path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+    return path
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is not None:
+        query_duration.observe(time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    query_errors.inc()
+
+
+def instrument_engine(engine: Engine):
+    """Times every statement `engine` executes, and counts the ones that fail."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that times each HTTP request, by the route that handled it.  Requests that
+    didn't match a route are recorded under the route "<unmatched>".
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # By id(), since routes aren't hashable; they live as long as the app does.
+        self._series: dict[int, HistogramSeries] = {}
+        self._unmatched = request_duration.series("", "<unmatched>")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # The router adds the matched route to the scope.
+            route = scope.get("route")
+            series = self._series.get(id(route)) if route is not None else self._unmatched
+            if series is None:
+                series = self._series[id(route)] = request_duration.series(
+                    ",".join(sorted(getattr(route, "methods", None) or ())),
+                    getattr(route, "path", "") or "/",
+                )
+            series.observe(time.perf_counter() - started)
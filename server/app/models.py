@@ -1,9 +1,10 @@
 import datetime
 
-from pydantic import ConfigDict, TypeAdapter
+from pydantic import ConfigDict
 from pydantic.alias_generators import to_camel
-from sqlalchemy import JSON, Column
+from sqlalchemy import JSON, Column, LargeBinary
 from sqlalchemy.orm import reconstructor
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlmodel import Field, SQLModel
 
 
@@ -27,12 +28,49 @@ class Tile(CamelCaseBaseModel):
     value: int
 
 
+_new_object = object.__new__
+_set_attribute = object.__setattr__
+
+
+def tile_from_stored_dict(data: dict) -> Tile:
+    """
+    Builds a Tile from a dict read back from the database, skipping validation when the dict has
+    exactly the expected keys and types (as it does for every puzzle we wrote ourselves).
+
+    This does what `Tile.model_construct()` does, but without going through SQLModel's `__new__`
+    and `__init__` hooks, which make constructing or validating a SQLModel several times slower
+    than a plain Pydantic model.  Anything unexpected falls back to full validation.
+    """
+    id_ = data.get("id")
+    letter = data.get("letter")
+    value = data.get("value")
+    if len(data) != 3 or type(id_) is not str or type(letter) is not str or type(value) is not int:
+        return Tile.model_validate(data)
+    tile = _new_object(Tile)
+    _set_attribute(tile, "__dict__", {"id": id_, "letter": letter, "value": value})
+    _set_attribute(tile, "__pydantic_fields_set__", {"id", "letter", "value"})
+    _set_attribute(tile, "__pydantic_extra__", None)
+    _set_attribute(tile, "__pydantic_private__", None)
+    return tile
+
+
+def hydrate_racks(racks: list[list]) -> list[list[Tile]]:
+    """Converts racks of stored tile dicts (or Tiles, which are kept as-is) into Tiles."""
+    return [
+        [tile if isinstance(tile, Tile) else tile_from_stored_dict(tile) for tile in rack]
+        for rack in racks
+    ]
+
+
 class Puzzle(CamelCaseBaseModel):
+    # none_as_null so that compact rows (see below) store SQL NULL here rather than JSON "null".
     initial_racks: list[list[Tile]] = Field(
-        sa_column=Column(JSON), description="The list of 18 tiles for the puzzle."
+        sa_column=Column(JSON(none_as_null=True)),
+        description="The list of 18 tiles for the puzzle.",
     )
     target_solution: list[list[Tile]] = Field(
-        sa_column=Column(JSON), description="The list of tiles in the server's solution."
+        sa_column=Column(JSON(none_as_null=True)),
+        description="The list of tiles in the server's solution.",
     )
 
 
@@ -44,19 +82,48 @@ class PuzzleWithDate(Puzzle, table=True):
         primary_key=True,
         description="The date of the puzzle, serves as the primary key.",
     )
+    # The puzzle in the encoding from app.compact, for rows written with
+    # `Settings.compact_puzzle_storage` (whose JSON columns are then NULL).  Never sent to clients.
+    compact: bytes | None = Field(
+        default=None, sa_column=Column(LargeBinary, nullable=True), exclude=True
+    )
+    # The best score possible for the puzzle, found by app.solver (NULL until
+    # `python -m app.scripts.compute_max_scores` has been run for it).  Not sent to clients.
+    max_score: int | None = Field(default=None, exclude=True)
 
     @reconstructor
     def convert_racks_to_tile_instances(self):
-        tile_adapter = TypeAdapter(Tile)
-        if isinstance(self.initial_racks[0][0], dict):
-            self.initial_racks = [
-                [tile_adapter.validate_python(tile) for tile in rack] for rack in self.initial_racks
-            ]
-        if isinstance(self.target_solution[0][0], dict):
-            self.target_solution = [
-                [tile_adapter.validate_python(tile) for tile in rack]
-                for rack in self.target_solution
-            ]
+        # The racks are set with set_committed_value, so that hydrating them doesn't mark the row
+        # as modified and write them straight back to the database on the next commit.
+        if self.compact is not None and self.initial_racks is None:
+            from .compact import decode_puzzle
+
+            initial_racks, target_solution = decode_puzzle(self.compact)
+        else:
+            initial_racks = hydrate_racks(self.initial_racks)
+            target_solution = hydrate_racks(self.target_solution)
+        set_committed_value(self, "initial_racks", initial_racks)
+        set_committed_value(self, "target_solution", target_solution)
+
+
+class PuzzleStats(SQLModel, table=True):
+    """
+    Difficulty statistics for a puzzle, from app.analytics, written by
+    `python -m app.scripts.analyze_puzzles`.  Never sent to clients.
+    """
+
+    __tablename__: str = "puzzle_stats"  # type: ignore
+
+    date: datetime.date = Field(primary_key=True)
+    # The puzzle's letters, sorted, and the version of words-full.txt the stats were worked out
+    # from, so that re-runs can tell which rows are stale.
+    letters: str
+    words_version: str
+    words_3: int = Field(description="Legal 3-letter words the tiles can spell.")
+    words_4: int = Field(description="Legal 4-letter words the tiles can spell.")
+    words_5: int = Field(description="Legal 5-letter words the tiles can spell.")
+    words_6: int = Field(description="Legal 6-letter words the tiles can spell.")
+    full_solutions: int = Field(description="Ways to spell a legal word in every rack.")
 
 
 class GameRules(CamelCaseBaseModel):
@@ -67,3 +134,43 @@ class GameRules(CamelCaseBaseModel):
     timer_seconds: int
     earliest_date: str
     current_date: str
+
+
+class ScoreSubmission(CamelCaseBaseModel):
+    """A player's arrangement of a puzzle's tiles, as a list of racks of tile ids."""
+
+    racks: list[list[str]] = Field(description="The tile ids in each rack, in order.")
+
+
+class DatedScoreSubmission(ScoreSubmission):
+    date: datetime.date
+
+
+class BatchScoreRequest(CamelCaseBaseModel):
+    submissions: list[DatedScoreSubmission]
+
+
+class RackScore(CamelCaseBaseModel):
+    word: str
+    valid: bool
+    base_score: int
+    multiplier: int
+
+
+class ScoreResult(CamelCaseBaseModel):
+    date: datetime.date
+    racks: list[RackScore]
+    total_score: int
+    target_score: int
+
+
+class BatchScoreItem(CamelCaseBaseModel):
+    """One submission's result, or why it couldn't be scored."""
+
+    date: datetime.date
+    result: ScoreResult | None = None
+    error: str | None = None
+
+
+class BatchScoreResponse(CamelCaseBaseModel):
+    results: list[BatchScoreItem]
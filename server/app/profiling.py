@@ -0,0 +1,200 @@
+"""
+An opt-in sampling CPU profiler for the API, for finding where a slow endpoint spends its time in
+production.
+
+With `Settings.profiling_enabled`, `ProfilingMiddleware` picks requests to profile: a random
+`profile_sample_rate` of them, any whose `profile_header` header holds the secret `profile_token`,
+and any whose path starts with one of `profile_paths`.  While at least one picked request is in
+flight, a background thread takes a snapshot of the request-handling threads' stacks every
+`profile_interval_seconds` (the event loop's thread, and Starlette's thread pool, where sync
+endpoints run), and counts each distinct stack.  Threads that are idle (waiting for work or for
+I/O) aren't counted, so the counts approximate CPU time.  Since the threads are shared, requests
+that happen to run at the same time as a picked one are sampled too; at production traffic levels
+that's representative of the load anyway.
+
+The counts accumulate across requests until they're dumped, as "collapsed" stacks (one
+`frame;frame;... count` line per stack, the input format of flamegraph.pl, speedscope and
+inferno), to a new file in `profile_directory`: on SIGUSR1 (`kill -USR1 <pid>`), and when the
+worker shuts down.  Each dump starts the counts afresh.
+
+When profiling is disabled, the middleware isn't installed at all, so it costs nothing.
+"""
+
+import hmac
+import logging
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+
+# The name AnyIO gives the threads that Starlette runs sync endpoints and dependencies in.
+WORKER_THREAD_NAME = "AnyIO worker thread"
+
+# (module, function) of the innermost Python frames of a thread with nothing to do: the event loop
+# waiting for I/O (in selectors, or with uvloop, whose loop is all C, in the function that started
+# it), and a pool thread waiting for work.
+IDLE_FRAMES = frozenset(
+    {
+        ("selectors", "select"),
+        ("asyncio.runners", "run"),
+        ("threading", "wait"),
+        ("queue", "get"),
+    }
+)
+
+
+def collapse_stack(frame: FrameType) -> str | None:
+    """
+    Returns a thread's stack as `module:function` frames from the outermost in, separated by
+    semicolons, or None if the thread is idle.
+    """
+    if (frame.f_globals.get("__name__"), frame.f_code.co_name) in IDLE_FRAMES:
+        return None
+    frames = []
+    current: FrameType | None = frame
+    while current is not None:
+        frames.append(f"{current.f_globals.get('__name__', '?')}:{current.f_code.co_qualname}")
+        current = current.f_back
+    return ";".join(reversed(frames))
+
+
+class SamplingProfiler:
+    """
+    Samples the request-handling threads' stacks while any profiled request is in flight (see
+    `begin` and `end`), and aggregates them until `dump`.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._active = 0
+        # The event loop threads that requests were profiled on.
+        self._loop_threads: set[int] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def begin(self):
+        """Starts (or continues) sampling, for a profiled request starting on this thread."""
+        with self._lock:
+            self._active += 1
+            self._loop_threads.add(threading.get_ident())
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="Sampling profiler", daemon=True
+                )
+                self._thread.start()
+            self._wake.set()
+
+    def end(self):
+        """Stops sampling once no profiled requests are in flight."""
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                self._wake.clear()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self.sample()
+            time.sleep(self.interval)
+
+    def sample(self):
+        """Counts the current stack of every busy request-handling thread."""
+        me = threading.get_ident()
+        workers = {
+            thread.ident for thread in threading.enumerate() if thread.name == WORKER_THREAD_NAME
+        }
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == me or (ident not in self._loop_threads and ident not in workers):
+                continue
+            stack = collapse_stack(frame)
+            if stack is not None:
+                stacks.append(stack)
+        with self._lock:
+            self.samples += 1
+            self.stacks.update(stacks)
+
+    def dump(self, directory: Path) -> Path | None:
+        """
+        Writes the stacks counted so far to a new collapsed-stack file in `directory`, and starts
+        counting afresh.  Returns the file's path, or None if nothing had been counted.
+        """
+        with self._lock:
+            stacks, self.stacks = self.stacks, Counter()
+            samples, self.samples = self.samples, 0
+        if not stacks:
+            return None
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"profile-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.collapsed"
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+        logging.info(f"Wrote {len(stacks)} stacks from {samples} samples to {path}.")
+        return path
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that has `profiler` sample the requests picked by the sample rate, header or
+    path prefixes.  Picking by header needs both `header` and `token`, since anyone can send the
+    header: only requests whose header value is the token are profiled.
+    """
+
+    def __init__(
+        self,
+        app,
+        *,
+        profiler: SamplingProfiler,
+        sample_rate: float = 0.0,
+        header: str | None = None,
+        token: str | None = None,
+        paths: tuple[str, ...] = (),
+    ):
+        self.app = app
+        self.profiler = profiler
+        self.sample_rate = sample_rate
+        self.header = header.lower().encode("latin-1") if header and token else None
+        self.token = token.encode("latin-1") if token else b""
+        self.paths = tuple(paths)
+
+    def should_profile(self, scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        if self.paths and scope["path"].startswith(self.paths):
+            return True
+        return self.header is not None and any(
+            name == self.header and hmac.compare_digest(value, self.token)
+            for name, value in scope["headers"]
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        self.profiler.begin()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.end()
+
+
+def dump_on_signal(profiler: SamplingProfiler, directory: Path) -> bool:
+    """
+    Makes SIGUSR1 dump `profiler` to `directory`.  Signal handlers can only be installed from the
+    main thread (where uvicorn runs the app), so returns whether it was.
+    """
+    if not hasattr(signal, "SIGUSR1") or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def handle(signum, frame):
+        # Not in the handler itself, which may have interrupted this thread inside the profiler.
+        threading.Thread(target=profiler.dump, args=(directory,), name="Profile dump").start()
+
+    signal.signal(signal.SIGUSR1, handle)
+    return True
@@ -7,13 +7,34 @@ puzzle data structure.
 """
 
 import random
-import yaml
+from collections.abc import Mapping, Sequence
 
+from .config import get_puzzle_lexicon
 from .models import Puzzle, Tile
 from .settings import get_settings
 
 
-def generate_puzzle(seed: int | str | None = None) -> Puzzle:
+def puzzle_rng(seed: int | str | None = None) -> random.Random:
+    """
+    Returns a private random number generator for generating a single puzzle.
+
+    Seeding a `random.Random` instance with the same value as `random.seed()` produces exactly the
+    same sequence, so puzzles generated this way are bit-for-bit identical to those generated back
+    when `generate_puzzle` seeded the module-level generator.  Unlike the module-level generator,
+    though, each instance is independent, so puzzles can be generated concurrently in threads or
+    processes without disturbing each other's sequences.
+
+    Args:
+        seed: The puzzle seed (e.g. a date string), which is combined with the
+            `puzzle_generation_salt` setting.  If None, the generator is seeded from the OS.
+    """
+    if seed is None:
+        return random.Random()
+    settings = get_settings()
+    return random.Random(f"{seed} {settings.puzzle_generation_salt}")
+
+
+def generate_puzzle(seed: int | str | None = None, *, rng: random.Random | None = None) -> Puzzle:
     """
     Generates a new, solvable puzzle based on the game's configuration.
 
@@ -32,6 +53,8 @@ def generate_puzzle(seed: int | str | None = None) -> Puzzle:
         seed: An optional seed for the random number generator. Can be an
             integer or a string (e.g., a date string like '2025-08-07').
             Using a canonical string for daily puzzles avoids timezone issues.
+        rng: An optional random number generator to draw from instead of one
+            created by `puzzle_rng(seed)`.  If given, `seed` is ignored.
 
     Returns:
         A Puzzle object containing the `initial_racks` for the player and the
@@ -41,44 +64,40 @@ def generate_puzzle(seed: int | str | None = None) -> Puzzle:
         ValueError: If the common word list does not contain words of all
             required lengths (3, 4, 5, and 6).
     """
-    settings = get_settings()
-    if seed is not None:
-        random.seed(f"{seed} {settings.puzzle_generation_salt}")
-
-    # 1. Load words and game rules
-    words_path = settings.config_directory / "words-common.txt"
-    rules_path = settings.config_directory / "game_rules.yaml"
-
-    with open(words_path, "r", encoding="utf-8") as f:
-        all_words = [line.strip().upper() for line in f if line.strip()]
-
-    with open(rules_path, "r", encoding="utf-8") as f:
-        rules = yaml.safe_load(f)
-    letter_values = rules.get("letter_values", {})
+    if rng is None:
+        rng = puzzle_rng(seed)
 
-    # Group words by length
-    words_by_length = {3: [], 4: [], 5: [], 6: []}
-    for word in all_words:
-        length = len(word)
-        if length in words_by_length:
-            words_by_length[length].append(word)
+    # 1. Load words and game rules (parsed once per process, see app.config)
+    lexicon = get_puzzle_lexicon()
+    words_by_length = lexicon.words_by_length
+    letter_values = lexicon.letter_values
 
     # Choose one word of each required length
     try:
         solution_words = [
-            random.choice(words_by_length[3]),
-            random.choice(words_by_length[4]),
-            random.choice(words_by_length[5]),
-            random.choice(words_by_length[6]),
+            rng.choice(words_by_length.get(3, ())),
+            rng.choice(words_by_length.get(4, ())),
+            rng.choice(words_by_length.get(5, ())),
+            rng.choice(words_by_length.get(6, ())),
         ]
     except IndexError as e:
         raise ValueError(
             "Could not find words of all required lengths (3, 4, 5, 6) in words-common.txt"
         ) from e
 
+    return build_puzzle(solution_words, letter_values, rng)
+
+
+def build_puzzle(
+    solution_words: Sequence[str], letter_values: Mapping[str, int], rng: random.Random
+) -> Puzzle:
+    """
+    Turns the chosen solution words into a puzzle: tiles valued from `letter_values`, given IDs
+    from a random permutation drawn from `rng`, and shuffled into the initial racks by ID.
+    """
     # 3. Generate a random permutation for tile IDs
     tile_ids = list(range(1, 19))
-    random.shuffle(tile_ids)
+    rng.shuffle(tile_ids)
 
     # 4. Create the target solution
     target_solution_racks = []
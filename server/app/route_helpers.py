@@ -0,0 +1,166 @@
+"""
+Request validation, error mapping and response building shared by the sync endpoints in app.main
+and the async ones in app.async_routes, so the two only differ in how they do their I/O.
+"""
+
+import datetime
+from collections.abc import AsyncIterable, Iterable, Iterator
+from contextlib import contextmanager
+
+import yaml
+from fastapi import HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import MultipleResultsFound, NoResultFound
+
+from app import scoring, wordlist
+from app.crud import PuzzleRange
+from app.http_caching import puzzle_cache_control, puzzle_response, wordlist_response
+from app.models import BatchScoreRequest, BatchScoreResponse, ScoreResult, ScoreSubmission
+from app.scoring import ScoringRules
+from app.settings import get_settings
+
+
+def check_not_spoiler(date: datetime.date):
+    """Raises an HTTPException if `date` is in the future."""
+    if date > datetime.date.today():
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No spoilers!")
+
+
+def check_puzzle_range(start: datetime.date, end: datetime.date, max_days: int | None = None):
+    """Raises an HTTPException if the range for /api/puzzles is reversed, too long, or a spoiler."""
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="start must not be after end."
+        )
+    check_not_spoiler(end)
+    if max_days is not None and (end - start).days + 1 > max_days:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {max_days} days can be requested at once.",
+        )
+
+
+def clamp_stream_range(
+    start: datetime.date, end: datetime.date, puzzle_range: PuzzleRange | None
+) -> tuple[datetime.date, datetime.date] | None:
+    """
+    Narrows a range for /api/puzzles/stream (already checked by check_puzzle_range) to the dates
+    that have puzzles, so an extreme `start` doesn't cost a lookup for every empty day.  Returns
+    None if there are no puzzles in it, or raises an HTTPException if it's still longer than
+    `Settings.puzzles_stream_max_days`.
+    """
+    if puzzle_range is None:
+        return None
+    start = max(start, puzzle_range.earliest_date)
+    end = min(end, puzzle_range.latest_date)
+    if start > end:
+        return None
+    check_puzzle_range(start, end, get_settings().puzzles_stream_max_days)
+    return start, end
+
+
+def require_puzzle(puzzle_json: str | None, date: datetime.date, *, today: bool = False) -> str:
+    """Returns `puzzle_json`, or raises a 404 if there was no puzzle for `date`."""
+    if not puzzle_json:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=(
+                "Puzzle not found for today's date."
+                if today
+                else f"Puzzle not found for date {date.isoformat()}."
+            ),
+        )
+    return puzzle_json
+
+
+def puzzles_response(
+    puzzle_jsons: list[str], end: datetime.date, if_none_match: str | None
+) -> Response:
+    """Builds the response for /api/puzzles, a JSON array of the puzzles up to `end`."""
+    return puzzle_response("[" + ",".join(puzzle_jsons) + "]", end, if_none_match)
+
+
+def puzzle_stream_response(
+    puzzle_jsons: Iterable[str] | AsyncIterable[str], end: datetime.date
+) -> StreamingResponse:
+    """Builds the response for /api/puzzles/stream, one puzzle per line."""
+    if isinstance(puzzle_jsons, AsyncIterable):
+
+        async def lines():
+            async for puzzle_json in puzzle_jsons:
+                yield puzzle_json + "\n"
+
+        body = lines()
+    else:
+        body = (puzzle_json + "\n" for puzzle_json in puzzle_jsons)
+    return StreamingResponse(
+        body,
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": puzzle_cache_control(end)},
+    )
+
+
+def get_wordlist_response(if_none_match: str | None, accept_encoding: str | None) -> Response:
+    """Builds the response for /api/wordlist, or raises a 500 if the list can't be loaded."""
+    try:
+        words = wordlist.get_wordlist()
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Could not load the word list.",
+        )
+    return wordlist_response(words, if_none_match, accept_encoding)
+
+
+def score_response(
+    puzzle_json: str | None,
+    date: datetime.date,
+    submission: ScoreSubmission,
+    rules: ScoringRules,
+) -> ScoreResult:
+    """Scores a submission for the puzzle on `date`, mapping its problems to HTTP errors."""
+    puzzle_json = require_puzzle(puzzle_json, date)
+    try:
+        return scoring.score_submission(
+            scoring.scoring_puzzle_from_json(puzzle_json),
+            submission.racks,
+            multipliers=rules.multipliers,
+            lexicon=rules.lexicon,
+        )
+    except scoring.InvalidSubmission as exc:
+        # A literal, since Starlette has renamed HTTP_422_UNPROCESSABLE_ENTITY.
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+def check_batch_size(request: BatchScoreRequest):
+    """Raises an HTTPException if a batch has more submissions than the configured maximum."""
+    max_submissions = get_settings().score_batch_max_submissions
+    if len(request.submissions) > max_submissions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {max_submissions} submissions can be scored at once.",
+        )
+
+
+def batch_score_response(
+    request: BatchScoreRequest, puzzle_jsons: list[str], rules: ScoringRules
+) -> BatchScoreResponse:
+    """Scores a batch, given the puzzles for `scoring.dates_to_score(request.submissions)`."""
+    puzzles = {
+        puzzle.date: puzzle for puzzle in map(scoring.scoring_puzzle_from_json, puzzle_jsons)
+    }
+    return scoring.score_batch(
+        request.submissions, puzzles, multipliers=rules.multipliers, lexicon=rules.lexicon
+    )
+
+
+@contextmanager
+def game_rules_errors() -> Iterator[None]:
+    """Turns the errors that loading the game rules can raise into a 500."""
+    try:
+        yield
+    except (FileNotFoundError, yaml.YAMLError, NoResultFound, MultipleResultsFound):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Could not load game configuration.",
+        )
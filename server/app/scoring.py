@@ -0,0 +1,183 @@
+"""
+Server-side scoring of submitted solutions, matching the client's `useGameScoring`.
+
+Rack i (counting from 0) must spell a legal word of exactly i + 3 letters to score; a valid rack
+scores the sum of its tiles' values times the multiplier for its length from `game_rules.yaml`.
+Tile values come from the puzzle itself rather than the current `letter_values`, so that editing
+the letter values never changes the scores of published puzzles (see app.compact).
+"""
+
+import datetime
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Annotated
+
+import yaml
+from fastapi import Depends, HTTPException, status
+
+from app.config import get_game_rules_file
+from app.lexicon_index import LexiconIndex, get_lexicon_index
+from app.models import (
+    BatchScoreItem,
+    BatchScoreResponse,
+    DatedScoreSubmission,
+    RackScore,
+    ScoreResult,
+)
+
+
+class InvalidSubmission(ValueError):
+    """Raised when a submission doesn't use the puzzle's tiles correctly."""
+
+
+@dataclass(frozen=True)
+class ScoringRules:
+    multipliers: Mapping[int, int]
+    lexicon: LexiconIndex
+
+
+async def get_scoring_rules() -> ScoringRules:
+    """
+    Returns the current multipliers from game_rules.yaml and the full word list, both from
+    process-wide snapshots.  Responds with a 500 if either can't be loaded.
+
+    A coroutine so that, as a FastAPI dependency, it runs on the event loop rather than taking a
+    worker thread; the snapshots rarely touch the disk.
+    """
+    try:
+        return ScoringRules(
+            multipliers=get_game_rules_file()["multipliers"], lexicon=get_lexicon_index()
+        )
+    except (FileNotFoundError, KeyError, yaml.YAMLError):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Could not load the scoring rules.",
+        )
+
+
+ScoringRulesDep = Annotated[ScoringRules, Depends(get_scoring_rules)]
+
+
+@dataclass(frozen=True)
+class ScoringPuzzle:
+    """The parts of a puzzle needed for scoring, parsed once from its cached JSON."""
+
+    date: datetime.date
+    # Tile id -> (letter, value)
+    tiles: Mapping[str, tuple[str, int]]
+    target_base_scores: tuple[int, ...]
+
+
+@lru_cache(maxsize=64)
+def scoring_puzzle_from_json(puzzle_json: str) -> ScoringPuzzle:
+    """
+    Parses a serialized puzzle (as returned by crud.get_puzzle_json_by_date) for scoring.  Cached
+    by content, so repeated submissions for the same day skip the parsing, and an overwritten
+    puzzle simply misses.
+    """
+    data = json.loads(puzzle_json)
+    tiles = {
+        tile["id"]: (tile["letter"], tile["value"])
+        for rack in data["initialRacks"]
+        for tile in rack
+    }
+    target_base_scores = tuple(
+        sum(tile["value"] for tile in rack) for rack in data["targetSolution"]
+    )
+    return ScoringPuzzle(
+        date=datetime.date.fromisoformat(data["date"]),
+        tiles=tiles,
+        target_base_scores=target_base_scores,
+    )
+
+
+def score_submission(
+    puzzle: ScoringPuzzle,
+    racks: list[list[str]],
+    *,
+    multipliers: Mapping[int, int],
+    lexicon: LexiconIndex,
+) -> ScoreResult:
+    """
+    Scores a submission, given as a list of racks of tile ids.  Raises InvalidSubmission if it has
+    the wrong number of racks, or uses a tile that isn't in the puzzle or uses one twice.
+    """
+    if len(racks) != len(puzzle.target_base_scores):
+        raise InvalidSubmission(
+            f"Expected {len(puzzle.target_base_scores)} racks, got {len(racks)}."
+        )
+
+    seen: set[str] = set()
+    rack_scores = []
+    total_score = 0
+    for index, rack in enumerate(racks):
+        letters = []
+        base_score = 0
+        for tile_id in rack:
+            tile = puzzle.tiles.get(tile_id)
+            if tile is None:
+                raise InvalidSubmission(f"Tile {tile_id!r} is not in this puzzle.")
+            if tile_id in seen:
+                raise InvalidSubmission(f"Tile {tile_id!r} is used more than once.")
+            seen.add(tile_id)
+            letters.append(tile[0])
+            base_score += tile[1]
+
+        word = "".join(letters)
+        required_length = index + 3
+        multiplier = multipliers.get(required_length, 1)
+        valid = len(word) == required_length and word in lexicon
+        if not valid:
+            base_score = 0
+        total_score += base_score * multiplier
+        rack_scores.append(
+            RackScore(word=word, valid=valid, base_score=base_score, multiplier=multiplier)
+        )
+
+    target_score = sum(
+        base_score * multipliers.get(index + 3, 1)
+        for index, base_score in enumerate(puzzle.target_base_scores)
+    )
+    return ScoreResult(
+        date=puzzle.date, racks=rack_scores, total_score=total_score, target_score=target_score
+    )
+
+
+def score_batch(
+    submissions: list[DatedScoreSubmission],
+    puzzles: Mapping[datetime.date, ScoringPuzzle],
+    *,
+    multipliers: Mapping[int, int],
+    lexicon: LexiconIndex,
+) -> BatchScoreResponse:
+    """
+    Scores many submissions, for puzzles already looked up by date.  Submissions that can't be
+    scored (a future date, a missing puzzle, or tiles that don't belong to it) get an error
+    instead of a result, rather than failing the whole batch.
+    """
+    today = datetime.date.today()
+    results = []
+    for submission in submissions:
+        item = BatchScoreItem(date=submission.date)
+        puzzle = puzzles.get(submission.date)
+        if submission.date > today:
+            item.error = "No spoilers!"
+        elif puzzle is None:
+            item.error = f"Puzzle not found for date {submission.date.isoformat()}."
+        else:
+            try:
+                item.result = score_submission(
+                    puzzle, submission.racks, multipliers=multipliers, lexicon=lexicon
+                )
+            except InvalidSubmission as exc:
+                item.error = str(exc)
+        results.append(item)
+    return BatchScoreResponse(results=results)
+
+
+def dates_to_score(submissions: list[DatedScoreSubmission]) -> list[datetime.date]:
+    """The sorted, distinct, non-future dates of a batch, whose puzzles need looking up."""
+    today = datetime.date.today()
+    return sorted({submission.date for submission in submissions if submission.date <= today})
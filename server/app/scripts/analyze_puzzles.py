@@ -0,0 +1,137 @@
+"""Stand-alone script to work out difficulty statistics for every stored puzzle.
+
+For each puzzle, app.analytics counts the legal words of each length its tiles can spell and its
+full solutions, and the results are written to the `puzzle_stats` table.  To run it, you must
+first be in the `server` directory of the project, and then execute it as a module:
+
+    python -m app.scripts.analyze_puzzles [OPTIONS]
+
+Usage Options:
+    --force: Recompute every puzzle's statistics, even those that are up to date.
+    --batch-size N: Read, analyze and commit N puzzles at a time. Default: 1000.
+
+Behavior:
+- A puzzle is analyzed if it has no statistics yet, if its tiles have changed (e.g. it was
+  overwritten), or if `words-full.txt` has changed since it was analyzed; so after editing the word
+  list, just run this again.
+- Each puzzle takes a few milliseconds, so the whole archive takes seconds.
+"""
+
+import datetime
+import logging
+import time
+from typing import Annotated
+
+import typer
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, col, select
+
+from app.analytics import analyze_tiles, get_letter_count_matrix
+from app.crud import stored_tiles
+from app.database import create_db_and_tables, get_session
+from app.logging_config import setup_logging
+from app.models import PuzzleStats, PuzzleWithDate
+
+app = typer.Typer()
+
+
+def analyze_puzzles(db: Session, *, force: bool = False, batch_size: int = 1000) -> int:
+    """
+    Analyzes every puzzle whose statistics are missing or stale (or every puzzle, with `force`),
+    in date order, and upserts the results into `puzzle_stats`, one commit per batch.
+
+    Returns:
+        The number of puzzles analyzed.
+    """
+    matrix = get_letter_count_matrix()
+    existing = (
+        {}
+        if force
+        else {
+            date: (letters, words_version)
+            for date, letters, words_version in db.exec(
+                select(PuzzleStats.date, PuzzleStats.letters, PuzzleStats.words_version)
+            )
+        }
+    )
+    statement = insert(PuzzleStats.__table__)  # type: ignore[attr-defined]
+    statement = statement.on_conflict_do_update(
+        index_elements=["date"],
+        set_={
+            column.name: statement.excluded[column.name]
+            for column in PuzzleStats.__table__.columns  # type: ignore[attr-defined]
+            if column.name != "date"
+        },
+    )
+
+    analyzed = 0
+    last_date: datetime.date | None = None
+    started = time.perf_counter()
+    while True:
+        query = (
+            select(PuzzleWithDate.date, PuzzleWithDate.compact, col(PuzzleWithDate.initial_racks))
+            .order_by(col(PuzzleWithDate.date))
+            .limit(batch_size)
+        )
+        if last_date is not None:
+            query = query.where(col(PuzzleWithDate.date) > last_date)
+        rows = db.exec(query).all()
+        if not rows:
+            break
+        last_date = rows[-1][0]
+
+        params = []
+        for date, compact, initial_racks in rows:
+            letters = "".join(sorted(letter for letter, _ in stored_tiles(compact, initial_racks)))
+            if existing.get(date) == (letters, matrix.version):
+                continue
+            analysis = analyze_tiles(letters, matrix)
+            params.append(
+                {
+                    "date": date,
+                    "letters": letters,
+                    "words_version": matrix.version,
+                    **{
+                        f"words_{length}": count
+                        for length, count in analysis.words_by_length.items()
+                    },
+                    "full_solutions": analysis.full_solutions,
+                }
+            )
+        if params:
+            db.exec(statement, params=params)
+        db.commit()
+        analyzed += len(params)
+        logging.info(f"Analyzed {analyzed} puzzle(s) so far, up to {last_date.isoformat()}...")
+
+    if analyzed:
+        elapsed = time.perf_counter() - started
+        logging.info(
+            f"Analyzed {analyzed} puzzles in {elapsed:.2f}s ({analyzed / elapsed:.1f}/sec)."
+        )
+    return analyzed
+
+
+@app.command()
+def main(
+    force: Annotated[
+        bool, typer.Option("--force", help="Recompute puzzles whose statistics are up to date.")
+    ] = False,
+    batch_size: Annotated[
+        int,
+        typer.Option("--batch-size", min=1, help="Read, analyze and commit N puzzles at a time."),
+    ] = 1000,
+):
+    """
+    Work out difficulty statistics for each stored puzzle, into the puzzle_stats table.
+    """
+    setup_logging()
+    create_db_and_tables()
+
+    for db in get_session():
+        analyzed = analyze_puzzles(db, force=force, batch_size=batch_size)
+        logging.info(f"Stored statistics for {analyzed} puzzle(s).")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,184 @@
+"""Stand-alone script to convert stored puzzles to (or from) the compact encoding.
+
+New puzzles are only written in the compact encoding (see app.compact) when
+`Settings.compact_puzzle_storage` is set; this script converts the rows that are already in the
+database.  To run it, you must first be in the `server` directory of the project, and then
+execute it as a module:
+
+    python -m app.scripts.compact_puzzles [OPTIONS]
+
+Usage Options:
+    --expand: Convert compact rows back to JSON instead (e.g. before turning the setting off
+        and downgrading).
+    --batch-size N: Convert and commit N rows at a time. Default: 1000.
+    --vacuum: Run VACUUM afterwards, so that SQLite actually gives the freed space back.
+
+Puzzles that don't have the standard shape can't be encoded and are left as JSON.  The API's
+JSON is identical for both encodings, so nothing cached needs to be invalidated.
+"""
+
+import datetime
+import logging
+from collections.abc import Callable
+from typing import Annotated
+
+import typer
+from pydantic import TypeAdapter
+from sqlalchemy import bindparam, text, update
+from sqlmodel import Session, col, select
+
+from app.compact import decode_puzzle, encode_puzzle
+from app.database import create_db_and_tables, engine, get_session
+from app.logging_config import setup_logging
+from app.models import PuzzleWithDate, Tile
+
+app = typer.Typer()
+
+racks_adapter = TypeAdapter(list[list[Tile]])
+
+
+def _convert_rows(
+    db: Session,
+    *,
+    where,
+    convert: Callable[[tuple], dict | None],
+    batch_size: int,
+) -> tuple[int, int]:
+    """
+    Pages through the rows matching `where` in date order, and writes back the new column
+    values returned by `convert` (or skips the row if it returns None), one commit per batch.
+
+    Returns:
+        The number of rows converted and skipped.
+    """
+    table = PuzzleWithDate.__table__  # type: ignore[attr-defined]
+    statement = (
+        update(table)
+        .where(table.c.date == bindparam("b_date"))
+        .values(
+            compact=bindparam("b_compact"),
+            initial_racks=bindparam("b_initial_racks"),
+            target_solution=bindparam("b_target_solution"),
+        )
+    )
+
+    converted = skipped = 0
+    last_date: datetime.date | None = None
+    while True:
+        query = (
+            select(
+                PuzzleWithDate.date,
+                PuzzleWithDate.compact,
+                col(PuzzleWithDate.initial_racks),
+                col(PuzzleWithDate.target_solution),
+            )
+            .where(where)
+            .order_by(col(PuzzleWithDate.date))
+            .limit(batch_size)
+        )
+        if last_date is not None:
+            query = query.where(col(PuzzleWithDate.date) > last_date)
+        rows = db.exec(query).all()
+        if not rows:
+            break
+        last_date = rows[-1][0]
+
+        params = []
+        for row in rows:
+            values = convert(row)
+            if values is None:
+                skipped += 1
+            else:
+                params.append({"b_date": row[0], **values})
+        if params:
+            db.connection().execute(statement, params)
+        db.commit()
+        converted += len(params)
+        logging.info(f"Converted {converted} puzzle(s) so far, up to {last_date.isoformat()}...")
+
+    return converted, skipped
+
+
+def compact_puzzles(db: Session, *, batch_size: int = 1000) -> tuple[int, int]:
+    """
+    Converts every JSON-encoded puzzle that has the standard shape to the compact encoding.
+
+    Returns:
+        The number of puzzles converted, and the number left as JSON.
+    """
+
+    def convert(row: tuple) -> dict | None:
+        _, _, initial_racks, target_solution = row
+        encoded = encode_puzzle(
+            racks_adapter.validate_python(initial_racks),
+            racks_adapter.validate_python(target_solution),
+        )
+        if encoded is None:
+            return None
+        return {"b_compact": encoded, "b_initial_racks": None, "b_target_solution": None}
+
+    return _convert_rows(
+        db, where=col(PuzzleWithDate.compact).is_(None), convert=convert, batch_size=batch_size
+    )
+
+
+def expand_puzzles(db: Session, *, batch_size: int = 1000) -> int:
+    """
+    Converts every compact puzzle back to JSON.
+
+    Returns:
+        The number of puzzles converted.
+    """
+
+    def convert(row: tuple) -> dict:
+        initial_racks, target_solution = decode_puzzle(row[1])
+        return {
+            "b_compact": None,
+            "b_initial_racks": racks_adapter.dump_python(initial_racks),
+            "b_target_solution": racks_adapter.dump_python(target_solution),
+        }
+
+    converted, _ = _convert_rows(
+        db, where=col(PuzzleWithDate.compact).is_not(None), convert=convert, batch_size=batch_size
+    )
+    return converted
+
+
+@app.command()
+def main(
+    expand: Annotated[
+        bool, typer.Option("--expand", help="Convert compact puzzles back to JSON.")
+    ] = False,
+    batch_size: Annotated[
+        int, typer.Option("--batch-size", min=1, help="Convert and commit N rows at a time.")
+    ] = 1000,
+    vacuum: Annotated[
+        bool, typer.Option("--vacuum", help="Run VACUUM afterwards to shrink the database file.")
+    ] = False,
+):
+    """
+    Convert the stored puzzles to the compact encoding (or back, with --expand).
+    """
+    setup_logging()
+    create_db_and_tables()
+
+    for db in get_session():
+        if expand:
+            converted = expand_puzzles(db, batch_size=batch_size)
+            logging.info(f"Expanded {converted} puzzle(s) to JSON.")
+        else:
+            converted, skipped = compact_puzzles(db, batch_size=batch_size)
+            logging.info(
+                f"Compacted {converted} puzzle(s); {skipped} couldn't be encoded and were left "
+                "as JSON."
+            )
+
+    if vacuum:
+        # VACUUM can't run inside a transaction.
+        logging.info("Vacuuming the database...")
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("VACUUM"))
+
+
+if __name__ == "__main__":
+    app()
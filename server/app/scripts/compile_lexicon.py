@@ -0,0 +1,81 @@
+"""Stand-alone script to compile the word lists into the memory-mapped index.
+
+Compiles `config/words-full.txt` and `config/words-common.txt` into the binary index described in
+app.lexicon_index, which every process then maps rather than parsing the word lists.  To run it,
+you must first be in the `server` directory of the project, and then execute it as a module:
+
+    python -m app.scripts.compile_lexicon [OPTIONS]
+
+Usage Options:
+    --output PATH: Where to write the index. Default: `Settings.lexicon_index_path`.
+    --check: Don't write anything; exit with status 1 if the index is missing or out of date.
+
+Behavior:
+- The Docker image runs this at build time, so that containers start with an up-to-date index.
+- Processes that find the index missing or out of date compile it themselves, so running this
+  after editing the word lists is optional, but saves the first process the work.
+- The file is replaced atomically, so processes that have the old one mapped aren't disturbed.
+"""
+
+import logging
+import time
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+from app.config import content_digest
+from app.lexicon_index import LexiconIndex, get_lexicon_index, write_lexicon_index
+from app.logging_config import setup_logging
+from app.settings import get_settings
+
+app = typer.Typer()
+
+
+def read_sources() -> tuple[str, str, str]:
+    """Returns the full and common word list texts, and their digest."""
+    full_text, common_text = (
+        path.read_text(encoding="utf-8") for path in get_lexicon_index.paths()
+    )
+    return full_text, common_text, content_digest([full_text, common_text])
+
+
+def is_up_to_date(path: Path, digest: str) -> bool:
+    """Whether `path` holds an index compiled from word lists with this digest."""
+    try:
+        return LexiconIndex.open(path).version == digest
+    except (OSError, ValueError):
+        return False
+
+
+@app.command()
+def main(
+    output: Annotated[
+        Path | None, typer.Option("--output", "-o", help="Where to write the index.")
+    ] = None,
+    check: Annotated[
+        bool, typer.Option("--check", help="Exit with status 1 if the index is out of date.")
+    ] = False,
+):
+    """
+    Compile the word lists into the memory-mapped index.
+    """
+    setup_logging()
+    path = output or get_settings().lexicon_index_path
+    full_text, common_text, digest = read_sources()
+
+    if check:
+        if not is_up_to_date(path, digest):
+            logging.error(f"{path} is missing or out of date with the word lists.")
+            raise typer.Exit(code=1)
+        logging.info(f"{path} is up to date.")
+        return
+
+    started = time.perf_counter()
+    size = write_lexicon_index(full_text, common_text, digest, path)
+    elapsed = time.perf_counter() - started
+    logging.info(f"Wrote {path} ({size:,} bytes) in {elapsed:.2f}s.")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,125 @@
+"""Stand-alone script to work out the best possible score for stored puzzles.
+
+`generate_puzzle` only knows the solution it started from; this script runs app.solver over each
+stored puzzle and saves the highest score any arrangement of its tiles could get in the puzzles
+table's `max_score` column.  To run it, you must first be in the `server` directory of the
+project, and then execute it as a module:
+
+    python -m app.scripts.compute_max_scores [OPTIONS]
+
+Usage Options:
+    --force: Recompute every puzzle's best score, not just those without one (e.g. after changing
+        the multipliers in `game_rules.yaml` or the full word list).
+    --batch-size N: Solve and commit N puzzles at a time. Default: 1000.
+
+Scores use each puzzle's stored tile values and the current multipliers and full word list.
+Overwriting a puzzle (`generate_puzzles --overwrite`) clears its best score, so the next run
+picks it up again.
+"""
+
+import datetime
+import logging
+import time
+from typing import Annotated
+
+import typer
+from sqlalchemy import bindparam, update
+from sqlmodel import Session, col, select
+
+from app.config import get_game_rules_file
+from app.crud import stored_tiles
+from app.database import create_db_and_tables, get_session
+from app.logging_config import setup_logging
+from app.models import PuzzleWithDate
+from app.solver import get_anagram_index, solve_puzzle
+
+app = typer.Typer()
+
+
+def compute_max_scores(
+    db: Session, *, force: bool = False, batch_size: int = 1000
+) -> tuple[int, int]:
+    """
+    Solves every puzzle without a best score (or every puzzle, with `force`) in date order, and
+    stores the results, one commit per batch.  Puzzles the solver can't handle (whose tiles with
+    the same letter have different values) are logged and left without one.
+
+    Returns:
+        The number of puzzles solved, and the number skipped.
+    """
+    multipliers = get_game_rules_file()["multipliers"]
+    index = get_anagram_index()
+    table = PuzzleWithDate.__table__  # type: ignore[attr-defined]
+    statement = (
+        update(table)
+        .where(table.c.date == bindparam("b_date"))
+        .values(max_score=bindparam("b_max_score"))
+    )
+
+    solved = skipped = 0
+    last_date: datetime.date | None = None
+    started = time.perf_counter()
+    while True:
+        query = (
+            select(
+                PuzzleWithDate.date,
+                PuzzleWithDate.compact,
+                col(PuzzleWithDate.initial_racks),
+            )
+            .order_by(col(PuzzleWithDate.date))
+            .limit(batch_size)
+        )
+        if not force:
+            query = query.where(col(PuzzleWithDate.max_score).is_(None))
+        if last_date is not None:
+            query = query.where(col(PuzzleWithDate.date) > last_date)
+        rows = db.exec(query).all()
+        if not rows:
+            break
+        last_date = rows[-1][0]
+
+        params = []
+        for date, compact, initial_racks in rows:
+            try:
+                solution = solve_puzzle(
+                    stored_tiles(compact, initial_racks), multipliers=multipliers, index=index
+                )
+            except ValueError as e:
+                logging.warning(f"Skipping the puzzle for {date.isoformat()}: {e}")
+                skipped += 1
+                continue
+            params.append({"b_date": date, "b_max_score": solution.score})
+        if params:
+            db.connection().execute(statement, params)
+        db.commit()
+        solved += len(params)
+        logging.info(f"Solved {solved} puzzle(s) so far, up to {last_date.isoformat()}...")
+
+    if solved:
+        elapsed = time.perf_counter() - started
+        logging.info(f"Solved {solved} puzzles in {elapsed:.2f}s ({solved / elapsed:.1f}/sec).")
+    return solved, skipped
+
+
+@app.command()
+def main(
+    force: Annotated[
+        bool, typer.Option("--force", help="Recompute puzzles that already have a best score.")
+    ] = False,
+    batch_size: Annotated[
+        int, typer.Option("--batch-size", min=1, help="Solve and commit N puzzles at a time.")
+    ] = 1000,
+):
+    """
+    Work out and store the best possible score for each stored puzzle.
+    """
+    setup_logging()
+    create_db_and_tables()
+
+    for db in get_session():
+        solved, skipped = compute_max_scores(db, force=force, batch_size=batch_size)
+        logging.info(f"Stored the best score for {solved} puzzle(s); skipped {skipped}.")
+
+
+if __name__ == "__main__":
+    app()
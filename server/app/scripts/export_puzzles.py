@@ -0,0 +1,220 @@
+"""Stand-alone script to pre-render past puzzles as static files for Caddy to serve.
+
+Past puzzles never change, but every archive request still went Caddy -> uvicorn -> Redis/SQLite.
+This script writes each past date's puzzle to `<directory>/puzzle/<date>.json`, exactly as the API
+would serve it, along with precompressed `.json.gz` and `.json.br` siblings.  Caddy serves
+/api/puzzle/<date> straight from these files when they exist (see client/Caddyfile), and only
+proxies to the API otherwise.
+
+To run it, you must first be in the `server` directory of the project, and then execute it as a
+module:
+
+    python -m app.scripts.export_puzzles [OPTIONS]
+
+Usage Options:
+    --directory PATH: Where to write the files. Default: `Settings.puzzle_export_directory`.
+    --start YYYY-MM-DD: The first date to export. Default: the earliest puzzle.
+    --end YYYY-MM-DD: The last date to export. Default (and latest allowed): yesterday.
+    --force: Re-render dates that have already been exported, e.g. after editing puzzles other
+        than with `generate_puzzles --overwrite`.  Files whose content hasn't changed are left
+        alone.
+
+Behavior:
+- Only dates before today are ever exported, so this can't leak today's or future puzzles.
+- Dates that were already exported are skipped (unless --force is given), so the nightly run only
+  writes the day that has just become past.  Only the dates are read to find them, and only the
+  puzzles that still need exporting are loaded.
+- `generate_puzzles --overwrite` deletes the files for the dates it replaces (see
+  remove_exported_puzzles), since Caddy serves them as immutable; the next run exports the new
+  puzzles.
+- Every file is written to a temporary file in the same directory and renamed into place, and
+  the .json is written last, so Caddy never serves a partial file or a .json without its
+  compressed siblings.
+"""
+
+import datetime
+import gzip
+import logging
+import os
+import tempfile
+from collections.abc import Iterable
+from itertools import batched
+from pathlib import Path
+from typing import Annotated
+
+import brotli
+import typer
+from sqlmodel import Session, col, select
+
+from app.crud import PUZZLE_BATCH_DAYS, puzzle_json_from_row, puzzle_json_statement
+from app.database import get_session
+from app.logging_config import setup_logging
+from app.models import PuzzleWithDate
+from app.settings import get_settings
+
+app = typer.Typer()
+
+# The compressed siblings Caddy's `precompressed` option looks for, and how to make them.
+COMPRESSED_SUFFIXES = {
+    ".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0),
+    ".br": lambda data: brotli.compress(data, quality=11),
+}
+
+
+def exported_path(directory: Path, date: datetime.date) -> Path:
+    return directory / "puzzle" / f"{date.isoformat()}.json"
+
+
+def exported_dates(directory: Path) -> set[datetime.date]:
+    """Returns the dates that have an exported .json in `directory`."""
+    dates = set()
+    for path in (directory / "puzzle").glob("*.json"):
+        try:
+            dates.add(datetime.date.fromisoformat(path.stem))
+        except ValueError:
+            pass
+    return dates
+
+
+def remove_exported_puzzles(directory: Path, dates: Iterable[datetime.date]) -> int:
+    """
+    Deletes the exported files for `dates`, e.g. because their puzzles have been replaced, so
+    Caddy goes back to proxying them to the API until they're exported again.
+
+    Returns:
+        The number of dates whose .json was deleted.
+    """
+    removed = 0
+    for date in dates:
+        path = exported_path(directory, date)
+        # The .json first, so Caddy never serves a stale sibling without it.
+        for suffix in ("", *COMPRESSED_SUFFIXES):
+            try:
+                path.with_name(path.name + suffix).unlink()
+            except FileNotFoundError:
+                continue
+            removed += suffix == ""
+    return removed
+
+
+def write_atomically(path: Path, data: bytes):
+    """
+    Writes `data` to `path` via a temporary file in the same directory and os.replace(), so
+    readers see either the old file or the complete new one.
+    """
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # mkstemp creates the file readable only by us, but Caddy runs as a different user.
+        os.chmod(temp_name, 0o644)
+        os.replace(temp_name, path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
+
+def export_puzzle(directory: Path, date: datetime.date, puzzle_json: str) -> bool:
+    """
+    Writes one puzzle's .json and compressed siblings, unless the .json already has exactly this
+    content.
+
+    Returns:
+        Whether anything was written.
+    """
+    path = exported_path(directory, date)
+    data = puzzle_json.encode("utf-8")
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for suffix, compress in COMPRESSED_SUFFIXES.items():
+        write_atomically(path.with_name(path.name + suffix), compress(data))
+    write_atomically(path, data)
+    return True
+
+
+def export_puzzles(
+    db: Session,
+    directory: Path,
+    *,
+    start_date: datetime.date | None = None,
+    end_date: datetime.date | None = None,
+    force: bool = False,
+) -> int:
+    """
+    Exports the puzzles from start_date (default: the earliest) to end_date (default: yesterday),
+    inclusive.  Dates from today onwards are never exported, and unless `force` is set, neither
+    are dates that already have a file in `directory`.
+
+    Returns:
+        The number of puzzles written.
+    """
+    yesterday = datetime.date.today() - datetime.timedelta(days=1)
+    end_date = min(end_date or yesterday, yesterday)
+    statement = select(PuzzleWithDate.date).where(col(PuzzleWithDate.date) <= end_date)
+    if start_date is not None:
+        statement = statement.where(col(PuzzleWithDate.date) >= start_date)
+    dates = sorted(db.exec(statement).all())
+    if not force:
+        existing = exported_dates(directory)
+        dates = [date for date in dates if date not in existing]
+
+    written = 0
+    for batch in batched(dates, PUZZLE_BATCH_DAYS):
+        rows = db.exec(
+            puzzle_json_statement()
+            .where(col(PuzzleWithDate.date).in_(batch))
+            .order_by(col(PuzzleWithDate.date))
+        )
+        for row in rows:
+            if export_puzzle(directory, row[0], puzzle_json_from_row(row)):
+                written += 1
+    return written
+
+
+@app.command()
+def main(
+    directory: Annotated[
+        Path | None, typer.Option(help="Directory to write the files to.", file_okay=False)
+    ] = None,
+    start: Annotated[
+        datetime.datetime | None,
+        typer.Option(formats=["%Y-%m-%d"], help="Start date (YYYY-MM-DD)."),
+    ] = None,
+    end: Annotated[
+        datetime.datetime | None,
+        typer.Option(formats=["%Y-%m-%d"], help="End date (YYYY-MM-DD)."),
+    ] = None,
+    force: Annotated[
+        bool, typer.Option("--force", help="Re-render dates that were already exported.")
+    ] = False,
+):
+    """
+    Export past puzzles as static JSON files (plus .gz and .br) for Caddy to serve.
+
+    \bBehavior:
+    - Only dates before today are exported.
+    - Dates that were already exported are skipped, unless --force is given.
+    """
+    setup_logging()
+    directory = directory or get_settings().puzzle_export_directory
+    start_date = start.date() if start else None
+    end_date = end.date() if end else None
+
+    if start_date and end_date and start_date > end_date:
+        logging.error("Start date cannot be after end date.")
+        raise typer.Exit(code=1)
+
+    for db in get_session():
+        written = export_puzzles(
+            db, directory, start_date=start_date, end_date=end_date, force=force
+        )
+        logging.info(f"Exported {written} puzzle(s) to {directory}.")
+
+
+if __name__ == "__main__":
+    app()
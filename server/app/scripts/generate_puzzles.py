@@ -12,6 +12,13 @@ Usage Options:
     --days N: Generate puzzles for N days. Default: 1.
     --start YYYY-MM-DD: The start date for puzzle generation.
     --end YYYY-MM-DD: The end date for puzzle generation.
+    --workers N: Generate puzzles in N worker processes. Default: 1 (no pool).
+    --chunk-size N: Commit after every N new puzzles. Default: 500.
+    --overwrite: Regenerate puzzles that already exist (e.g. after changing the salt).
+    --min-score N / --max-score N: Only accept puzzles whose target solution scores in this band.
+    --min-vowel-ratio R / --max-vowel-ratio R: Only accept puzzles whose tiles are this fraction
+        vowels (A, E, I, O, U).
+    --max-alternative-solutions N: Only accept puzzles with at most N other full solutions.
 
 Behavior:
 - If no options are provided, it generates a puzzle for the current day.
@@ -21,21 +28,56 @@ Behavior:
 - If only --end is provided, it generates puzzles for N days ending on that date.
 
 The script is idempotent: if a puzzle for a given date already exists in the
-database, it will be skipped. All generated puzzles for a single run are
-committed in a single database transaction.
+database, it will be skipped. Existing dates are found with a single range
+query, and new puzzles are written with bulk `INSERT ... ON CONFLICT(date) DO
+NOTHING` statements committed in chunks of --chunk-size, so a concurrent
+writer (e.g. the API's startup hook) inserting the same day is harmless.
+
+With --overwrite, existing puzzles in the range are replaced instead, and the
+replaced dates are evicted from Redis and from every API worker's in-process
+cache, and their static copies (see app.scripts.export_puzzles) are deleted.
+Either way, API workers are told to refresh their cached puzzle range (see
+crud.PuzzleRange) once new puzzles are committed.
+
+Difficulty constraints are opt-in.  Without them, puzzles come from `generate_puzzle` exactly as
+before; with any of them, from `generate_constrained_puzzle` (see app.constrained_generator),
+which is just as deterministic for a given date, but only for the same constraints.
 """
 
 import datetime
 import logging
+import time
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 import typer
-from sqlmodel import Session
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, col, select
 from typing_extensions import Annotated
 
+from app.cache import get_redis_client, invalidate_cached_keys
+from app.compact import encode_puzzle
+from app.config import get_puzzle_lexicon
+from app.crud import PUZZLE_RANGE_KEY, redis_key_for_date
 from app.database import create_db_and_tables, get_session
 from app.logging_config import setup_logging
-from app.models import PuzzleWithDate
+from app.metrics import (
+    generation_duration,
+    generation_run_metrics,
+    puzzle_dates,
+    write_textfile,
+)
+from app.models import Puzzle, PuzzleWithDate
 from app.puzzle_generator import generate_puzzle
+from app.scripts.export_puzzles import remove_exported_puzzles
+from app.settings import get_settings
+
+if TYPE_CHECKING:
+    # The API imports this module, and doesn't need NumPy unless it's generating with constraints.
+    from app.constrained_generator import PuzzleConstraints
 
 app = typer.Typer()
 
@@ -54,24 +96,176 @@ def generate_daily_puzzle(date: datetime.date, db: Session):
         return
 
     logging.info(f"Generating puzzle for {date.isoformat()}...")
-    # Use the date's ISO format string as a stable seed for reproducibility.
-    puzzle_data = generate_puzzle(seed=date.isoformat())
+    insert_puzzles(db, [(date, generate_puzzle_for_date(date))])
+
 
-    new_puzzle = PuzzleWithDate(
-        date=date,
-        initial_racks=puzzle_data.initial_racks,
-        target_solution=puzzle_data.target_solution,
+def find_existing_dates(
+    db: Session, start_date: datetime.date, end_date: datetime.date
+) -> set[datetime.date]:
+    """Returns the dates in the inclusive range that already have a puzzle, in one query."""
+    statement = select(PuzzleWithDate.date).where(
+        col(PuzzleWithDate.date).between(start_date, end_date)
     )
-    db.add(new_puzzle)
+    return set(db.exec(statement).all())
 
 
-def generate_daily_puzzles(start_date: datetime.date, end_date: datetime.date):
+def puzzle_row(date: datetime.date, puzzle: Puzzle, *, compact: bool = False) -> dict:
+    """
+    Returns the column values for storing `puzzle`: in the compact encoding if requested (and the
+    puzzle has the standard shape), otherwise as JSON.
+    """
+    encoded = encode_puzzle(puzzle.initial_racks, puzzle.target_solution) if compact else None
+    if encoded is not None:
+        return {"date": date, "initial_racks": None, "target_solution": None, "compact": encoded}
+    return {
+        "date": date,
+        "initial_racks": [[tile.model_dump() for tile in rack] for rack in puzzle.initial_racks],
+        "target_solution": [
+            [tile.model_dump() for tile in rack] for rack in puzzle.target_solution
+        ],
+        "compact": None,
+    }
+
+
+def insert_puzzles(
+    db: Session, puzzles: Sequence[tuple[datetime.date, Puzzle]], *, overwrite: bool = False
+) -> int:
+    """
+    Adds puzzles to the session's transaction with a single executemany
+    `INSERT ... ON CONFLICT(date) DO NOTHING`, bypassing the ORM unit of work.
+
+    Dates that already have a puzzle (e.g. because another process inserted the same day after
+    we checked) are left untouched rather than raising an IntegrityError.  With `overwrite`, the
+    existing puzzle is replaced instead (`ON CONFLICT(date) DO UPDATE`).
+
+    Puzzles are stored in the compact encoding if `Settings.compact_puzzle_storage` is set.
+
+    Returns:
+        The number of rows actually inserted (or replaced).
+    """
+    if not puzzles:
+        return 0
+
+    compact = get_settings().compact_puzzle_storage
+    rows = [puzzle_row(date, puzzle, compact=compact) for date, puzzle in puzzles]
+    statement = insert(PuzzleWithDate.__table__)
+    if overwrite:
+        statement = statement.on_conflict_do_update(
+            index_elements=["date"],
+            set_={
+                "initial_racks": statement.excluded.initial_racks,
+                "target_solution": statement.excluded.target_solution,
+                "compact": statement.excluded.compact,
+                # The replacement's best score has to be worked out again.
+                "max_score": None,
+            },
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=["date"])
+    result = db.exec(statement, params=rows)
+    return result.rowcount  # type: ignore[union-attr]
+
+
+def write_batch(
+    db: Session,
+    batch: Sequence[tuple[datetime.date, Puzzle]],
+    existing_dates: set[datetime.date],
+    overwrite: bool,
+    export_directory: Path,
+) -> int:
+    """
+    Stores and commits a batch of generated puzzles (see insert_puzzles), then invalidates what
+    they made stale: the cached and exported copies of the dates in `existing_dates` that were
+    replaced, and if any were new, the cached puzzle range.
+
+    Returns:
+        The number of rows actually inserted (or replaced).
+    """
+    written = insert_puzzles(db, batch, overwrite=overwrite)
+    db.commit()
+    replaced = [date for date, _ in batch if date in existing_dates]
+    # Caddy serves these as immutable, so they mustn't outlive the old puzzles.
+    remove_exported_puzzles(export_directory, replaced)
+    stale_keys = [redis_key_for_date(date) for date in replaced]
+    if written:
+        # New dates change the earliest/latest puzzle reported by /api/config.
+        stale_keys.append(PUZZLE_RANGE_KEY)
+    if stale_keys:
+        invalidate_cached_keys(get_redis_client(), stale_keys)
+    return written
+
+
+def generate_puzzle_for_date(
+    date: datetime.date, constraints: "PuzzleConstraints | None" = None
+) -> Puzzle:
+    """
+    Generates (but doesn't store) the puzzle for a date, using the date's ISO format string as a
+    stable seed for reproducibility.  This is a module-level function so it can be sent to worker
+    processes.
+
+    Raises:
+        ValueError: If there are constraints, and no puzzle satisfying them could be found.
+    """
+    if constraints is not None and not constraints.is_empty:
+        from app.constrained_generator import generate_constrained_puzzle
+
+        return generate_constrained_puzzle(date.isoformat(), constraints)
+    return generate_puzzle(seed=date.isoformat())
+
+
+def generate_puzzles_for_dates(
+    dates: Sequence[datetime.date],
+    workers: int = 1,
+    constraints: "PuzzleConstraints | None" = None,
+) -> Iterator[tuple[datetime.date, Puzzle]]:
+    """
+    Generates puzzles for the given dates, yielding them back in the same order as `dates`.
+
+    Args:
+        dates: The dates to generate puzzles for.
+        workers: The number of worker processes to spread generation across.  With 1 (or fewer),
+            puzzles are generated in this process.
+        constraints: Optional difficulty constraints for every puzzle.
+    """
+    generate = generate_puzzle_for_date
+    if constraints is not None:
+        generate = partial(generate_puzzle_for_date, constraints=constraints)
+    if workers <= 1 or len(dates) <= 1:
+        for date in dates:
+            yield date, generate(date)
+        return
+
+    # Each worker loads the lexicon once up front rather than on its first puzzle, and dates are
+    # handed out in batches to keep the inter-process chatter down.  executor.map() returns
+    # results in submission order, so puzzles stream back in date order.
+    batch_size = max(1, len(dates) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=get_puzzle_lexicon) as executor:
+        yield from zip(dates, executor.map(generate, dates, chunksize=batch_size))
+
+
+def generate_daily_puzzles(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    *,
+    workers: int = 1,
+    chunk_size: int = 500,
+    overwrite: bool = False,
+    constraints: "PuzzleConstraints | None" = None,
+    export_directory: Path | None = None,
+):
     """
     Generates and stores puzzles for a given date range.
 
     Args:
         start_date: The first date in the range.
         end_date: The last date in the range (inclusive).
+        workers: The number of processes to generate puzzles in (see generate_puzzles_for_dates).
+        chunk_size: The number of new puzzles to add before each commit.
+        overwrite: Whether to regenerate and replace puzzles that already exist.  Replaced dates
+            are invalidated in every cache tier once committed, and their exported files deleted.
+        constraints: Optional difficulty constraints for every new puzzle.
+        export_directory: Where the exported files are (default:
+            `Settings.puzzle_export_directory`).
     """
 
     from itertools import tee
@@ -81,16 +275,64 @@ def generate_daily_puzzles(start_date: datetime.date, end_date: datetime.date):
         raise typer.Exit(code=1)
 
     logging.info(f"Processing puzzles from {start_date.isoformat()} to {end_date.isoformat()}.")
-    # Use a single session and transaction for the entire batch.
 
     sessions, other_sessions = tee(get_session(), 2)
+    export_directory = export_directory or get_settings().puzzle_export_directory
 
     for db in sessions:
+        existing_dates = find_existing_dates(db, start_date, end_date)
+        missing_dates = []
+        skipped = 0
         current_date = start_date
         while current_date <= end_date:
-            generate_daily_puzzle(current_date, db)
+            if current_date not in existing_dates:
+                missing_dates.append(current_date)
+            elif overwrite:
+                logging.info(f"Puzzle for {current_date.isoformat()} already exists. Replacing.")
+                missing_dates.append(current_date)
+            else:
+                logging.info(f"Puzzle for {current_date.isoformat()} already exists. Skipping.")
+                skipped += 1
             current_date += datetime.timedelta(days=1)
-        db.commit()
+
+        started = time.perf_counter()
+        generated = 0
+        inserted = 0
+        batch: list[tuple[datetime.date, Puzzle]] = []
+
+        for date_and_puzzle in generate_puzzles_for_dates(
+            missing_dates, workers=workers, constraints=constraints
+        ):
+            batch.append(date_and_puzzle)
+            generated += 1
+            if len(batch) >= chunk_size:
+                inserted += write_batch(db, batch, existing_dates, overwrite, export_directory)
+                batch.clear()
+                logging.info(f"Committed {generated}/{len(missing_dates)} new puzzles...")
+        inserted += write_batch(db, batch, existing_dates, overwrite, export_directory)
+        elapsed = time.perf_counter() - started
+        generation_duration.observe(elapsed)
+        outcomes = {"inserted": inserted, "raced": generated - inserted, "skipped": skipped}
+        for outcome, count in outcomes.items():
+            puzzle_dates.inc(outcome, count)
+        textfile_directory = get_settings().metrics_textfile_directory
+        if textfile_directory is not None:
+            write_textfile(
+                textfile_directory,
+                "lexo_puzzle_generation",
+                generation_run_metrics(elapsed, outcomes),
+            )
+
+        if generated:
+            logging.info(
+                f"Generated {generated} puzzles in {elapsed:.2f}s "
+                f"({generated / elapsed:.1f} puzzles/sec, {max(workers, 1)} worker(s))."
+            )
+        if inserted < generated:
+            logging.info(
+                f"{generated - inserted} puzzle(s) were inserted by another process in the "
+                "meantime and were left as-is."
+            )
     logging.info("Finished processing puzzles.")
 
 
@@ -105,6 +347,39 @@ def main(
         datetime.datetime | None,
         typer.Option(formats=["%Y-%m-%d"], help="End date (YYYY-MM-DD)."),
     ] = None,
+    workers: Annotated[
+        int,
+        typer.Option("--workers", "-w", min=1, help="Generate puzzles in N worker processes."),
+    ] = 1,
+    chunk_size: Annotated[
+        int, typer.Option("--chunk-size", min=1, help="Commit after every N new puzzles.")
+    ] = 500,
+    overwrite: Annotated[
+        bool,
+        typer.Option(
+            "--overwrite", help="Regenerate puzzles that already exist (e.g. after a salt change)."
+        ),
+    ] = False,
+    min_score: Annotated[
+        int | None, typer.Option("--min-score", help="Minimum target solution score.")
+    ] = None,
+    max_score: Annotated[
+        int | None, typer.Option("--max-score", help="Maximum target solution score.")
+    ] = None,
+    min_vowel_ratio: Annotated[
+        float | None,
+        typer.Option("--min-vowel-ratio", min=0, max=1, help="Minimum fraction of vowel tiles."),
+    ] = None,
+    max_vowel_ratio: Annotated[
+        float | None,
+        typer.Option("--max-vowel-ratio", min=0, max=1, help="Maximum fraction of vowel tiles."),
+    ] = None,
+    max_alternative_solutions: Annotated[
+        int | None,
+        typer.Option(
+            "--max-alternative-solutions", min=0, help="Maximum number of other full solutions."
+        ),
+    ] = None,
 ):
     """
     Main CLI function to determine date range and trigger puzzle generation.
@@ -117,8 +392,10 @@ def main(
     - If only --end is provided, it generates puzzles for N days ending on that date.
 
     The script is idempotent: if a puzzle for a given date already exists in the
-    database, it will be skipped. All generated puzzles for a single run are
-    committed in a single database transaction.
+    database, it will be skipped. New puzzles are committed every --chunk-size
+    puzzles, and --workers spreads generation across that many processes.
+    --overwrite replaces existing puzzles instead of skipping them.  The --min-*/--max-* options
+    only accept puzzles within those difficulty bounds.
     """
     # Setup logging and DB here, not at module level, to avoid interfering
     # with test runners and other tools that import this module.
@@ -139,7 +416,28 @@ def main(
         start_date = today
         end_date = today + datetime.timedelta(days=days - 1)
 
-    generate_daily_puzzles(start_date, end_date)
+    from app.constrained_generator import PuzzleConstraints
+
+    try:
+        constraints = PuzzleConstraints(
+            min_score=min_score,
+            max_score=max_score,
+            min_vowel_ratio=min_vowel_ratio,
+            max_vowel_ratio=max_vowel_ratio,
+            max_alternative_solutions=max_alternative_solutions,
+        )
+    except ValueError as e:
+        logging.error(str(e))
+        raise typer.Exit(code=1)
+
+    generate_daily_puzzles(
+        start_date,
+        end_date,
+        workers=workers,
+        chunk_size=chunk_size,
+        overwrite=overwrite,
+        constraints=None if constraints.is_empty else constraints,
+    )
 
 
 if __name__ == "__main__":
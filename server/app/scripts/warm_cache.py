@@ -0,0 +1,180 @@
+"""Stand-alone script to pre-populate the Redis puzzle cache from the database.
+
+Nothing puts a puzzle into Redis until the first request for it misses, so the first requests
+after midnight, and after every deploy or Redis restart, pay for the database read.  This script
+loads a range of puzzles in one query and writes them all to Redis with pipelined MSETs.
+
+To run it, you must first be in the `server` directory of the project, and then execute it as a
+module:
+
+    python -m app.scripts.warm_cache [OPTIONS]
+
+Usage Options:
+    --days N: Warm puzzles for N days. Default: 7.
+    --start YYYY-MM-DD: The first date to warm.
+    --end YYYY-MM-DD: The last date to warm.
+
+Behavior:
+- If no options are provided, it warms the 7 days ending tomorrow.
+- If only --days is provided, it warms the N days ending tomorrow.
+- If --start and --end are provided, it warms that inclusive range.
+- If only --start is provided, it warms N days starting on that date.
+- If only --end is provided, it warms N days ending on that date.
+
+Dates without a puzzle in the database are skipped.  Future puzzles can safely be warmed, since
+the API refuses to serve them until their date arrives.
+
+The API process can also do this itself (see `Settings.cache_warm_days` and
+`Settings.cache_prewarm_minutes`).
+"""
+
+import asyncio
+import datetime
+import logging
+from itertools import batched
+from typing import Annotated
+
+import redis
+import typer
+from sqlmodel import Session, col
+
+from app.cache import LocalCache, get_redis_client
+from app.crud import puzzle_json_from_row, puzzle_json_statement, redis_key_for_date
+from app.database import get_session
+from app.http_caching import seconds_until_local_midnight
+from app.logging_config import setup_logging
+from app.models import PuzzleWithDate
+
+app = typer.Typer()
+
+# Keys per MSET, so that warming years of puzzles doesn't build one enormous command.
+MSET_BATCH_SIZE = 500
+
+
+def warm_cache(
+    db: Session,
+    redis_client: redis.Redis,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    *,
+    local_cache: LocalCache | None = None,
+) -> int:
+    """
+    Loads the puzzles between start_date and end_date (inclusive) and writes them to Redis (and
+    `local_cache`, if given).
+
+    Returns:
+        The number of puzzles written.
+    """
+    statement = puzzle_json_statement().where(
+        col(PuzzleWithDate.date).between(start_date, end_date)
+    )
+    entries = {redis_key_for_date(row[0]): puzzle_json_from_row(row) for row in db.exec(statement)}
+    if not entries:
+        return 0
+
+    with redis_client.pipeline(transaction=False) as pipe:
+        for batch in batched(entries.items(), MSET_BATCH_SIZE):
+            pipe.mset(dict(batch))
+        pipe.execute()
+
+    if local_cache is not None:
+        today_key = redis_key_for_date(datetime.date.today())
+        for key, puzzle_json in entries.items():
+            local_cache.set(key, puzzle_json, pin=key == today_key)
+
+    return len(entries)
+
+
+def warm_dates(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    *,
+    local_cache: LocalCache | None = None,
+) -> int:
+    """
+    Runs warm_cache with a fresh database session and the configured Redis client.  Does nothing
+    (and returns 0) if Redis isn't configured.
+    """
+    redis_client = get_redis_client()
+    if redis_client is None:
+        logging.warning("No Redis configured; nothing to warm.")
+        return 0
+
+    for db in get_session():
+        warmed = warm_cache(db, redis_client, start_date, end_date, local_cache=local_cache)
+        logging.info(
+            f"Warmed {warmed} puzzle(s) from {start_date.isoformat()} to {end_date.isoformat()}."
+        )
+        return warmed
+    return 0
+
+
+async def prewarm_before_midnight(minutes: float):
+    """
+    Runs forever, warming tomorrow's puzzle `minutes` before each local midnight so that the
+    rollover spike is served from Redis.  Meant to be run as a background task by the API.
+    """
+    while True:
+        delay = seconds_until_local_midnight() - minutes * 60
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+        try:
+            if not await asyncio.to_thread(warm_dates, tomorrow, tomorrow):
+                logging.warning(f"No puzzle found to pre-warm for {tomorrow.isoformat()}.")
+        except Exception:
+            logging.exception(f"Failed to pre-warm the puzzle for {tomorrow.isoformat()}.")
+
+        # Wait until after midnight, so that the same day isn't warmed twice.
+        await asyncio.sleep(seconds_until_local_midnight() + 1)
+
+
+@app.command()
+def main(
+    days: Annotated[int, typer.Option("--days", "-d", help="Warm puzzles for N days.")] = 7,
+    start: Annotated[
+        datetime.datetime | None,
+        typer.Option(formats=["%Y-%m-%d"], help="Start date (YYYY-MM-DD)."),
+    ] = None,
+    end: Annotated[
+        datetime.datetime | None,
+        typer.Option(formats=["%Y-%m-%d"], help="End date (YYYY-MM-DD)."),
+    ] = None,
+):
+    """
+    Main CLI function to determine date range and warm the cache.
+
+    \bBehavior:
+    - If no options are provided, it warms the 7 days ending tomorrow.
+    - If only --days is provided, it warms the N days ending tomorrow.
+    - If --start and --end are provided, it warms that inclusive range.
+    - If only --start is provided, it warms N days starting on that date.
+    - If only --end is provided, it warms N days ending on that date.
+    """
+    setup_logging()
+
+    if start and end:
+        start_date = start.date()
+        end_date = end.date()
+    elif start:
+        start_date = start.date()
+        end_date = start_date + datetime.timedelta(days=days - 1)
+    else:
+        end_date = end.date() if end else datetime.date.today() + datetime.timedelta(days=1)
+        start_date = end_date - datetime.timedelta(days=days - 1)
+
+    if start_date > end_date:
+        logging.error("Start date cannot be after end date.")
+        raise typer.Exit(code=1)
+
+    if get_redis_client() is None:
+        logging.error("REDIS_URL is not set; there is no cache to warm.")
+        raise typer.Exit(code=1)
+
+    warm_dates(start_date, end_date)
+
+
+if __name__ == "__main__":
+    app()
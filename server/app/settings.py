@@ -17,12 +17,59 @@ class Settings(BaseSettings):
     puzzle_generation_salt: str = "default-salt-for-dev"
     environment: Literal["dev", "prod"] = "dev"
     redis_url: str | None = None
+    # In-process cache tier in front of Redis (see app.cache.LocalCache); 0 entries disables it.
+    local_cache_max_entries: int = 256
+    local_cache_ttl_seconds: float = 3600.0
+    # On a cache miss, one process at a time takes a Redis lock (held for at most this long) and
+    # loads the value; the others wait up to cache_fill_wait_seconds for it (see app.crud).
+    cache_fill_lock_ms: int = 2000
+    cache_fill_wait_seconds: float = 2.0
+    # Pre-warm Redis from the API process (see app.scripts.warm_cache): the trailing N days at
+    # startup, and tomorrow's puzzle this many minutes before local midnight.  0 disables each.
+    cache_warm_days: int = 0
+    cache_prewarm_minutes: float = 0
+    # How long a process trusts its cached earliest/latest puzzle dates (see crud.PuzzleRange)
+    # without hearing that puzzles were added.
+    puzzle_range_ttl_seconds: float = 300.0
+    # Store newly generated puzzles in the compact binary encoding (see app.compact) rather than
+    # as JSON.  Existing rows can be converted with app.scripts.compact_puzzles.
+    compact_puzzle_storage: bool = False
+    # The longest range of dates /api/puzzles will return in one response.
+    puzzles_request_max_days: int = 366
+    # The same for /api/puzzles/stream, after its range is narrowed to the dates that have puzzles
+    # (see route_helpers.clamp_stream_range).  Ten years, so in practice the whole archive.
+    puzzles_stream_max_days: int = 3660
+    # The most submissions /api/puzzles/score will score in one request.
+    score_batch_max_submissions: int = 1000
+    # Where app.scripts.export_puzzles writes the static copies of past puzzles that Caddy serves.
+    puzzle_export_directory: Path = PROJECT_ROOT / "export"
+    # The compiled, memory-mapped word list index (see app.lexicon_index and
+    # app.scripts.compile_lexicon).
+    lexicon_index_path: Path = PROJECT_ROOT / "build" / "lexicon.idx"
+    # Serve the API from async endpoints backed by an async SQLAlchemy engine and redis.asyncio
+    # (see app.async_routes), instead of sync endpoints running in Starlette's threadpool.
+    async_mode: bool = False
+    # Opt-in sampling profiler (see app.profiling): profiles this fraction of requests, those
+    # whose profile_header is set to the secret profile_token (both are needed), and those whose
+    # paths start with one of the prefixes, sampling stacks every profile_interval_seconds, and
+    # writes them to profile_directory on SIGUSR1 and at shutdown.
+    profiling_enabled: bool = False
+    profile_sample_rate: float = 0.0
+    profile_header: str | None = None
+    profile_token: str | None = None
+    profile_paths: list[str] = []
+    profile_interval_seconds: float = 0.005
+    profile_directory: Path = PROJECT_ROOT / "build" / "profiles"
+    # If set, puzzle generation runs write their metrics here for node_exporter's textfile
+    # collector, since the scheduler's processes are never scraped (see app.metrics).
+    metrics_textfile_directory: Path | None = None
 
     model_config = SettingsConfigDict(
         env_file=PROJECT_ROOT / ".env",
         env_file_encoding="utf-8",
     )
 
+
 @cache
 def get_settings():
     return Settings()
@@ -0,0 +1,242 @@
+"""
+Finds the best possible score for a puzzle: the highest-scoring way to arrange its tiles into
+legal words of 3, 4, 5 and 6 letters (from `config/words-full.txt`).
+
+`generate_puzzle` only knows the solution it started from, and there is often a better one.  The
+search is small, since a puzzle has only 18 tiles:
+
+1. Every sub-multiset of the tiles with 3 to 6 letters is looked up by its signature (its letters,
+   sorted) in an anagram index of the word list, giving the candidate words for each rack.
+2. The racks are filled in decreasing order of multiplier, trying candidates in decreasing order
+   of score (or no word at all), and a branch is abandoned as soon as an upper bound on what it
+   could still score can't beat the best arrangement found so far.
+
+The bound that makes this fast: the remaining racks can't share tiles, so together they score at
+most every remaining tile at the smallest of their multipliers, plus, for each rack, the excess
+of its multiplier over that smallest one times the base score of its best fitting candidate.
+With the multipliers from `game_rules.yaml` this takes a typical puzzle from seconds to tens of
+milliseconds.
+
+Tiles left over can always be put in the remaining racks (which then just don't score), so any
+set of candidates whose letters fit in the tiles together is a valid arrangement.  The letters
+still available are kept as a vector of 6-bit counts packed into one integer, so checking whether
+a candidate fits, and taking its letters, are each a single subtraction.
+"""
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+
+from app.compact import RACK_LENGTHS
+from app.config import RULES_CHECK_INTERVAL, config_file_cache
+from app.wordlist import words_by_length
+
+# Each letter's count gets 6 bits: 5 for the count (up to 31 tiles of one letter) and a guard bit,
+# which a subtraction only clears if that letter's count would go negative.
+BITS_PER_COUNT = 6
+GUARD_BIT = 1 << (BITS_PER_COUNT - 1)
+
+
+def signature(word: str) -> str:
+    """Returns the letters of `word` in sorted order, which is the same for all its anagrams."""
+    return "".join(sorted(word))
+
+
+@dataclass(frozen=True)
+class AnagramIndex:
+    """
+    The legal words keyed by length and then by signature.  Anagrams all score the same, so only
+    the first of them (alphabetically) is kept.
+    """
+
+    words_by_signature: Mapping[int, Mapping[str, str]]
+    version: str
+
+    @classmethod
+    def from_words(cls, words: Mapping[int, Iterable[str]], version: str) -> "AnagramIndex":
+        words_by_signature: dict[int, dict[str, str]] = {}
+        for length, bucket in words.items():
+            by_signature = words_by_signature.setdefault(length, {})
+            for word in bucket:
+                by_signature.setdefault(signature(word), word)
+        return cls(words_by_signature=words_by_signature, version=version)
+
+    def lookup(self, letters: str) -> str | None:
+        """Returns a word made of exactly these (sorted) letters, if there is one."""
+        return self.words_by_signature.get(len(letters), {}).get(letters)
+
+
+@config_file_cache("words-full.txt", check_interval=RULES_CHECK_INTERVAL)
+def get_anagram_index(words_text: str, *, version: str) -> AnagramIndex:
+    """Returns the full word list as an AnagramIndex."""
+    # words_by_length() sorts each bucket, so the word kept for each signature is the first.
+    return AnagramIndex.from_words(words_by_length(words_text), version)
+
+
+@dataclass(frozen=True)
+class Solution:
+    """The best score for a puzzle, and the words making it, by rack (None for unused racks)."""
+
+    score: int
+    words: tuple[str | None, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class _Candidate:
+    base_score: int
+    counts: int
+    letters: str
+
+
+def _sub_multisets(letter_counts: list[tuple[str, int]], max_length: int) -> list[str]:
+    """Returns every sorted string of at most `max_length` letters that the tiles could spell."""
+    partial = [""]
+    for letter, count in letter_counts:
+        partial = [
+            prefix + letter * repeat
+            for prefix in partial
+            for repeat in range(min(count, max_length - len(prefix)) + 1)
+        ]
+    return partial
+
+
+def solve_puzzle(
+    tiles: Iterable[tuple[str, int]],
+    *,
+    multipliers: Mapping[int, int],
+    index: AnagramIndex,
+    rack_lengths: tuple[int, ...] = RACK_LENGTHS,
+) -> Solution:
+    """
+    Finds the maximum score for a puzzle with the given (letter, value) tiles.
+
+    Raises:
+        ValueError: If tiles with the same letter have different values (which no generated
+            puzzle does), since the search treats tiles with the same letter as interchangeable.
+    """
+    letter_values: dict[str, int] = {}
+    letter_totals: dict[str, int] = {}
+    for letter, value in tiles:
+        if letter_values.setdefault(letter, value) != value:
+            raise ValueError(f"Tiles with the letter {letter!r} have different values.")
+        letter_totals[letter] = letter_totals.get(letter, 0) + 1
+
+    letter_counts = sorted(letter_totals.items())
+    units = {
+        letter: 1 << (BITS_PER_COUNT * position)
+        for position, (letter, _) in enumerate(letter_counts)
+    }
+    guards = sum(unit * GUARD_BIT for unit in units.values())
+    available = sum(units[letter] * count for letter, count in letter_counts)
+
+    rack_multipliers = [multipliers.get(length, 1) for length in rack_lengths]
+    candidates_by_length: dict[int, list[_Candidate]] = {length: [] for length in rack_lengths}
+    for letters in _sub_multisets(letter_counts, max(rack_lengths)):
+        candidates = candidates_by_length.get(len(letters))
+        if candidates is None or index.lookup(letters) is None:
+            continue
+        candidates.append(
+            _Candidate(
+                base_score=sum(letter_values[letter] for letter in letters),
+                counts=sum(units[letter] for letter in letters),
+                letters=letters,
+            )
+        )
+
+    # Racks with the highest multipliers first, so that the racks left at each step have the
+    # smallest multipliers (which is what makes the bound below tight).
+    order = sorted(
+        range(len(rack_lengths)), key=lambda rack: (-rack_multipliers[rack], -rack_lengths[rack])
+    )
+    order_multipliers = [rack_multipliers[rack] for rack in order]
+    ordered_candidates = [
+        sorted(candidates_by_length[rack_lengths[rack]], key=lambda c: -c.base_score)
+        for rack in order
+    ]
+    best_score = 0
+    best_choice: list[_Candidate | None] = [None] * len(order)
+    chosen: list[_Candidate | None] = [None] * len(order)
+
+    def fits(counts: int, available: int) -> bool:
+        return ((available | guards) - counts) & guards == guards
+
+    # The last rack has the smallest multiplier.  When exactly its length of tiles is left, the
+    # only word it could hold is the one with exactly those letters, found by a dict lookup.
+    last = len(order) - 1
+    last_length = rack_lengths[order[last]]
+    last_by_counts = {candidate.counts: candidate for candidate in ordered_candidates[last]}
+    last_best = ordered_candidates[last][0].base_score if ordered_candidates[last] else 0
+
+    def finish(available: int, size: int, score: int):
+        if size == last_length:
+            candidate = last_by_counts.get(available)
+        else:
+            candidate = next(
+                (c for c in ordered_candidates[last] if fits(c.counts, available)), None
+            )
+        if candidate is not None:
+            score += order_multipliers[last] * candidate.base_score
+        if score > best_score:
+            record(score, candidate)
+
+    def record(score: int, last_candidate: _Candidate | None):
+        nonlocal best_score, best_choice
+        best_score = score
+        best_choice = [*chosen[:last], last_candidate]
+
+    def search(position: int, available: int, value: int, size: int, score: int, remaining: list):
+        # remaining[i] holds candidates for rack order[position + i], in decreasing order of base
+        # score, including every one that fits in `available` (`size` tiles worth `value`).  The
+        # last rack's candidates aren't in it; see finish().
+        if position == last:
+            finish(available, size, score)
+            return
+
+        # Bound what the later racks could add.  Each scores at most its best fitting candidate
+        # times its multiplier; and since they can't share tiles, together they score at most
+        # every tile left at the smallest of their multipliers (the last rack's), plus the excess
+        # of each one's multiplier over that times its best fitting candidate.
+        later = remaining[1:]
+        smallest = order_multipliers[last]
+        separately = smallest * last_best
+        excess = 0
+        for later_multiplier, candidates in zip(order_multipliers[position + 1 :], later):
+            for candidate in candidates:
+                if fits(candidate.counts, available):
+                    separately += later_multiplier * candidate.base_score
+                    excess += (later_multiplier - smallest) * candidate.base_score
+                    break
+
+        multiplier = order_multipliers[position]
+        length = rack_lengths[order[position]]
+        for candidate in remaining[0]:
+            # The multiplier here is at least `smallest`, so this bound only shrinks along with
+            # the candidates' base scores, and the loop can stop at the first that can't win.
+            left_value = value - candidate.base_score
+            candidate_score = multiplier * candidate.base_score
+            bound = score + candidate_score + min(separately, excess + smallest * left_value)
+            if bound <= best_score:
+                break
+            left = ((available | guards) - candidate.counts) & ~guards
+            chosen[position] = candidate
+            # (fits(), inlined, since this is where nearly all of the time goes.)
+            padded = left | guards
+            narrowed = [
+                [c for c in candidates if (padded - c.counts) & guards == guards]
+                for candidates in later
+            ]
+            search(position + 1, left, left_value, size - length, score + candidate_score, narrowed)
+        chosen[position] = None
+
+        # Or leave this rack without a word.
+        if score + min(separately, excess + smallest * value) > best_score:
+            search(position + 1, available, value, size, score, later)
+
+    total_value = sum(letter_values[letter] * count for letter, count in letter_counts)
+    total_size = sum(count for _, count in letter_counts)
+    search(0, available, total_value, total_size, 0, ordered_candidates[:last])
+
+    words: list[str | None] = [None] * len(rack_lengths)
+    for position, candidate in zip(order, best_choice):
+        if candidate is not None:
+            words[position] = index.lookup(candidate.letters)
+    return Solution(score=best_score, words=tuple(words))
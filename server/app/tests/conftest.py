@@ -1,11 +1,21 @@
-import pytest
+import datetime
+
 import fakeredis
+import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, SQLModel, create_engine
 from sqlmodel.pool import StaticPool
 
+from app.cache import get_local_cache, redis_stats
+from app.config import get_game_rules_file
+from app.crud import puzzle_range_snapshot
 from app.database import custom_serializer, get_session
 from app.main import app
+from app.models import Puzzle, Tile
+from app.puzzle_generator import generate_puzzle
+from app.scripts.generate_puzzles import insert_puzzles
+from app.settings import get_settings
+from app.wordlist import get_wordlist
 
 
 @pytest.fixture(name="session")
@@ -27,6 +37,59 @@ def session_fixture():
     SQLModel.metadata.drop_all(engine)
 
 
+@pytest.fixture(name="add_puzzles")
+def add_puzzles_fixture(session: Session):
+    """
+    Pytest fixture that provides a function to store a puzzle for each of the given dates in the
+    `session` database, and commit.  The puzzles are generated from their dates, or, given
+    `letter`, are a single tile with that letter.  With `overwrite`, existing puzzles for the
+    dates are replaced.
+    """
+
+    def add_puzzles(*dates: datetime.date, letter: str | None = None, overwrite: bool = False):
+        def puzzle_for(date: datetime.date) -> Puzzle:
+            if letter is None:
+                return generate_puzzle(date.isoformat())
+            racks = [[Tile(id="tile-1", letter=letter, value=1)]]
+            return Puzzle(initial_racks=racks, target_solution=racks)
+
+        puzzles = [(date, puzzle_for(date)) for date in dates]
+        insert_puzzles(session, puzzles, overwrite=overwrite)
+        session.commit()
+        session.expunge_all()
+
+    return add_puzzles
+
+
+@pytest.fixture(autouse=True, scope="session")
+def lexicon_index_path(tmp_path_factory):
+    """Compile the word list index (see app.lexicon_index) into a temporary directory."""
+    settings = get_settings()
+    original = settings.lexicon_index_path
+    settings.lexicon_index_path = tmp_path_factory.mktemp("build") / "lexicon.idx"
+    yield settings.lexicon_index_path
+    settings.lexicon_index_path = original
+
+
+@pytest.fixture(autouse=True)
+def reset_process_caches():
+    """
+    The in-process puzzle cache, config snapshots and cache counters live for the life of the
+    process, so reset them around each test to keep tests independent.
+    """
+    get_local_cache.cache_clear()
+    get_game_rules_file.cache_clear()
+    get_wordlist.cache_clear()
+    puzzle_range_snapshot.invalidate()
+    redis_stats.reset()
+    yield
+    get_local_cache.cache_clear()
+    get_game_rules_file.cache_clear()
+    get_wordlist.cache_clear()
+    puzzle_range_snapshot.invalidate()
+    redis_stats.reset()
+
+
 @pytest.fixture(name="client")
 def client_fixture(session: Session):
     """
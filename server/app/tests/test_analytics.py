@@ -0,0 +1,150 @@
+import random
+from collections import Counter
+
+from app.analytics import LetterCountMatrix, analyze_tiles, get_letter_count_matrix
+from app.lexicon_index import LexiconIndex
+from app.puzzle_generator import generate_puzzle
+from app.settings import get_settings
+from app.wordlist import words_by_length
+
+
+def brute_force_full_solutions(letters: str, words: dict[int, list[str]]) -> int:
+    """Counts the ways to spell one word per rack using every tile, one rack at a time."""
+    fitting = {
+        length: [
+            Counter(word) for word in words.get(length, []) if Counter(word) <= Counter(letters)
+        ]
+        for length in (3, 4, 5, 6)
+    }
+
+    def count_from(lengths: tuple[int, ...], available: Counter) -> int:
+        if not lengths:
+            return int(not +available)
+        return sum(
+            count_from(lengths[1:], available - counts)
+            for counts in fitting[lengths[0]]
+            if counts <= available
+        )
+
+    return count_from((6, 5, 4, 3), Counter(letters))
+
+
+def test_letter_count_matrix_groups_anagrams():
+    """
+    GIVEN words including anagrams of each other
+    WHEN a LetterCountMatrix is built
+    THEN there should be one row per set of anagrams, counting its words.
+    """
+    matrix = LetterCountMatrix.from_words({3: ["ACT", "CAT", "DOG"], 4: ["BIRD"]}, "v1")
+
+    assert matrix.counts.shape == (3, 26)
+    assert sorted(matrix.words.tolist()) == [1, 1, 2]
+    assert sorted(matrix.lengths.tolist()) == [3, 3, 4]
+
+
+def test_letter_count_matrix_from_index_matches_from_words():
+    """
+    GIVEN a compiled index, where one word is only in the common list
+    WHEN a LetterCountMatrix views it
+    THEN it should have the same rows as one built from the full list, with the common-only
+        word not counted.
+    """
+    full = {3: ["ACT", "CAT", "DOG"], 4: ["BIRD"]}
+    index = LexiconIndex.from_words(full, {3: ["COW"]}, "ab" * 32)
+
+    matrix = LetterCountMatrix.from_index(index)
+    expected = LetterCountMatrix.from_words(full, "v1")
+
+    def rows(m: LetterCountMatrix) -> list:
+        return sorted(
+            (tuple(counts), int(length), int(words))
+            for counts, length, words in zip(m.counts.tolist(), m.lengths, m.words)
+            if words
+        )
+
+    assert rows(matrix) == rows(expected)
+    assert int(matrix.words.sum()) == 4
+    assert matrix.version == "ab" * 32
+
+
+def test_analyze_tiles_counts_words_and_full_solutions():
+    """
+    GIVEN tiles that spell one word of each length, where two lengths have an anagram too, and
+        another word that fits but needs a letter from one of the others
+    WHEN the tiles are analyzed
+    THEN every fitting word should be counted, but only the combinations that use every tile.
+    """
+    words = {
+        3: ["ACT", "CAT", "COW"],
+        4: ["BIRD"],
+        5: ["HORSE", "SHORE"],
+        6: ["DONKEY", "MONKEY"],
+    }
+    matrix = LetterCountMatrix.from_words(words, "v1")
+
+    analysis = analyze_tiles("CATBIRDHORSEMONKEY", matrix)
+
+    # DONKEY takes BIRD's D, so it's never in a full solution.
+    assert analysis.words_by_length == {3: 2, 4: 1, 5: 2, 6: 2}
+    assert analysis.full_solutions == 2 * 1 * 2 * 1
+
+
+def test_analyze_tiles_without_full_solutions():
+    """
+    GIVEN tiles whose words can't all be spelled at once, or too few tiles to fill the racks
+    WHEN they are analyzed
+    THEN the words should be counted, but there should be no full solutions.
+    """
+    matrix = LetterCountMatrix.from_words(
+        {3: ["CAT"], 4: ["CART"], 5: ["HORSE"], 6: ["MONKEY"]}, "v1"
+    )
+
+    assert analyze_tiles("CATRHORSEMONKEYXYZ", matrix).full_solutions == 0
+    short = analyze_tiles("CAT", matrix)
+    assert short.words_by_length == {3: 1, 4: 0, 5: 0, 6: 0}
+    assert short.full_solutions == 0
+
+
+def test_analyze_tiles_matches_brute_force():
+    """
+    GIVEN generated puzzles and a sample of the full word list
+    WHEN their tiles are analyzed
+    THEN the counts should match checking every word and combination of words.
+    """
+    text = (get_settings().config_directory / "words-full.txt").read_text()
+    rng = random.Random(1)
+    sample = {
+        length: sorted(rng.sample(bucket, min(len(bucket), 300)))
+        for length, bucket in words_by_length(text).items()
+    }
+    for seed in ("2025-08-01", "2025-08-02"):
+        puzzle = generate_puzzle(seed)
+        for rack in puzzle.target_solution:
+            sample[len(rack)].append("".join(tile.letter for tile in rack))
+    matrix = LetterCountMatrix.from_words(sample, "sample")
+
+    for seed in ("2025-08-01", "2025-08-02"):
+        letters = "".join(
+            tile.letter for rack in generate_puzzle(seed).initial_racks for tile in rack
+        )
+        analysis = analyze_tiles(letters, matrix)
+
+        assert analysis.words_by_length == {
+            length: sum(Counter(word) <= Counter(letters) for word in sample[length])
+            for length in (3, 4, 5, 6)
+        }
+        assert analysis.full_solutions == brute_force_full_solutions(letters, sample)
+        assert analysis.full_solutions >= 1
+
+
+def test_get_letter_count_matrix_loads_full_word_list():
+    """
+    GIVEN the real words-full.txt
+    WHEN the matrix is loaded
+    THEN it should account for every word in it.
+    """
+    text = (get_settings().config_directory / "words-full.txt").read_text()
+
+    matrix = get_letter_count_matrix()
+
+    assert int(matrix.words.sum()) == sum(len(words) for words in words_by_length(text).values())
@@ -0,0 +1,93 @@
+import datetime
+from unittest.mock import patch
+
+from sqlmodel import Session, select
+from typer.testing import CliRunner
+
+from app.analytics import LetterCountMatrix, analyze_tiles, get_letter_count_matrix
+from app.models import PuzzleStats
+from app.puzzle_generator import generate_puzzle
+from app.scripts.analyze_puzzles import analyze_puzzles, app
+from app.scripts.generate_puzzles import insert_puzzles
+
+runner = CliRunner()
+
+
+def stored_stats(session: Session) -> dict[datetime.date, PuzzleStats]:
+    return {stats.date: stats for stats in session.exec(select(PuzzleStats)).all()}
+
+
+#######################
+# analyze_puzzles tests
+#######################
+
+
+def test_analyze_puzzles_stores_stats(session: Session, add_puzzles):
+    """
+    GIVEN generated puzzles
+    WHEN analyze_puzzles is run
+    THEN each should get a row of statistics matching analyze_tiles.
+    """
+    dates = [datetime.date(2025, 8, day) for day in range(1, 4)]
+    add_puzzles(*dates)
+
+    assert analyze_puzzles(session, batch_size=2) == 3
+
+    stats = stored_stats(session)
+    assert sorted(stats) == dates
+    letters = "".join(
+        tile.letter for rack in generate_puzzle(dates[0].isoformat()).initial_racks for tile in rack
+    )
+    expected = analyze_tiles(letters, get_letter_count_matrix())
+    assert stats[dates[0]].letters == "".join(sorted(letters))
+    assert stats[dates[0]].words_version == get_letter_count_matrix().version
+    assert stats[dates[0]].words_5 == expected.words_by_length[5]
+    assert stats[dates[0]].full_solutions == expected.full_solutions
+
+
+def test_analyze_puzzles_only_redoes_stale_rows(session: Session, add_puzzles):
+    """
+    GIVEN puzzles that have already been analyzed
+    WHEN analyze_puzzles is run again
+    THEN nothing should be redone, unless forced, a puzzle was overwritten, or the words changed.
+    """
+    dates = [datetime.date(2025, 8, 1), datetime.date(2025, 8, 2)]
+    add_puzzles(*dates)
+    analyze_puzzles(session)
+
+    assert analyze_puzzles(session) == 0
+    assert analyze_puzzles(session, force=True) == 2
+
+    # Overwrite the second puzzle with a different one.
+    insert_puzzles(session, [(dates[1], generate_puzzle("2025-09-01"))], overwrite=True)
+    session.commit()
+    assert analyze_puzzles(session) == 1
+
+    matrix = get_letter_count_matrix()
+    new_words = LetterCountMatrix.from_words({3: ["CAT"]}, "new-version")
+    with patch("app.scripts.analyze_puzzles.get_letter_count_matrix", return_value=new_words):
+        assert analyze_puzzles(session) == 2
+    assert {stats.words_version for stats in stored_stats(session).values()} == {"new-version"}
+    assert matrix.version != "new-version"
+
+
+###########
+# CLI tests
+###########
+
+
+@patch("app.scripts.analyze_puzzles.create_db_and_tables")
+@patch("app.scripts.analyze_puzzles.get_session")
+def test_cli_analyzes_puzzles(mock_get_session, mock_create_db, session: Session, add_puzzles):
+    """
+    GIVEN a generated puzzle
+    WHEN the CLI is run
+    THEN it should get statistics.
+    """
+    mock_get_session.return_value = iter([session])
+    add_puzzles(datetime.date(2025, 8, 1))
+
+    result = runner.invoke(app, [])
+
+    assert result.exit_code == 0
+    assert list(stored_stats(session)) == [datetime.date(2025, 8, 1)]
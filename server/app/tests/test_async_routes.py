@@ -0,0 +1,383 @@
+"""Tests for the async-mode endpoints found in async_routes.py"""
+
+import asyncio
+import datetime
+import json
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import async_crud, async_routes
+from app.cache import LocalCache, acquire_fill_lock_steps, async_redis_dependency
+from app.crud import redis_key_for_date
+from app.database import async_database_url, custom_serializer, get_async_session
+from app.io_steps import run_async
+from app.models import PuzzleWithDate, Tile
+from app.puzzle_generator import generate_puzzle
+
+
+@pytest.fixture(name="db_url")
+def db_url_fixture(tmp_path):
+    """
+    A file-backed SQLite database, so that the sync session used to set up test data and the
+    async engine used by the app see the same tables.
+    """
+    url = f"sqlite:///{tmp_path / 'test.sqlite3'}"
+    engine = create_engine(url, json_serializer=custom_serializer)
+    SQLModel.metadata.create_all(engine)
+    engine.dispose()
+    return url
+
+
+@pytest.fixture(name="sync_session")
+def sync_session_fixture(db_url: str):
+    engine = create_engine(db_url, json_serializer=custom_serializer)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture(name="fake_async_redis")
+def fake_async_redis_fixture():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.fixture(name="async_client")
+def async_client_fixture(db_url: str):
+    """A test client for an app that serves only the async-mode endpoints."""
+    # NullPool, since aiosqlite connections are tied to the event loop that opened them.
+    async_engine = create_async_engine(
+        async_database_url(db_url), poolclass=NullPool, json_serializer=custom_serializer
+    )
+
+    async def get_async_session_override():
+        async with AsyncSession(async_engine) as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(async_routes.router)
+    app.dependency_overrides[get_async_session] = get_async_session_override
+    app.dependency_overrides[async_redis_dependency] = lambda: None
+
+    with TestClient(app) as client:
+        yield client
+
+
+def add_puzzle(session: Session, date: datetime.date) -> str:
+    """Saves a one-tile puzzle and returns its expected JSON."""
+    racks = [[Tile(id="tile-1", letter="A", value=1)]]
+    puzzle = PuzzleWithDate(date=date, initial_racks=racks, target_solution=racks)
+    puzzle_json = puzzle.model_dump_json()
+    session.add(puzzle)
+    session.commit()
+    session.expunge_all()
+    return puzzle_json
+
+
+##################
+# async route tests
+##################
+
+
+def test_async_get_puzzle_success(sync_session: Session, async_client: TestClient):
+    """
+    GIVEN a puzzle for a specific date exists in the database
+    WHEN a GET request is made to the async /api/puzzle/{date}
+    THEN it should return the same payload the sync endpoint would, with caching headers.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    puzzle_json = add_puzzle(sync_session, test_date)
+
+    response = async_client.get(f"/api/puzzle/{test_date.isoformat()}")
+
+    assert response.status_code == 200
+    assert response.json() == json.loads(puzzle_json)
+    assert "immutable" in response.headers["cache-control"]
+
+    repeat = async_client.get(
+        f"/api/puzzle/{test_date.isoformat()}", headers={"If-None-Match": response.headers["etag"]}
+    )
+    assert repeat.status_code == 304
+
+
+def test_async_get_todays_puzzle_not_found(async_client: TestClient):
+    """
+    GIVEN no puzzle exists for today
+    WHEN a GET request is made to the async /api/puzzle/today
+    THEN it should return a 404.
+    """
+    response = async_client.get("/api/puzzle/today")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Puzzle not found for today's date."}
+
+
+def test_async_get_future_puzzle_forbidden(async_client: TestClient):
+    """
+    GIVEN a date in the future
+    WHEN a GET request is made to the async /api/puzzle/{date}
+    THEN it should return a 403.
+    """
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+
+    response = async_client.get(f"/api/puzzle/{tomorrow.isoformat()}")
+
+    assert response.status_code == 403
+
+
+def test_async_get_puzzle_uses_redis(
+    sync_session: Session, async_client: TestClient, fake_async_redis
+):
+    """
+    GIVEN an async Redis client
+    WHEN a puzzle is requested from the async endpoint
+    THEN it should be written to Redis on a miss, and served from Redis afterwards.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    add_puzzle(sync_session, test_date)
+    async_client.app.dependency_overrides[async_redis_dependency] = lambda: fake_async_redis
+
+    first = async_client.get(f"/api/puzzle/{test_date.isoformat()}")
+    assert first.status_code == 200
+    cached = async_client.portal.call(fake_async_redis.get, redis_key_for_date(test_date))
+    assert cached == first.text
+
+    sync_session.delete(sync_session.get(PuzzleWithDate, test_date))
+    sync_session.commit()
+    second = async_client.get(f"/api/puzzle/{test_date.isoformat()}")
+    assert second.status_code == 200
+    assert second.content == first.content
+
+
+def test_async_get_puzzles_and_stream(sync_session: Session, async_client: TestClient):
+    """
+    GIVEN puzzles for some dates in a past range
+    WHEN the async /api/puzzles and /api/puzzles/stream are requested for that range
+    THEN both should return the existing puzzles in date order.
+    """
+    expected = [
+        json.loads(add_puzzle(sync_session, date))
+        for date in (datetime.date(2025, 8, 1), datetime.date(2025, 8, 3))
+    ]
+    params = {"start": "2025-08-01", "end": "2025-08-04"}
+
+    response = async_client.get("/api/puzzles", params=params)
+    assert response.status_code == 200
+    assert response.json() == expected
+
+    streamed = async_client.get("/api/puzzles/stream", params=params)
+    assert streamed.status_code == 200
+    assert [json.loads(line) for line in streamed.text.splitlines()] == expected
+
+
+def test_async_stream_clamps_range_to_existing_puzzles(
+    sync_session: Session, async_client: TestClient
+):
+    """
+    GIVEN puzzles for a few days
+    WHEN the async stream is requested from the year 1
+    THEN only the days that have puzzles should be looked up, in a single batch.
+    """
+    expected = [
+        json.loads(add_puzzle(sync_session, date))
+        for date in (datetime.date(2025, 8, 1), datetime.date(2025, 8, 3))
+    ]
+
+    with patch(
+        "app.async_crud.get_puzzle_jsons_for_dates", wraps=async_crud.get_puzzle_jsons_for_dates
+    ) as spy:
+        streamed = async_client.get(
+            "/api/puzzles/stream", params={"start": "0001-01-01", "end": "2025-08-05"}
+        )
+
+    assert [json.loads(line) for line in streamed.text.splitlines()] == expected
+    spy.assert_called_once()
+    assert spy.call_args.args[1] == [datetime.date(2025, 8, day) for day in (1, 2, 3)]
+
+
+def test_async_score_puzzle(sync_session: Session, async_client: TestClient):
+    """
+    GIVEN a generated puzzle
+    WHEN its target solution is submitted to the async score endpoints
+    THEN it should score the same as the target, singly and in a batch.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    puzzle = generate_puzzle(test_date.isoformat())
+    sync_session.add(
+        PuzzleWithDate(
+            date=test_date,
+            initial_racks=puzzle.initial_racks,
+            target_solution=puzzle.target_solution,
+        )
+    )
+    sync_session.commit()
+    racks = [[tile.id for tile in rack] for rack in puzzle.target_solution]
+
+    response = async_client.post(
+        f"/api/puzzle/{test_date.isoformat()}/score", json={"racks": racks}
+    )
+    assert response.status_code == 200
+    assert response.json()["totalScore"] == response.json()["targetScore"]
+
+    batch = async_client.post(
+        "/api/puzzles/score",
+        json={"submissions": [{"date": test_date.isoformat(), "racks": racks}]},
+    )
+    assert batch.status_code == 200
+    assert batch.json()["results"][0]["result"] == response.json()
+
+
+def test_async_get_config(sync_session: Session, async_client: TestClient):
+    """
+    GIVEN puzzles exist in the database
+    WHEN a GET request is made to the async /api/config
+    THEN it should return the game rules with the earliest puzzle date.
+    """
+    add_puzzle(sync_session, datetime.date(2025, 8, 2))
+    add_puzzle(sync_session, datetime.date(2025, 8, 1))
+
+    response = async_client.get("/api/config")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["earliestDate"] == "2025-08-01"
+    assert data["currentDate"] == datetime.date.today().isoformat()
+
+
+def test_async_concurrent_misses_share_one_database_read(
+    db_url: str, sync_session: Session, fake_async_redis
+):
+    """
+    GIVEN a puzzle that isn't cached anywhere
+    WHEN many coroutines ask for it at once
+    THEN the database should only be read once, and every caller should get the puzzle.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    add_puzzle(sync_session, test_date)
+    reads = []
+
+    async def main():
+        engine = create_async_engine(
+            async_database_url(db_url), poolclass=NullPool, json_serializer=custom_serializer
+        )
+        original_exec = AsyncSession.exec
+
+        async def counting_exec(self, *args, **kwargs):
+            reads.append(1)
+            return await original_exec(self, *args, **kwargs)
+
+        async with AsyncSession(engine) as session:
+            with patch.object(AsyncSession, "exec", counting_exec):
+                results = await asyncio.gather(
+                    *(
+                        async_crud.get_puzzle_json_by_date(
+                            session, test_date, redis_client=fake_async_redis
+                        )
+                        for _ in range(20)
+                    )
+                )
+        await engine.dispose()
+        return results
+
+    results = asyncio.run(main())
+
+    assert len(reads) == 1
+    assert len(set(results)) == 1 and results[0] is not None
+
+
+def test_async_shared_load_survives_the_leader_being_cancelled(db_url: str, sync_session: Session):
+    """
+    GIVEN two concurrent misses for a puzzle, sharing the load started by the first
+    WHEN the first is cancelled and its request's session closed, as FastAPI would
+    THEN the second should still get the puzzle, without the load using the closed session.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    expected = add_puzzle(sync_session, test_date)
+
+    async def main():
+        engine = create_async_engine(
+            async_database_url(db_url), poolclass=NullPool, json_serializer=custom_serializer
+        )
+        async with AsyncSession(engine) as leader_db, AsyncSession(engine) as follower_db:
+            leader = asyncio.create_task(async_crud.get_puzzle_json_by_date(leader_db, test_date))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(
+                async_crud.get_puzzle_json_by_date(follower_db, test_date)
+            )
+            await asyncio.sleep(0)
+            leader.cancel()
+            await leader_db.close()
+            with patch.object(leader_db, "exec", side_effect=AssertionError("session closed")):
+                result = await follower
+        await engine.dispose()
+        return leader.cancelled(), result
+
+    cancelled, result = asyncio.run(main())
+
+    assert cancelled
+    assert json.loads(result) == json.loads(expected)
+
+
+def test_async_routes_never_use_the_threadpool(
+    sync_session: Session, async_client: TestClient, fake_async_redis
+):
+    """
+    GIVEN the async endpoints, with every dependency a coroutine
+    WHEN each kind of request is made
+    THEN none of them should run anything in Starlette's threadpool.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    add_puzzle(sync_session, test_date)
+
+    async def redis_override():
+        return fake_async_redis
+
+    async_client.app.dependency_overrides[async_redis_dependency] = redis_override
+    params = {"start": "2025-08-01", "end": "2025-08-02"}
+
+    with patch("anyio.to_thread.run_sync", side_effect=AssertionError("used the threadpool")):
+        responses = [
+            async_client.get(f"/api/puzzle/{test_date.isoformat()}"),
+            async_client.get("/api/puzzles", params=params),
+            async_client.get("/api/puzzles/stream", params=params),
+            async_client.post(f"/api/puzzle/{test_date.isoformat()}/score", json={"racks": []}),
+            async_client.get("/api/config"),
+        ]
+
+    assert [response.status_code for response in responses] == [200, 200, 200, 422, 200]
+
+
+def test_async_miss_serves_stale_copy_while_another_process_fills(
+    sync_session: Session, db_url: str, fake_async_redis
+):
+    """
+    GIVEN a puzzle whose fill lock is held by another process, and a stale local copy of it
+    WHEN it is looked up through the async path
+    THEN the stale copy should be served without reading the database.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    key = redis_key_for_date(test_date)
+    local_cache = LocalCache(max_entries=10, ttl_seconds=0)
+    local_cache.set(key, "stale")
+
+    async def main():
+        assert await run_async(acquire_fill_lock_steps(fake_async_redis, key)) is not None
+        engine = create_async_engine(async_database_url(db_url), poolclass=NullPool)
+        async with AsyncSession(engine) as session:
+            with patch.object(
+                AsyncSession, "exec", side_effect=AssertionError("read the database")
+            ):
+                result = await async_crud.get_puzzle_json_by_date(
+                    session, test_date, redis_client=fake_async_redis, local_cache=local_cache
+                )
+        await engine.dispose()
+        return result
+
+    assert asyncio.run(main()) == "stale"
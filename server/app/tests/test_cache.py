@@ -1,9 +1,25 @@
+import asyncio
+import threading
+import time
 from unittest import mock
 
 import pytest
 import redis
 
-from app.cache import get_redis_client
+from app.cache import (
+    INVALIDATION_CHANNEL,
+    AsyncSingleFlight,
+    LocalCache,
+    SingleFlight,
+    acquire_fill_lock,
+    fill_lock_key,
+    get_local_cache,
+    get_redis_client,
+    invalidate_cached_keys,
+    release_fill_lock,
+    start_invalidation_listener,
+    wait_for_fill,
+)
 from app.settings import Settings
 
 
@@ -34,3 +50,315 @@ def test_get_redis_client_without_redis_url():
     with mock.patch("app.cache.get_settings", return_value=Settings(redis_url=None)):
         client = get_redis_client()
         assert client is None
+
+
+#################
+# LocalCache tests
+#################
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_local_cache_evicts_least_recently_used():
+    """
+    GIVEN a full LocalCache
+    WHEN a new key is added
+    THEN the least recently used key should be evicted.
+    """
+    local_cache = LocalCache(max_entries=2, ttl_seconds=60)
+    local_cache.set("a", "1")
+    local_cache.set("b", "2")
+    local_cache.get("a")  # "b" is now the least recently used
+    local_cache.set("c", "3")
+
+    assert local_cache.get("a") == "1"
+    assert local_cache.get("b") is None
+    assert local_cache.get("c") == "3"
+
+
+def test_local_cache_entries_expire():
+    """
+    GIVEN a LocalCache entry
+    WHEN its TTL has passed
+    THEN it should no longer be returned.
+    """
+    clock = FakeClock()
+    local_cache = LocalCache(max_entries=10, ttl_seconds=60, clock=clock)
+    local_cache.set("a", "1")
+
+    clock.now = 59
+    assert local_cache.get("a") == "1"
+    clock.now = 60
+    assert local_cache.get("a") is None
+
+
+def test_local_cache_get_stale_returns_expired_entries():
+    """
+    GIVEN an expired LocalCache entry and an invalidated one
+    WHEN get_stale is called
+    THEN the expired value should still be returned, but not the invalidated one.
+    """
+    clock = FakeClock()
+    local_cache = LocalCache(max_entries=10, ttl_seconds=60, clock=clock)
+    local_cache.set("a", "1")
+    local_cache.set("b", "2")
+    clock.now = 120
+    local_cache.invalidate("b")
+
+    assert local_cache.get("a") is None
+    assert local_cache.get_stale("a") == "1"
+    assert local_cache.get_stale("b") is None
+
+
+def test_local_cache_pinned_entry_survives_eviction_and_expiry():
+    """
+    GIVEN a pinned LocalCache entry
+    WHEN the cache fills up and the TTL passes
+    THEN the pinned entry should still be returned, until another key is pinned.
+    """
+    clock = FakeClock()
+    local_cache = LocalCache(max_entries=1, ttl_seconds=60, clock=clock)
+    local_cache.set("today", "T", pin=True)
+    local_cache.set("a", "1")
+    local_cache.set("b", "2")
+    clock.now = 1000
+
+    assert local_cache.get("today") == "T"
+
+    local_cache.set("tomorrow", "N", pin=True)
+    assert local_cache.get("tomorrow") == "N"
+    assert local_cache.get("today") == "T"  # Demoted to a regular entry with a fresh TTL
+    clock.now = 2000
+    assert local_cache.get("today") is None
+
+
+def test_local_cache_counts_hits_and_misses():
+    """
+    WHEN values are looked up in a LocalCache
+    THEN hits and misses should be counted.
+    """
+    local_cache = LocalCache(max_entries=10, ttl_seconds=60)
+    local_cache.set("a", "1")
+    local_cache.get("a")
+    local_cache.get("a")
+    local_cache.get("b")
+
+    assert local_cache.stats_dict() == {
+        "hits": 2,
+        "misses": 1,
+        "hitRate": 2 / 3,
+        "size": 1,
+        "maxEntries": 10,
+    }
+
+
+def test_get_local_cache_can_be_disabled():
+    """
+    WHEN local_cache_max_entries is 0
+    THEN get_local_cache should return None.
+    """
+    get_local_cache.cache_clear()
+    with mock.patch("app.cache.get_settings", return_value=Settings(local_cache_max_entries=0)):
+        assert get_local_cache() is None
+    get_local_cache.cache_clear()
+
+
+###############################
+# Cross-worker invalidation tests
+###############################
+
+
+def test_invalidate_cached_keys_deletes_and_publishes(fake_redis):
+    """
+    GIVEN a key cached in Redis and in the local cache
+    WHEN invalidate_cached_keys is called
+    THEN the key should be removed from both and announced on the invalidation channel.
+    """
+    local_cache = get_local_cache()
+    local_cache.set("puzzle:2025-01-01", "old")
+    fake_redis.set("puzzle:2025-01-01", "old")
+    pubsub = fake_redis.pubsub()
+    pubsub.subscribe(INVALIDATION_CHANNEL)
+    assert pubsub.get_message(timeout=1)["type"] == "subscribe"
+
+    invalidate_cached_keys(fake_redis, ["puzzle:2025-01-01"])
+
+    assert fake_redis.get("puzzle:2025-01-01") is None
+    assert local_cache.get("puzzle:2025-01-01") is None
+    message = pubsub.get_message(timeout=1)
+    assert message is not None
+    assert message["data"] == "puzzle:2025-01-01"
+
+
+def test_invalidation_listener_evicts_local_entries(fake_redis):
+    """
+    GIVEN a worker listening for invalidations
+    WHEN another process publishes an invalidation for a key
+    THEN the key should be evicted from the worker's local cache.
+    """
+    local_cache = LocalCache(max_entries=10, ttl_seconds=60)
+    local_cache.set("puzzle:2025-01-01", "old")
+    local_cache.set("puzzle:2025-01-02", "old")
+    listener = start_invalidation_listener(fake_redis, local_cache)
+    try:
+        fake_redis.publish(INVALIDATION_CHANNEL, "puzzle:2025-01-01")
+        for _ in range(50):
+            if local_cache.get("puzzle:2025-01-01") is None:
+                break
+            time.sleep(0.05)
+    finally:
+        listener.stop()
+
+    assert local_cache.get("puzzle:2025-01-01") is None
+    assert local_cache.get("puzzle:2025-01-02") == "old"
+
+
+def test_invalidation_listener_runs_callbacks_without_local_cache(fake_redis):
+    """
+    GIVEN a worker with no local cache listening for invalidations, and a registered callback
+    WHEN another process publishes an invalidation
+    THEN the callback should be called with the key.
+    """
+    seen = []
+    with mock.patch("app.cache._invalidation_callbacks", [seen.append]):
+        listener = start_invalidation_listener(fake_redis, None)
+        try:
+            fake_redis.publish(INVALIDATION_CHANNEL, "meta:puzzle-range")
+            for _ in range(50):
+                if seen:
+                    break
+                time.sleep(0.05)
+        finally:
+            listener.stop()
+
+    assert seen == ["meta:puzzle-range"]
+
+
+#########################
+# Stampede protection tests
+#########################
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    """
+    GIVEN several threads asking SingleFlight for the same key at once
+    WHEN the first caller's function is still running
+    THEN the others should wait for and share its result instead of calling it again.
+    """
+    single_flight: SingleFlight[int] = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def load() -> int:
+        calls.append(1)
+        release.wait(timeout=5)
+        return 42
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(single_flight.do("key", load)))
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [42] * 10
+    # Once the call finishes, the next caller starts a new one.
+    assert single_flight.do("key", lambda: 7) == 7
+
+
+def test_single_flight_shares_exceptions():
+    """
+    GIVEN a SingleFlight call that raises
+    WHEN it is called
+    THEN the exception should propagate, and the key should not stay in flight.
+    """
+    single_flight: SingleFlight[int] = SingleFlight()
+
+    def fail() -> int:
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        single_flight.do("key", fail)
+    assert single_flight.do("key", lambda: 1) == 1
+
+
+def test_async_single_flight_shares_one_call_between_concurrent_callers():
+    """
+    GIVEN several coroutines asking AsyncSingleFlight for the same key at once
+    WHEN they are gathered
+    THEN the function should only run once, and all of them should get its result.
+    """
+    single_flight: AsyncSingleFlight[int] = AsyncSingleFlight()
+    calls = []
+
+    async def load() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 42
+
+    async def main():
+        return await asyncio.gather(*(single_flight.do("key", load) for _ in range(10)))
+
+    assert asyncio.run(main()) == [42] * 10
+    assert len(calls) == 1
+
+
+def test_fill_lock_is_exclusive_and_released_by_its_holder(fake_redis):
+    """
+    GIVEN one process holding the fill lock for a key
+    WHEN another tries to take it, or release it with the wrong token
+    THEN it should fail, and only the holder's release should free it.
+    """
+    token = acquire_fill_lock(fake_redis, "puzzle:2025-08-01")
+    assert token is not None
+    assert fake_redis.pttl(fill_lock_key("puzzle:2025-08-01")) > 0
+
+    assert acquire_fill_lock(fake_redis, "puzzle:2025-08-01") is None
+    release_fill_lock(fake_redis, "puzzle:2025-08-01", "not-the-token")
+    assert acquire_fill_lock(fake_redis, "puzzle:2025-08-01") is None
+
+    release_fill_lock(fake_redis, "puzzle:2025-08-01", token)
+    assert acquire_fill_lock(fake_redis, "puzzle:2025-08-01") is not None
+
+
+def test_wait_for_fill_returns_value_set_by_lock_holder(fake_redis):
+    """
+    GIVEN another process holds the fill lock for a key
+    WHEN it sets the key while we're waiting
+    THEN wait_for_fill should return the new value.
+    """
+    token = acquire_fill_lock(fake_redis, "puzzle:2025-08-01")
+    assert token is not None
+
+    def fill():
+        time.sleep(0.05)
+        fake_redis.set("puzzle:2025-08-01", "{}")
+        release_fill_lock(fake_redis, "puzzle:2025-08-01", token)
+
+    thread = threading.Thread(target=fill)
+    thread.start()
+    assert wait_for_fill(fake_redis, "puzzle:2025-08-01") == "{}"
+    thread.join()
+
+
+def test_wait_for_fill_gives_up_when_lock_is_released_without_a_value(fake_redis):
+    """
+    GIVEN no process holds the fill lock for a key, and the key isn't set
+    WHEN wait_for_fill is called
+    THEN it should return None immediately.
+    """
+    started = time.monotonic()
+    assert wait_for_fill(fake_redis, "puzzle:2025-08-01") is None
+    assert time.monotonic() - started < 0.5
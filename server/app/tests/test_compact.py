@@ -0,0 +1,96 @@
+import datetime
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, inspect
+
+from app.compact import ENCODED_LENGTH, compact_puzzle_json, decode_puzzle, encode_puzzle
+from app.database import add_missing_columns
+from app.models import PuzzleWithDate, Tile
+from app.puzzle_generator import generate_puzzle
+
+
+def test_encode_puzzle_round_trips():
+    """
+    GIVEN a generated puzzle
+    WHEN it is encoded and decoded
+    THEN the racks should be unchanged, and the encoding should be the documented size.
+    """
+    puzzle = generate_puzzle("2025-08-15")
+
+    encoded = encode_puzzle(puzzle.initial_racks, puzzle.target_solution)
+
+    assert encoded is not None
+    assert len(encoded) == ENCODED_LENGTH
+    assert decode_puzzle(encoded) == (puzzle.initial_racks, puzzle.target_solution)
+
+
+def test_compact_puzzle_json_matches_model_dump_json():
+    """
+    GIVEN a compact puzzle
+    WHEN its JSON is built directly from the bytes
+    THEN it should be identical to serializing the full model.
+    """
+    date = datetime.date(2025, 8, 15)
+    puzzle = generate_puzzle(date.isoformat())
+    encoded = encode_puzzle(puzzle.initial_racks, puzzle.target_solution)
+    assert encoded is not None
+
+    full = PuzzleWithDate(
+        date=date, initial_racks=puzzle.initial_racks, target_solution=puzzle.target_solution
+    )
+    assert compact_puzzle_json(date, encoded) == full.model_dump_json()
+
+
+def test_encode_puzzle_rejects_non_standard_puzzles():
+    """
+    GIVEN puzzles that don't have the standard generated shape
+    WHEN they are encoded
+    THEN encode_puzzle should return None rather than lose information.
+    """
+    puzzle = generate_puzzle("2025-08-15")
+    one_tile = [[Tile(id="tile-1", letter="A", value=1)]]
+    swapped_initial_racks = [list(reversed(rack)) for rack in puzzle.initial_racks]
+    renamed = [
+        [tile.model_copy(update={"id": tile.id.replace("tile", "t")}) for tile in rack]
+        for rack in puzzle.target_solution
+    ]
+
+    assert encode_puzzle(one_tile, one_tile) is None
+    assert encode_puzzle(swapped_initial_racks, puzzle.target_solution) is None
+    assert encode_puzzle(puzzle.initial_racks, renamed) is None
+
+
+def test_decode_puzzle_rejects_unknown_encodings():
+    """
+    GIVEN bytes that aren't in the compact format
+    WHEN they are decoded
+    THEN a ValueError should be raised.
+    """
+    with pytest.raises(ValueError):
+        decode_puzzle(b"\x02" + bytes(ENCODED_LENGTH - 1))
+    with pytest.raises(ValueError):
+        decode_puzzle(b"\x01")
+
+
+def test_add_missing_columns_adds_compact_column(tmp_path):
+    """
+    GIVEN a puzzles table created before the compact column existed
+    WHEN add_missing_columns runs
+    THEN the compact column (and any later ones) should be added, and existing columns left alone.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.sqlite3'}")
+    old_metadata = MetaData()
+    Table(
+        "puzzles",
+        old_metadata,
+        Column("date", Integer, primary_key=True),
+        Column("initial_racks", Integer),
+        Column("target_solution", Integer),
+    )
+    old_metadata.create_all(engine)
+
+    add_missing_columns(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("puzzles")}
+    assert columns == {"date", "initial_racks", "target_solution", "compact", "max_score"}
+    engine.dispose()
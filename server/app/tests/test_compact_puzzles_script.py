@@ -0,0 +1,109 @@
+import datetime
+from unittest.mock import patch
+
+from sqlmodel import Session, select
+from typer.testing import CliRunner
+
+from app.crud import get_puzzle_json_by_date
+from app.models import PuzzleWithDate, Tile
+from app.scripts.compact_puzzles import app, compact_puzzles, expand_puzzles
+from app.settings import Settings
+
+runner = CliRunner()
+
+
+def stored_encodings(session: Session) -> dict[datetime.date, tuple[bool, bool]]:
+    """Maps each date to (has compact bytes, has JSON racks)."""
+    rows = session.exec(
+        select(PuzzleWithDate.date, PuzzleWithDate.compact, PuzzleWithDate.initial_racks)
+    ).all()
+    return {date: (compact is not None, racks is not None) for date, compact, racks in rows}
+
+
+def test_compact_puzzles_converts_rows_and_keeps_api_json(session: Session, add_puzzles):
+    """
+    GIVEN JSON-encoded puzzles
+    WHEN compact_puzzles is run
+    THEN they should be stored compactly, and served exactly as before.
+    """
+    dates = [datetime.date(2025, 8, day) for day in range(1, 6)]
+    add_puzzles(*dates)
+    before = [get_puzzle_json_by_date(session, date) for date in dates]
+
+    converted, skipped = compact_puzzles(session, batch_size=2)
+
+    assert (converted, skipped) == (5, 0)
+    assert set(stored_encodings(session).values()) == {(True, False)}
+    session.expunge_all()
+    assert [get_puzzle_json_by_date(session, date) for date in dates] == before
+    # The ORM path expands compact rows too.
+    puzzle = session.get(PuzzleWithDate, dates[0])
+    assert puzzle is not None
+    assert len(puzzle.initial_racks) == 4
+
+
+def test_compact_puzzles_leaves_non_standard_puzzles_alone(session: Session):
+    """
+    GIVEN a puzzle that doesn't have the standard shape
+    WHEN compact_puzzles is run
+    THEN it should be skipped and left as JSON.
+    """
+    racks = [[Tile(id="tile-1", letter="A", value=1)]]
+    session.add(
+        PuzzleWithDate(date=datetime.date(2025, 8, 1), initial_racks=racks, target_solution=racks)
+    )
+    session.commit()
+
+    assert compact_puzzles(session) == (0, 1)
+    assert stored_encodings(session) == {datetime.date(2025, 8, 1): (False, True)}
+
+
+def test_expand_puzzles_reverses_compact_puzzles(session: Session, add_puzzles):
+    """
+    GIVEN compact puzzles
+    WHEN expand_puzzles is run
+    THEN they should be stored as JSON again, and served exactly as before.
+    """
+    dates = [datetime.date(2025, 8, day) for day in range(1, 4)]
+    add_puzzles(*dates)
+    before = [get_puzzle_json_by_date(session, date) for date in dates]
+    compact_puzzles(session)
+
+    assert expand_puzzles(session) == 3
+
+    assert set(stored_encodings(session).values()) == {(False, True)}
+    assert [get_puzzle_json_by_date(session, date) for date in dates] == before
+
+
+def test_insert_puzzles_writes_compact_rows_when_enabled(session: Session, add_puzzles):
+    """
+    GIVEN Settings.compact_puzzle_storage is enabled
+    WHEN new puzzles are inserted
+    THEN they should be stored compactly.
+    """
+    with patch(
+        "app.scripts.generate_puzzles.get_settings",
+        return_value=Settings(compact_puzzle_storage=True),
+    ):
+        add_puzzles(datetime.date(2025, 8, 1))
+
+    assert stored_encodings(session) == {datetime.date(2025, 8, 1): (True, False)}
+
+
+@patch("app.scripts.compact_puzzles.create_db_and_tables")
+@patch("app.scripts.compact_puzzles.get_session")
+def test_cli_compacts_and_expands(mock_get_session, mock_create_db, session: Session, add_puzzles):
+    """
+    GIVEN JSON-encoded puzzles
+    WHEN the CLI is run, and then run again with --expand
+    THEN the puzzles should be compacted, and then expanded again.
+    """
+    add_puzzles(datetime.date(2025, 8, 1))
+
+    mock_get_session.return_value = iter([session])
+    assert runner.invoke(app, []).exit_code == 0
+    assert stored_encodings(session) == {datetime.date(2025, 8, 1): (True, False)}
+
+    mock_get_session.return_value = iter([session])
+    assert runner.invoke(app, ["--expand"]).exit_code == 0
+    assert stored_encodings(session) == {datetime.date(2025, 8, 1): (False, True)}
@@ -0,0 +1,40 @@
+from typer.testing import CliRunner
+
+from app.lexicon_index import LexiconIndex, get_lexicon_index
+from app.scripts.compile_lexicon import app
+
+runner = CliRunner()
+
+
+def test_cli_compiles_the_index(tmp_path):
+    """
+    GIVEN an output path
+    WHEN the CLI is run
+    THEN it should write an index of the current word lists there.
+    """
+    output = tmp_path / "build" / "lexicon.idx"
+
+    result = runner.invoke(app, ["--output", str(output)])
+
+    assert result.exit_code == 0
+    index = LexiconIndex.open(output)
+    assert index.version == get_lexicon_index().version
+    assert "AAH" in index
+
+
+def test_cli_check_reports_whether_the_index_is_up_to_date(tmp_path):
+    """
+    GIVEN a missing, up-to-date or corrupt index
+    WHEN the CLI is run with --check
+    THEN it should succeed only when the index is up to date, without writing anything.
+    """
+    output = tmp_path / "lexicon.idx"
+
+    assert runner.invoke(app, ["--output", str(output), "--check"]).exit_code == 1
+    assert not output.exists()
+
+    runner.invoke(app, ["--output", str(output)])
+    assert runner.invoke(app, ["--output", str(output), "--check"]).exit_code == 0
+
+    output.write_bytes(b"corrupt")
+    assert runner.invoke(app, ["--output", str(output), "--check"]).exit_code == 1
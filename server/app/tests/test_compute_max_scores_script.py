@@ -0,0 +1,123 @@
+import datetime
+from unittest.mock import patch
+
+from sqlmodel import Session, select
+from typer.testing import CliRunner
+
+from app.config import get_game_rules_file
+from app.crud import get_puzzle_json_by_date
+from app.models import PuzzleWithDate, Tile
+from app.puzzle_generator import generate_puzzle
+from app.scripts.compute_max_scores import app, compute_max_scores
+from app.scripts.generate_puzzles import insert_puzzles
+from app.settings import Settings
+from app.solver import get_anagram_index, solve_puzzle
+
+runner = CliRunner()
+
+
+def stored_max_scores(session: Session) -> dict[datetime.date, int | None]:
+    rows = session.exec(select(PuzzleWithDate.date, PuzzleWithDate.max_score)).all()
+    return dict(rows)
+
+
+##########################
+# compute_max_scores tests
+##########################
+
+
+def test_compute_max_scores_stores_solver_scores(session: Session, add_puzzles):
+    """
+    GIVEN generated puzzles
+    WHEN compute_max_scores is run
+    THEN each should get the solver's best score, without changing the API's JSON.
+    """
+    dates = [datetime.date(2025, 8, day) for day in range(1, 4)]
+    add_puzzles(*dates)
+    before = [get_puzzle_json_by_date(session, date) for date in dates]
+
+    assert compute_max_scores(session, batch_size=2) == (3, 0)
+
+    multipliers = get_game_rules_file()["multipliers"]
+    for date, max_score in stored_max_scores(session).items():
+        puzzle = generate_puzzle(date.isoformat())
+        tiles = [(tile.letter, tile.value) for rack in puzzle.initial_racks for tile in rack]
+        expected = solve_puzzle(tiles, multipliers=multipliers, index=get_anagram_index())
+        assert max_score == expected.score
+    assert [get_puzzle_json_by_date(session, date) for date in dates] == before
+
+
+def test_compute_max_scores_only_solves_missing_unless_forced(session: Session, add_puzzles):
+    """
+    GIVEN puzzles that already have a best score
+    WHEN compute_max_scores is run again
+    THEN nothing should be solved, unless forced or the puzzle has been overwritten.
+    """
+    dates = [datetime.date(2025, 8, 1), datetime.date(2025, 8, 2)]
+    add_puzzles(*dates)
+    compute_max_scores(session)
+
+    assert compute_max_scores(session) == (0, 0)
+    assert compute_max_scores(session, force=True) == (2, 0)
+
+    add_puzzles(dates[1], overwrite=True)
+    assert stored_max_scores(session)[dates[1]] is None
+    assert compute_max_scores(session) == (1, 0)
+
+
+def test_compute_max_scores_handles_compact_puzzles(session: Session, add_puzzles):
+    """
+    GIVEN the same puzzle stored as JSON and compactly
+    WHEN compute_max_scores is run
+    THEN both should get the same best score.
+    """
+    add_puzzles(datetime.date(2025, 8, 1))
+    with patch(
+        "app.scripts.generate_puzzles.get_settings",
+        return_value=Settings(compact_puzzle_storage=True),
+    ):
+        insert_puzzles(session, [(datetime.date(2025, 8, 2), generate_puzzle("2025-08-01"))])
+    session.commit()
+
+    compute_max_scores(session)
+
+    scores = stored_max_scores(session)
+    assert scores[datetime.date(2025, 8, 1)] == scores[datetime.date(2025, 8, 2)] is not None
+
+
+def test_compute_max_scores_skips_unsolvable_puzzles(session: Session):
+    """
+    GIVEN a puzzle whose tiles with the same letter have different values
+    WHEN compute_max_scores is run
+    THEN it should be skipped and left without a best score.
+    """
+    racks = [[Tile(id="tile-1", letter="A", value=1), Tile(id="tile-2", letter="A", value=2)]]
+    session.add(
+        PuzzleWithDate(date=datetime.date(2025, 8, 1), initial_racks=racks, target_solution=racks)
+    )
+    session.commit()
+
+    assert compute_max_scores(session) == (0, 1)
+    assert stored_max_scores(session) == {datetime.date(2025, 8, 1): None}
+
+
+###########
+# CLI tests
+###########
+
+
+@patch("app.scripts.compute_max_scores.create_db_and_tables")
+@patch("app.scripts.compute_max_scores.get_session")
+def test_cli_computes_max_scores(mock_get_session, mock_create_db, session: Session, add_puzzles):
+    """
+    GIVEN a generated puzzle
+    WHEN the CLI is run
+    THEN it should get a best score.
+    """
+    mock_get_session.return_value = iter([session])
+    add_puzzles(datetime.date(2025, 8, 1))
+
+    result = runner.invoke(app, [])
+
+    assert result.exit_code == 0
+    assert stored_max_scores(session)[datetime.date(2025, 8, 1)] is not None
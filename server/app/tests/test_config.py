@@ -0,0 +1,128 @@
+import os
+from unittest import mock
+
+import pytest
+
+from app.config import (
+    _stat_signature,
+    config_file_cache,
+    get_game_rules_file,
+    get_puzzle_lexicon,
+)
+from app.settings import Settings
+
+
+@pytest.fixture(name="config_dir")
+def config_dir_fixture(tmp_path):
+    """A throwaway config directory that get_settings() points at for the duration of a test."""
+    (tmp_path / "words.txt").write_text("cat\ndogs\n\nbeast\n", encoding="utf-8")
+    with mock.patch("app.config.get_settings", return_value=Settings(config_directory=tmp_path)):
+        yield tmp_path
+
+
+def test_config_file_cache_builds_once(config_dir):
+    """
+    GIVEN a function decorated with config_file_cache
+    WHEN it is called several times without the file changing
+    THEN the builder should only run once and the same object should be returned.
+    """
+    build = mock.Mock(side_effect=lambda text, *, version: text.split())
+    cached = config_file_cache("words.txt")(build)
+
+    first = cached()
+    second = cached()
+
+    assert first == ["cat", "dogs", "beast"]
+    assert first is second
+    build.assert_called_once()
+
+
+def test_config_file_cache_reloads_when_file_changes(config_dir):
+    """
+    GIVEN a cached config value
+    WHEN the underlying file is edited
+    THEN the next call should return a value built from the new contents.
+    """
+    cached = config_file_cache("words.txt")(lambda text, *, version: (text.split(), version))
+    _, version = cached()
+
+    path = config_dir / "words.txt"
+    path.write_text("cat\ndogs\nbeast\nlonger\n", encoding="utf-8")
+    # Make sure the mtime moves even on filesystems with coarse timestamps.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    new_words, new_version = cached()
+    assert new_words == ["cat", "dogs", "beast", "longer"]
+    assert new_version != version
+
+
+def test_config_file_cache_does_not_rebuild_if_only_touched(config_dir):
+    """
+    GIVEN a cached config value
+    WHEN the file's mtime changes but its contents do not
+    THEN the cached value should be kept rather than rebuilt.
+    """
+    build = mock.Mock(side_effect=lambda text, *, version: text.split())
+    cached = config_file_cache("words.txt")(build)
+    first = cached()
+
+    path = config_dir / "words.txt"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cached() is first
+    build.assert_called_once()
+
+
+def test_config_file_cache_check_interval_skips_stat(config_dir):
+    """
+    GIVEN a cached config value with a check_interval
+    WHEN it is called again within the interval, and then after it
+    THEN the file should only be stat()ed again once the interval has passed.
+    """
+    cached = config_file_cache("words.txt", check_interval=60)(
+        lambda text, *, version: text.split()
+    )
+    now = 1000.0
+    with (
+        mock.patch("app.config.time.monotonic", side_effect=lambda: now),
+        mock.patch("app.config._stat_signature", wraps=_stat_signature) as spy_stat,
+    ):
+        cached()
+        now += 30
+        cached()
+        assert spy_stat.call_count == 1
+
+        now += 31
+        cached()
+        assert spy_stat.call_count == 2
+
+
+def test_get_game_rules_file_parses_rules():
+    """
+    WHEN get_game_rules_file is called with the real config files
+    THEN it should return the parsed rules as a read-only mapping.
+    """
+    get_game_rules_file.cache_clear()
+    rules = get_game_rules_file()
+
+    assert rules["timer_seconds"] > 0
+    with pytest.raises(TypeError):
+        rules["timer_seconds"] = 0  # type: ignore[index]
+
+
+def test_get_puzzle_lexicon_buckets_words_by_length():
+    """
+    WHEN get_puzzle_lexicon is called with the real config files
+    THEN every word should be upper-case and filed under its own length.
+    """
+    get_puzzle_lexicon.cache_clear()
+    lexicon = get_puzzle_lexicon()
+
+    for length in (3, 4, 5, 6):
+        words = lexicon.words_by_length[length]
+        assert words
+        assert all(len(word) == length and word == word.upper() for word in words)
+    assert lexicon.letter_values["A"] == 1
+    assert lexicon.version == get_puzzle_lexicon.version
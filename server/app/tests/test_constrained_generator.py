@@ -0,0 +1,125 @@
+import pytest
+
+from app.analytics import analyze_tiles, get_letter_count_matrix
+from app.config import get_game_rules_file, get_puzzle_lexicon
+from app.constrained_generator import (
+    VOWELS,
+    PuzzleConstraints,
+    generate_constrained_puzzle,
+    get_candidate_arrays,
+)
+from app.models import Puzzle
+from app.puzzle_generator import generate_puzzle
+
+
+def target_score(puzzle: Puzzle) -> int:
+    multipliers = get_game_rules_file()["multipliers"]
+    return sum(
+        multipliers[len(rack)] * sum(tile.value for tile in rack) for rack in puzzle.target_solution
+    )
+
+
+def vowel_ratio(puzzle: Puzzle) -> float:
+    tiles = [tile for rack in puzzle.initial_racks for tile in rack]
+    return sum(tile.letter in VOWELS for tile in tiles) / len(tiles)
+
+
+def test_candidate_arrays_score_common_words():
+    """
+    GIVEN the common word list and game rules
+    WHEN the candidate arrays are built
+    THEN each word's score and vowel count should line up with it.
+    """
+    arrays = get_candidate_arrays()
+    lexicon = get_puzzle_lexicon()
+    multipliers = get_game_rules_file()["multipliers"]
+
+    for length in (3, 4, 5, 6):
+        assert arrays.words[length] == lexicon.words_by_length[length]
+        word = arrays.words[length][0]
+        assert arrays.scores[length][0] == multipliers[length] * sum(
+            lexicon.letter_values[letter] for letter in word
+        )
+        assert arrays.vowel_counts[length][0] == sum(letter in "AEIOU" for letter in word)
+
+
+def test_generate_constrained_puzzle_is_deterministic():
+    """
+    GIVEN a seed and constraints
+    WHEN generate_constrained_puzzle is called twice
+    THEN it should give the same puzzle, and a different one for another seed.
+    """
+    constraints = PuzzleConstraints(min_score=100, max_score=110)
+
+    puzzle = generate_constrained_puzzle("2025-08-01", constraints)
+
+    assert puzzle == generate_constrained_puzzle("2025-08-01", constraints)
+    assert puzzle != generate_constrained_puzzle("2025-08-02", constraints)
+
+
+def test_generate_constrained_puzzle_satisfies_constraints():
+    """
+    GIVEN a score band, a vowel ratio band and a limit on alternative solutions
+    WHEN puzzles are generated with them
+    THEN every puzzle should be within all of them.
+    """
+    constraints = PuzzleConstraints(
+        min_score=95,
+        max_score=115,
+        min_vowel_ratio=1 / 3,
+        max_vowel_ratio=0.4,
+        max_alternative_solutions=200_000,
+    )
+
+    for day in range(1, 6):
+        puzzle = generate_constrained_puzzle(f"2025-08-0{day}", constraints)
+
+        assert 95 <= target_score(puzzle) <= 115
+        assert 1 / 3 <= vowel_ratio(puzzle) <= 0.4
+        letters = "".join(tile.letter for rack in puzzle.initial_racks for tile in rack)
+        assert analyze_tiles(letters, get_letter_count_matrix()).full_solutions <= 200_001
+
+
+def test_generate_constrained_puzzle_builds_puzzles_like_generate_puzzle():
+    """
+    GIVEN no constraints at all
+    WHEN a puzzle is generated
+    THEN it should have the shape of a generate_puzzle puzzle: one common word per rack length,
+        with 18 distinct tiles shuffled into the initial racks.
+    """
+    puzzle = generate_constrained_puzzle("2025-08-01")
+    reference = generate_puzzle("2025-08-01")
+
+    assert [len(rack) for rack in puzzle.target_solution] == [3, 4, 5, 6]
+    assert [len(rack) for rack in puzzle.initial_racks] == [3, 4, 5, 6]
+    words = ["".join(tile.letter for tile in rack) for rack in puzzle.target_solution]
+    for word in words:
+        assert word in get_puzzle_lexicon().words_by_length[len(word)]
+    ids = sorted(tile.id for rack in puzzle.initial_racks for tile in rack)
+    assert ids == sorted(tile.id for rack in reference.initial_racks for tile in rack)
+
+
+def test_generate_constrained_puzzle_raises_when_unsatisfiable():
+    """
+    GIVEN constraints no puzzle can meet
+    WHEN generation is attempted
+    THEN it should give up with a ValueError.
+    """
+    with pytest.raises(ValueError, match="No puzzle satisfying"):
+        generate_constrained_puzzle(
+            "2025-08-01", PuzzleConstraints(min_score=10_000), batch_size=64, max_batches=2
+        )
+
+
+@pytest.mark.parametrize(
+    "bounds",
+    [{"min_score": 120, "max_score": 100}, {"min_vowel_ratio": 0.5, "max_vowel_ratio": 0.4}],
+)
+def test_puzzle_constraints_reject_inverted_bounds(bounds):
+    """
+    GIVEN a minimum above its maximum
+    WHEN PuzzleConstraints are created
+    THEN a ValueError should be raised.
+    """
+    with pytest.raises(ValueError):
+        PuzzleConstraints(**bounds)
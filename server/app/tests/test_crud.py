@@ -1,13 +1,39 @@
 import datetime
-from unittest.mock import mock_open, patch
+import json
+import threading
+import time
+from unittest.mock import MagicMock, mock_open, patch
 
 import pytest
 import yaml
-from sqlmodel import Session
 from sqlalchemy.exc import NoResultFound
+from sqlmodel import Session
 
-from app.crud import get_game_rules, get_puzzle_by_date, get_stable_game_rules, redis_key_for_date
+from app.cache import (
+    LocalCache,
+    acquire_fill_lock,
+    fill_lock_key,
+    invalidate_cached_keys,
+    redis_stats,
+    release_fill_lock,
+)
+from app.compact import encode_puzzle
+from app.crud import (
+    PUZZLE_RANGE_KEY,
+    PuzzleRange,
+    PuzzleRangeSnapshot,
+    get_game_rules,
+    get_puzzle_by_date,
+    get_puzzle_json_by_date,
+    get_puzzle_jsons_for_dates,
+    get_puzzle_range,
+    get_stable_game_rules,
+    iter_puzzle_jsons_in_range,
+    redis_key_for_date,
+    stored_tiles,
+)
 from app.models import PuzzleWithDate, Tile
+from app.puzzle_generator import generate_puzzle
 
 ##########################
 # get_puzzle_by_date tests
@@ -140,18 +166,333 @@ def test_get_puzzle_by_date_does_not_use_cache_if_redis_client_is_None(
     assert fake_redis.get(redis_key_for_date(test_date)) is None
 
 
+###############################
+# get_puzzle_json_by_date tests
+###############################
+
+
+def test_get_puzzle_json_by_date_populates_cache_on_miss(session: Session, fake_redis):
+    """
+    GIVEN a puzzle in the database but not in the cache
+    WHEN get_puzzle_json_by_date is called with a Redis client
+    THEN it should return the camelCase JSON for the puzzle and store the same string in Redis.
+    """
+    test_date = datetime.date(2025, 10, 20)
+    racks = [[Tile(id="tile-1", letter="A", value=1)]]
+    session.add(PuzzleWithDate(date=test_date, initial_racks=racks, target_solution=racks))
+    session.commit()
+    session.expunge_all()
+
+    puzzle_json = get_puzzle_json_by_date(session, test_date, redis_client=fake_redis)
+
+    assert puzzle_json is not None
+    assert json.loads(puzzle_json) == {
+        "initialRacks": [[{"id": "tile-1", "letter": "A", "value": 1}]],
+        "targetSolution": [[{"id": "tile-1", "letter": "A", "value": 1}]],
+        "date": test_date.isoformat(),
+    }
+    assert fake_redis.get(redis_key_for_date(test_date)) == puzzle_json
+
+
+def test_get_puzzle_json_by_date_returns_cached_string_without_db(session: Session, fake_redis):
+    """
+    GIVEN a puzzle already in the cache
+    WHEN get_puzzle_json_by_date is called
+    THEN it should return the cached string verbatim without touching the database.
+    """
+    test_date = datetime.date(2025, 10, 20)
+    fake_redis.set(redis_key_for_date(test_date), '{"cached":true}')
+
+    with patch.object(session, "exec", wraps=session.exec) as spy_exec:
+        puzzle_json = get_puzzle_json_by_date(session, test_date, redis_client=fake_redis)
+
+    assert puzzle_json == '{"cached":true}'
+    spy_exec.assert_not_called()
+
+
+def test_get_puzzle_json_by_date_not_found(session: Session, fake_redis):
+    """
+    GIVEN no puzzle exists for a date
+    WHEN get_puzzle_json_by_date is called
+    THEN it should return None and cache nothing.
+    """
+    test_date = datetime.date(2025, 10, 21)
+    assert get_puzzle_json_by_date(session, test_date, redis_client=fake_redis) is None
+    assert fake_redis.get(redis_key_for_date(test_date)) is None
+
+
+def test_get_puzzle_json_by_date_prefers_local_cache(session: Session, fake_redis):
+    """
+    GIVEN a puzzle in both the local cache and Redis
+    WHEN get_puzzle_json_by_date is called
+    THEN the local copy should be returned without a Redis round trip.
+    """
+    test_date = datetime.date(2025, 10, 20)
+    local_cache = LocalCache(max_entries=10, ttl_seconds=60)
+    local_cache.set(redis_key_for_date(test_date), '{"tier":"local"}')
+    fake_redis.set(redis_key_for_date(test_date), '{"tier":"redis"}')
+
+    with patch.object(fake_redis, "get", wraps=fake_redis.get) as spy_redis_get:
+        puzzle_json = get_puzzle_json_by_date(
+            session, test_date, redis_client=fake_redis, local_cache=local_cache
+        )
+
+    assert puzzle_json == '{"tier":"local"}'
+    spy_redis_get.assert_not_called()
+    assert local_cache.stats.hits == 1
+
+
+def test_get_puzzle_json_by_date_backfills_local_cache_from_redis(session: Session, fake_redis):
+    """
+    GIVEN a puzzle in Redis but not in the local cache
+    WHEN get_puzzle_json_by_date is called twice
+    THEN Redis should only be read once, and the tier counters should reflect that.
+    """
+    test_date = datetime.date(2025, 10, 20)
+    local_cache = LocalCache(max_entries=10, ttl_seconds=60)
+    fake_redis.set(redis_key_for_date(test_date), '{"tier":"redis"}')
+
+    for _ in range(2):
+        puzzle_json = get_puzzle_json_by_date(
+            session, test_date, redis_client=fake_redis, local_cache=local_cache
+        )
+        assert puzzle_json == '{"tier":"redis"}'
+
+    assert (local_cache.stats.hits, local_cache.stats.misses) == (1, 1)
+    assert (redis_stats.hits, redis_stats.misses) == (1, 0)
+
+
+def test_get_puzzle_json_by_date_pins_todays_puzzle(session: Session):
+    """
+    GIVEN today's puzzle in the database
+    WHEN it's loaded through a tiny local cache and other dates push it out of the LRU
+    THEN today's puzzle should still be served from the local cache.
+    """
+    today = datetime.date.today()
+    racks = [[Tile(id="tile-1", letter="A", value=1)]]
+    session.add(PuzzleWithDate(date=today, initial_racks=racks, target_solution=racks))
+    session.commit()
+    local_cache = LocalCache(max_entries=1, ttl_seconds=60)
+
+    get_puzzle_json_by_date(session, today, local_cache=local_cache)
+    local_cache.set("puzzle:other-1", "{}")
+    local_cache.set("puzzle:other-2", "{}")
+
+    assert local_cache.get(redis_key_for_date(today)) is not None
+
+
+def test_concurrent_misses_share_one_database_read(session: Session, fake_redis):
+    """
+    GIVEN a puzzle that isn't cached anywhere
+    WHEN many threads ask for it at once
+    THEN the database should only be read once, and every caller should get the puzzle.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    racks = [[Tile(id="tile-1", letter="A", value=1)]]
+    session.add(PuzzleWithDate(date=test_date, initial_racks=racks, target_solution=racks))
+    session.commit()
+    session.expunge_all()
+
+    original_exec = session.exec
+    reads = []
+
+    def slow_exec(*args, **kwargs):
+        reads.append(1)
+        time.sleep(0.05)
+        return original_exec(*args, **kwargs)
+
+    results = []
+    with patch.object(session, "exec", side_effect=slow_exec):
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    get_puzzle_json_by_date(session, test_date, redis_client=fake_redis)
+                )
+            )
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(reads) == 1
+    assert len(set(results)) == 1 and results[0] is not None
+    assert fake_redis.get(redis_key_for_date(test_date)) == results[0]
+    assert fake_redis.get(fill_lock_key(redis_key_for_date(test_date))) is None
+
+
+def test_miss_waits_for_another_worker_holding_the_fill_lock(session: Session, fake_redis):
+    """
+    GIVEN another worker holds the fill lock for a date
+    WHEN that worker fills Redis while we're waiting
+    THEN we should return its value without reading the database.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    key = redis_key_for_date(test_date)
+    token = acquire_fill_lock(fake_redis, key)
+    assert token is not None
+
+    def other_worker():
+        time.sleep(0.05)
+        fake_redis.set(key, '{"from":"other-worker"}')
+        release_fill_lock(fake_redis, key, token)
+
+    thread = threading.Thread(target=other_worker)
+    thread.start()
+    # The puzzle isn't in the (empty) database, so it can only have come from the other worker.
+    puzzle_json = get_puzzle_json_by_date(session, test_date, redis_client=fake_redis)
+    thread.join()
+
+    assert puzzle_json == '{"from":"other-worker"}'
+
+
+def test_miss_serves_stale_local_copy_while_another_worker_fills(session: Session, fake_redis):
+    """
+    GIVEN another worker holds the fill lock for a date, and our local copy has expired
+    WHEN the puzzle is requested
+    THEN the stale local copy should be served immediately.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    key = redis_key_for_date(test_date)
+    local_cache = LocalCache(max_entries=10, ttl_seconds=0)
+    local_cache.set(key, '{"stale":true}')
+    assert acquire_fill_lock(fake_redis, key) is not None
+
+    started = time.monotonic()
+    puzzle_json = get_puzzle_json_by_date(
+        session, test_date, redis_client=fake_redis, local_cache=local_cache
+    )
+
+    assert puzzle_json == '{"stale":true}'
+    assert time.monotonic() - started < 0.5
+
+
+def test_miss_reads_database_if_lock_holder_never_fills(session: Session, fake_redis):
+    """
+    GIVEN another worker took the fill lock for a date but it expires without the key being set
+    WHEN the puzzle is requested
+    THEN it should fall back to reading the database.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    racks = [[Tile(id="tile-1", letter="A", value=1)]]
+    session.add(PuzzleWithDate(date=test_date, initial_racks=racks, target_solution=racks))
+    session.commit()
+    session.expunge_all()
+    key = redis_key_for_date(test_date)
+    fake_redis.set(fill_lock_key(key), "someone-else", px=50)
+
+    puzzle_json = get_puzzle_json_by_date(session, test_date, redis_client=fake_redis)
+
+    assert puzzle_json is not None
+    assert json.loads(puzzle_json)["date"] == test_date.isoformat()
+
+
+#################################
+# get_puzzle_jsons_for_dates tests
+#################################
+
+
+def add_puzzle_with_letter(session: Session, date: datetime.date, letter: str) -> str:
+    racks = [[Tile(id="tile-1", letter=letter, value=1)]]
+    puzzle = PuzzleWithDate(date=date, initial_racks=racks, target_solution=racks)
+    puzzle_json = puzzle.model_dump_json()
+    session.add(puzzle)
+    session.commit()
+    session.expunge_all()
+    return puzzle_json
+
+
+def test_get_puzzle_jsons_for_dates_combines_cache_tiers(session: Session, fake_redis):
+    """
+    GIVEN a range of dates with one puzzle in the local cache, one in Redis, two only in the
+    database, and one date with no puzzle
+    WHEN get_puzzle_jsons_for_dates is called
+    THEN it should return the puzzles in date order using one MGET and one query, and back-fill
+    Redis with the puzzles read from the database.
+    """
+    dates = [datetime.date(2025, 8, day) for day in range(1, 6)]
+    local_cache = LocalCache(max_entries=10, ttl_seconds=60)
+    local_json = add_puzzle_with_letter(session, dates[0], "A")
+    local_cache.set(redis_key_for_date(dates[0]), local_json)
+    redis_json = add_puzzle_with_letter(session, dates[1], "B")
+    fake_redis.set(redis_key_for_date(dates[1]), redis_json)
+    db_jsons = [add_puzzle_with_letter(session, date, "C") for date in (dates[2], dates[4])]
+
+    with (
+        patch.object(session, "exec", wraps=session.exec) as spy_exec,
+        patch.object(fake_redis, "mget", wraps=fake_redis.mget) as spy_mget,
+    ):
+        puzzle_jsons = get_puzzle_jsons_for_dates(
+            session, dates, redis_client=fake_redis, local_cache=local_cache
+        )
+
+    assert puzzle_jsons == [local_json, redis_json, *db_jsons]
+    assert spy_exec.call_count == 1
+    spy_mget.assert_called_once()
+    assert fake_redis.get(redis_key_for_date(dates[2])) == db_jsons[0]
+    assert fake_redis.get(redis_key_for_date(dates[4])) == db_jsons[1]
+    assert fake_redis.get(redis_key_for_date(dates[3])) is None
+    assert redis_stats.hits == 1 and redis_stats.misses == 3
+
+
+def test_get_puzzle_jsons_for_dates_without_caches(session: Session):
+    """
+    GIVEN puzzles only in the database, and no cache tiers
+    WHEN get_puzzle_jsons_for_dates is called
+    THEN it should read them from the database.
+    """
+    date = datetime.date(2025, 8, 1)
+    puzzle_json = add_puzzle_with_letter(session, date, "A")
+
+    assert get_puzzle_jsons_for_dates(session, [date, date + datetime.timedelta(days=1)]) == [
+        puzzle_json
+    ]
+
+
+def test_iter_puzzle_jsons_in_range_reads_in_batches(session: Session):
+    """
+    GIVEN a range of dates longer than one batch
+    WHEN iter_puzzle_jsons_in_range is consumed
+    THEN it should yield every puzzle in order, querying once per batch.
+    """
+    start = datetime.date(2025, 8, 1)
+    expected = [
+        add_puzzle_with_letter(session, start + datetime.timedelta(days=n), "A") for n in range(5)
+    ]
+
+    with (
+        patch("app.crud.PUZZLE_BATCH_DAYS", 2),
+        patch.object(session, "exec", wraps=session.exec) as spy_exec,
+    ):
+        puzzle_jsons = list(
+            iter_puzzle_jsons_in_range(session, start, start + datetime.timedelta(days=4))
+        )
+
+    assert puzzle_jsons == expected
+    assert spy_exec.call_count == 3
+
+
+def test_stored_tiles_reads_either_encoding():
+    """
+    GIVEN a puzzle's racks stored as JSON, and the same puzzle stored compactly
+    WHEN stored_tiles is called on each
+    THEN both should give each tile's letter and value, in rack order.
+    """
+    puzzle = generate_puzzle("2025-08-01")
+    racks = [[tile.model_dump() for tile in rack] for rack in puzzle.initial_racks]
+    compact = encode_puzzle(puzzle.initial_racks, puzzle.target_solution)
+    expected = [(tile.letter, tile.value) for rack in puzzle.initial_racks for tile in rack]
+
+    assert stored_tiles(None, racks) == expected
+    assert stored_tiles(compact, None) == expected
+
+
 ######################
 # get_game_rules tests
 ######################
 
 
-@pytest.fixture()
-def clear_get_stable_game_rules_cache():
-    """Fixture to clear the cache for get_game_rules before each test."""
-    get_stable_game_rules.cache_clear()
-
-
-@pytest.mark.usefixtures("clear_get_stable_game_rules_cache")
 class TestGetStableGameRules:
     @patch("builtins.open", new_callable=mock_open, read_data="timer_seconds: 300\n")
     def test_get_stable_game_rules_success(self, mock_file, session: Session):
@@ -193,6 +534,50 @@ class TestGetStableGameRules:
             assert spy_exec.call_count == 1
             mock_file.assert_called_once()
 
+    @patch("builtins.open", new_callable=mock_open, read_data="timer_seconds: 300\n")
+    def test_get_stable_game_rules_is_shared_across_sessions(self, mock_file, session: Session):
+        """
+        GIVEN the game rules have been loaded once
+        WHEN get_stable_game_rules is called with a different session
+        THEN neither the file nor the DB should be read again.
+        """
+        session.add(
+            PuzzleWithDate(date=datetime.date(2025, 1, 1), initial_racks=[[]], target_solution=[[]])
+        )
+        session.commit()
+        get_stable_game_rules(session)
+
+        other_session = MagicMock(spec=Session)
+        rules = get_stable_game_rules(other_session)
+
+        assert rules["earliest_date"] == "2025-01-01"
+        other_session.exec.assert_not_called()
+        mock_file.assert_called_once()
+
+    @patch("builtins.open", new_callable=mock_open, read_data="timer_seconds: 300\n")
+    def test_get_stable_game_rules_refreshes_after_puzzles_are_added(
+        self, mock_file, session: Session
+    ):
+        """
+        GIVEN cached game rules
+        WHEN an earlier puzzle is added and the puzzle range is invalidated
+        THEN the next call should report the new earliest date.
+        """
+        session.add(
+            PuzzleWithDate(date=datetime.date(2025, 1, 2), initial_racks=[[]], target_solution=[[]])
+        )
+        session.commit()
+        assert get_stable_game_rules(session)["earliest_date"] == "2025-01-02"
+
+        session.add(
+            PuzzleWithDate(date=datetime.date(2025, 1, 1), initial_racks=[[]], target_solution=[[]])
+        )
+        session.commit()
+        assert get_stable_game_rules(session)["earliest_date"] == "2025-01-02"
+
+        invalidate_cached_keys(None, [PUZZLE_RANGE_KEY])
+        assert get_stable_game_rules(session)["earliest_date"] == "2025-01-01"
+
     @patch("builtins.open", side_effect=FileNotFoundError)
     def test_get_stable_game_rules_file_not_found(self, mock_file, session: Session):
         """
@@ -225,6 +610,56 @@ class TestGetStableGameRules:
             get_stable_game_rules(session)
 
 
+class TestGetPuzzleRange:
+    def test_get_puzzle_range_reports_earliest_latest_and_count(self, session: Session):
+        """
+        GIVEN several puzzles in the DB
+        WHEN get_puzzle_range is called
+        THEN it should report the earliest and latest dates and the number of puzzles.
+        """
+        for day in (3, 1, 2):
+            session.add(
+                PuzzleWithDate(
+                    date=datetime.date(2025, 1, day), initial_racks=[[]], target_solution=[[]]
+                )
+            )
+        session.commit()
+
+        assert get_puzzle_range(session) == PuzzleRange(
+            earliest_date=datetime.date(2025, 1, 1), latest_date=datetime.date(2025, 1, 3), count=3
+        )
+
+    def test_puzzle_range_snapshot_expires(self):
+        """
+        GIVEN a PuzzleRangeSnapshot holding a value
+        WHEN its TTL passes
+        THEN it should no longer return the value.
+        """
+        now = [0.0]
+        snapshot = PuzzleRangeSnapshot(clock=lambda: now[0])
+        puzzle_range = PuzzleRange(datetime.date(2025, 1, 1), datetime.date(2025, 1, 1), 1)
+        snapshot.store(puzzle_range, snapshot.get()[1])
+
+        assert snapshot.get()[0] == puzzle_range
+        now[0] = 301.0
+        assert snapshot.get()[0] is None
+
+    def test_puzzle_range_snapshot_discards_values_that_raced_an_invalidation(self):
+        """
+        GIVEN a range that was queried before an invalidation
+        WHEN it is stored afterwards
+        THEN it should be discarded rather than cached.
+        """
+        snapshot = PuzzleRangeSnapshot()
+        _, generation = snapshot.get()
+        snapshot.invalidate()
+        snapshot.store(
+            PuzzleRange(datetime.date(2025, 1, 1), datetime.date(2025, 1, 1), 1), generation
+        )
+
+        assert snapshot.get()[0] is None
+
+
 class TestGetGameRules:
     @patch("app.crud.get_stable_game_rules")
     @patch("app.crud.datetime")
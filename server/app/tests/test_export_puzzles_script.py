@@ -0,0 +1,184 @@
+import datetime
+import gzip
+import stat
+from unittest.mock import patch
+
+import brotli
+from sqlmodel import Session
+from typer.testing import CliRunner
+
+from app.crud import get_puzzle_json_by_date
+from app.scripts.export_puzzles import (
+    app,
+    export_puzzles,
+    exported_path,
+    puzzle_json_from_row,
+    remove_exported_puzzles,
+    write_atomically,
+)
+
+runner = CliRunner()
+
+
+######################
+# export_puzzles tests
+######################
+
+
+def test_export_puzzles_writes_past_puzzles_with_compressed_siblings(
+    session: Session, tmp_path, add_puzzles
+):
+    """
+    GIVEN puzzles for yesterday, today and tomorrow
+    WHEN export_puzzles is called
+    THEN only yesterday's should be exported, as the API's JSON plus identical .gz and .br files.
+    """
+    today = datetime.date.today()
+    yesterday = today - datetime.timedelta(days=1)
+    add_puzzles(yesterday, today, today + datetime.timedelta(days=1))
+
+    written = export_puzzles(session, tmp_path)
+
+    assert written == 1
+    path = exported_path(tmp_path, yesterday)
+    assert sorted(p.name for p in path.parent.iterdir()) == [
+        f"{yesterday.isoformat()}.json",
+        f"{yesterday.isoformat()}.json.br",
+        f"{yesterday.isoformat()}.json.gz",
+    ]
+    expected = get_puzzle_json_by_date(session, yesterday)
+    assert expected is not None
+    data = path.read_bytes()
+    assert data == expected.encode()
+    assert gzip.decompress(path.with_name(path.name + ".gz").read_bytes()) == data
+    assert brotli.decompress(path.with_name(path.name + ".br").read_bytes()) == data
+
+
+def test_export_puzzles_is_incremental(session: Session, tmp_path, add_puzzles):
+    """
+    GIVEN puzzles that have already been exported
+    WHEN export_puzzles is run again, after one of them has been overwritten
+    THEN nothing should be rewritten, unless forced, in which case only the changed one is.
+    """
+    dates = [datetime.date(2025, 8, 1), datetime.date(2025, 8, 2)]
+    add_puzzles(*dates)
+    assert export_puzzles(session, tmp_path) == 2
+
+    add_puzzles(dates[1], letter="B", overwrite=True)
+
+    assert export_puzzles(session, tmp_path) == 0
+    assert export_puzzles(session, tmp_path, force=True) == 1
+    assert '"letter":"B"' in exported_path(tmp_path, dates[1]).read_text()
+
+
+def test_export_puzzles_only_loads_unexported_dates(session: Session, tmp_path, add_puzzles):
+    """
+    GIVEN two exported puzzles, and a newer one that hasn't been exported
+    WHEN export_puzzles is run
+    THEN only the new puzzle should be loaded and written.
+    """
+    dates = [datetime.date(2025, 8, 1), datetime.date(2025, 8, 2), datetime.date(2025, 8, 3)]
+    add_puzzles(*dates[:2])
+    export_puzzles(session, tmp_path)
+    add_puzzles(dates[2])
+
+    with patch(
+        "app.scripts.export_puzzles.puzzle_json_from_row", side_effect=puzzle_json_from_row
+    ) as loaded:
+        assert export_puzzles(session, tmp_path) == 1
+
+    assert [call.args[0][0] for call in loaded.call_args_list] == [dates[2]]
+
+
+def test_remove_exported_puzzles_deletes_compressed_siblings(
+    session: Session, tmp_path, add_puzzles
+):
+    """
+    GIVEN two exported puzzles
+    WHEN one of them is removed, along with a date that was never exported
+    THEN only that puzzle's files should be gone, and it should be exported again next time.
+    """
+    dates = [datetime.date(2025, 8, 1), datetime.date(2025, 8, 2)]
+    add_puzzles(*dates)
+    export_puzzles(session, tmp_path)
+
+    assert remove_exported_puzzles(tmp_path, [dates[1], datetime.date(2025, 7, 1)]) == 1
+
+    assert sorted(p.name for p in (tmp_path / "puzzle").iterdir()) == [
+        "2025-08-01.json",
+        "2025-08-01.json.br",
+        "2025-08-01.json.gz",
+    ]
+    assert export_puzzles(session, tmp_path) == 1
+
+
+def test_export_puzzles_respects_date_range(session: Session, tmp_path, add_puzzles):
+    """
+    GIVEN puzzles for several past dates
+    WHEN export_puzzles is called with a start and end date
+    THEN only that inclusive range should be exported.
+    """
+    add_puzzles(*(datetime.date(2025, 8, day) for day in range(1, 6)))
+
+    written = export_puzzles(
+        session,
+        tmp_path,
+        start_date=datetime.date(2025, 8, 2),
+        end_date=datetime.date(2025, 8, 3),
+    )
+
+    assert written == 2
+    assert sorted(p.name for p in (tmp_path / "puzzle").glob("*.json")) == [
+        "2025-08-02.json",
+        "2025-08-03.json",
+    ]
+
+
+def test_write_atomically_leaves_no_temporary_files(tmp_path):
+    """
+    GIVEN an existing file
+    WHEN it is replaced with write_atomically
+    THEN it should have the new content, be world-readable, and no temporary files should remain.
+    """
+    path = tmp_path / "puzzle.json"
+    path.write_bytes(b"old")
+
+    write_atomically(path, b"new")
+
+    assert path.read_bytes() == b"new"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o644
+    assert [p.name for p in tmp_path.iterdir()] == ["puzzle.json"]
+
+
+###########
+# CLI tests
+###########
+
+
+@patch("app.scripts.export_puzzles.get_session")
+def test_cli_exports_to_directory(mock_get_session, session: Session, tmp_path, add_puzzles):
+    """
+    GIVEN past puzzles
+    WHEN the CLI is run with --directory
+    THEN they should be exported there.
+    """
+    mock_get_session.return_value = iter([session])
+    add_puzzles(datetime.date(2025, 8, 1))
+
+    result = runner.invoke(app, ["--directory", str(tmp_path)])
+
+    assert result.exit_code == 0
+    assert exported_path(tmp_path, datetime.date(2025, 8, 1)).exists()
+
+
+def test_cli_with_reversed_dates_fails(tmp_path):
+    """
+    GIVEN a start date after the end date
+    WHEN the CLI is run
+    THEN it should exit with an error.
+    """
+    result = runner.invoke(
+        app, ["--directory", str(tmp_path), "--start", "2025-08-02", "--end", "2025-08-01"]
+    )
+
+    assert result.exit_code == 1
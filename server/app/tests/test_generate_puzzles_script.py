@@ -7,11 +7,17 @@ import typer
 from sqlmodel import Session, select
 from typer.testing import CliRunner
 
-from app.models import PuzzleWithDate
+from app.constrained_generator import PuzzleConstraints, generate_constrained_puzzle
+from app.crud import redis_key_for_date
+from app.models import PuzzleWithDate, Tile
+from app.puzzle_generator import generate_puzzle
+from app.scripts.export_puzzles import export_puzzles
 from app.scripts.generate_puzzles import (
     app,
     generate_daily_puzzle,
     generate_daily_puzzles,
+    generate_puzzles_for_dates,
+    insert_puzzles,
 )
 
 runner = CliRunner()
@@ -94,6 +100,42 @@ def test_generate_daily_puzzle_uses_date_as_seed(session: Session):
     assert puzzle1.target_solution == puzzle2.target_solution
 
 
+######################
+# insert_puzzles tests
+######################
+
+
+def test_insert_puzzles_ignores_dates_that_already_exist(session: Session):
+    """
+    GIVEN a puzzle that was inserted (e.g. by another process) after we checked for it
+    WHEN insert_puzzles is called with a batch including that date
+    THEN the existing row should be kept, the other rows inserted, and no error raised.
+    """
+    taken_date = datetime.date(2025, 8, 20)
+    existing_racks = [[Tile(id="tile-1", letter="A", value=1)]]
+    session.add(
+        PuzzleWithDate(
+            date=taken_date, initial_racks=existing_racks, target_solution=existing_racks
+        )
+    )
+    session.commit()
+
+    new_date = datetime.date(2025, 8, 21)
+    batch = [
+        (taken_date, generate_puzzle(seed=taken_date.isoformat())),
+        (new_date, generate_puzzle(seed=new_date.isoformat())),
+    ]
+    inserted = insert_puzzles(session, batch)
+    session.commit()
+    session.expire_all()
+
+    assert inserted == 1
+    assert session.get(PuzzleWithDate, taken_date).initial_racks == existing_racks
+    new_puzzle = session.get(PuzzleWithDate, new_date)
+    assert new_puzzle is not None
+    assert new_puzzle.initial_racks == batch[1][1].initial_racks
+
+
 ##############################
 # generate_daily_puzzles_tests
 ##############################
@@ -122,6 +164,99 @@ def test_generate_daily_puzzles_generates_for_range(mock_get_session, session: S
     }
 
 
+@patch("app.scripts.generate_puzzles.get_session")
+def test_generate_daily_puzzles_commits_in_chunks(mock_get_session, session: Session, caplog):
+    """
+    GIVEN a chunk size smaller than the number of dates
+    WHEN generate_daily_puzzles is called
+    THEN it should commit once per full chunk plus once at the end, and report throughput.
+    """
+    caplog.set_level(logging.INFO)
+    mock_get_session.return_value = iter([session])
+
+    with patch.object(session, "commit", wraps=session.commit) as spy_commit:
+        generate_daily_puzzles(datetime.date(2025, 9, 1), datetime.date(2025, 9, 5), chunk_size=2)
+
+    assert spy_commit.call_count == 3
+    assert len(session.exec(select(PuzzleWithDate)).all()) == 5
+    assert "Generated 5 puzzles in" in caplog.text
+    assert "puzzles/sec" in caplog.text
+
+
+def test_generate_puzzles_for_dates_with_workers_matches_sequential():
+    """
+    GIVEN a range of dates
+    WHEN puzzles are generated in a process pool
+    THEN they should come back in date order and match puzzles generated in-process.
+    """
+    dates = [datetime.date(2025, 10, 1) + datetime.timedelta(days=i) for i in range(12)]
+
+    results = list(generate_puzzles_for_dates(dates, workers=2))
+
+    assert [date for date, _ in results] == dates
+    for date, puzzle in results:
+        assert puzzle == generate_puzzle(seed=date.isoformat())
+
+
+@patch("app.scripts.generate_puzzles.get_session")
+def test_generate_daily_puzzles_only_generates_missing_dates(mock_get_session, session: Session):
+    """
+    GIVEN a date range where some dates already have puzzles
+    WHEN generate_daily_puzzles is called
+    THEN it should look up existing dates in a single query and only generate the gaps.
+    """
+    mock_get_session.return_value = iter([session])
+    existing_date = datetime.date(2025, 9, 2)
+    session.add(PuzzleWithDate(date=existing_date, initial_racks=[[]], target_solution=[[]]))
+    session.commit()
+
+    with (
+        patch.object(session, "get", wraps=session.get) as spy_get,
+        patch(
+            "app.scripts.generate_puzzles.generate_puzzle_for_date",
+            side_effect=lambda date: generate_puzzle(seed=date.isoformat()),
+        ) as spy_generate,
+    ):
+        generate_daily_puzzles(datetime.date(2025, 9, 1), datetime.date(2025, 9, 3))
+
+    spy_get.assert_not_called()
+    assert [call.args[0] for call in spy_generate.call_args_list] == [
+        datetime.date(2025, 9, 1),
+        datetime.date(2025, 9, 3),
+    ]
+    assert len(session.exec(select(PuzzleWithDate.date)).all()) == 3
+
+
+@patch("app.scripts.generate_puzzles.get_redis_client")
+@patch("app.scripts.generate_puzzles.get_session")
+def test_generate_daily_puzzles_overwrite_replaces_and_invalidates(
+    mock_get_session, mock_get_redis_client, session: Session, fake_redis, tmp_path
+):
+    """
+    GIVEN a date with an existing (cached and exported) puzzle
+    WHEN generate_daily_puzzles is called with overwrite=True
+    THEN the puzzle should be regenerated, and its cache entry and exported files dropped.
+    """
+    mock_get_session.return_value = iter([session])
+    mock_get_redis_client.return_value = fake_redis
+    test_date = datetime.date(2025, 9, 2)
+    stale_racks = [[Tile(id="tile-1", letter="A", value=1)]]
+    session.add(
+        PuzzleWithDate(date=test_date, initial_racks=stale_racks, target_solution=stale_racks)
+    )
+    session.commit()
+    fake_redis.set(redis_key_for_date(test_date), "stale")
+    assert export_puzzles(session, tmp_path) == 1
+
+    generate_daily_puzzles(test_date, test_date, overwrite=True, export_directory=tmp_path)
+    session.expire_all()
+
+    puzzle = session.get(PuzzleWithDate, test_date)
+    assert puzzle.target_solution == generate_puzzle(seed=test_date.isoformat()).target_solution
+    assert fake_redis.get(redis_key_for_date(test_date)) is None
+    assert list((tmp_path / "puzzle").iterdir()) == []
+
+
 def test_generate_daily_puzzles_raises_error_for_bad_range():
     """
     GIVEN a start date that is after the end date
@@ -252,6 +387,72 @@ def test_cli_with_end_and_days_options(mock_get_session, mock_create_db, session
     }
 
 
+@patch("app.scripts.generate_puzzles.create_db_and_tables")
+@patch("app.scripts.generate_puzzles.get_session")
+def test_cli_with_workers_option(mock_get_session, mock_create_db, session: Session):
+    """
+    GIVEN a --workers argument
+    WHEN the script is run
+    THEN it should generate the same puzzles as a single-process run.
+    """
+    mock_get_session.return_value = iter([session])
+
+    result = runner.invoke(
+        app, ["--start", "2025-11-01", "--days", "4", "--workers", "2", "--chunk-size", "3"]
+    )
+
+    assert result.exit_code == 0, result.stdout
+    puzzles = session.exec(select(PuzzleWithDate).order_by(PuzzleWithDate.date)).all()
+    assert [p.date for p in puzzles] == [datetime.date(2025, 11, d) for d in range(1, 5)]
+    for puzzle in puzzles:
+        expected = generate_puzzle(seed=puzzle.date.isoformat())
+        assert puzzle.initial_racks == expected.initial_racks
+        assert puzzle.target_solution == expected.target_solution
+
+
+@patch("app.scripts.generate_puzzles.create_db_and_tables")
+@patch("app.scripts.generate_puzzles.get_session")
+def test_cli_with_constraints(mock_get_session, mock_create_db, session: Session):
+    """
+    GIVEN difficulty constraint options
+    WHEN the script is run, with or without workers
+    THEN it should store the puzzles generate_constrained_puzzle gives for those constraints.
+    """
+    mock_get_session.side_effect = lambda: iter([session])
+    options = ["--max-score", "100", "--min-vowel-ratio", "0.35"]
+
+    result = runner.invoke(app, ["--start", "2025-11-01", "--days", "2", *options])
+    assert result.exit_code == 0, result.stdout
+    result = runner.invoke(
+        app, ["--start", "2025-11-03", "--days", "2", "--workers", "2", *options]
+    )
+    assert result.exit_code == 0, result.stdout
+
+    constraints = PuzzleConstraints(max_score=100, min_vowel_ratio=0.35)
+    puzzles = session.exec(select(PuzzleWithDate).order_by(PuzzleWithDate.date)).all()
+    assert [p.date for p in puzzles] == [datetime.date(2025, 11, d) for d in range(1, 5)]
+    for puzzle in puzzles:
+        expected = generate_constrained_puzzle(puzzle.date.isoformat(), constraints)
+        assert puzzle.initial_racks == expected.initial_racks
+        assert puzzle.target_solution == expected.target_solution
+
+
+@patch("app.scripts.generate_puzzles.create_db_and_tables")
+@patch("app.scripts.generate_puzzles.get_session")
+def test_cli_rejects_inverted_constraints(mock_get_session, mock_create_db, session: Session):
+    """
+    GIVEN a minimum score above the maximum
+    WHEN the script is run
+    THEN it should exit with an error without generating anything.
+    """
+    mock_get_session.return_value = iter([session])
+
+    result = runner.invoke(app, ["--min-score", "120", "--max-score", "100"])
+
+    assert result.exit_code == 1
+    assert session.exec(select(PuzzleWithDate)).all() == []
+
+
 @patch("app.scripts.generate_puzzles.create_db_and_tables")
 @patch("app.scripts.generate_puzzles.get_session")
 def test_cli_is_idempotent(mock_get_session, mock_create_db, session: Session, caplog):
@@ -0,0 +1,109 @@
+import datetime
+import time
+
+import pytest
+
+from app.http_caching import (
+    IMMUTABLE_MAX_AGE,
+    choose_encoding,
+    etag_matches,
+    make_etag,
+    puzzle_cache_control,
+    seconds_until_local_midnight,
+)
+
+
+@pytest.fixture()
+def chicago_time(monkeypatch):
+    """Run the test with the local timezone set to the one production uses."""
+    monkeypatch.setenv("TZ", "America/Chicago")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_make_etag_is_strong_and_content_based():
+    """
+    WHEN ETags are made for two bodies
+    THEN they should be quoted strong validators that differ only if the content differs.
+    """
+    etag = make_etag('{"a":1}')
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag('{"a":1}')
+    assert etag != make_etag('{"a":2}')
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected",
+    [
+        (None, False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"xyz", "abc"', True),
+        ('"xyz"', False),
+        ("*", True),
+    ],
+)
+def test_etag_matches(if_none_match, expected):
+    """
+    GIVEN various If-None-Match headers
+    WHEN compared against the ETag "abc"
+    THEN they should match using weak comparison.
+    """
+    assert etag_matches(if_none_match, '"abc"') is expected
+
+
+@pytest.mark.usefixtures("chicago_time")
+def test_seconds_until_local_midnight():
+    """
+    GIVEN a local time one hour before midnight
+    WHEN seconds_until_local_midnight is called
+    THEN it should return one hour.
+    """
+    assert seconds_until_local_midnight(datetime.datetime(2025, 8, 1, 23, 0)) == 3600
+
+
+@pytest.mark.usefixtures("chicago_time")
+def test_seconds_until_local_midnight_across_dst_change():
+    """
+    GIVEN a local time on the day clocks spring forward
+    WHEN seconds_until_local_midnight is called
+    THEN the lost hour should not be counted.
+    """
+    # 2025-03-09 is 23 hours long in America/Chicago.
+    assert seconds_until_local_midnight(datetime.datetime(2025, 3, 9, 0, 30)) == 22.5 * 3600
+
+
+def test_puzzle_cache_control():
+    """
+    GIVEN the current time
+    WHEN puzzle_cache_control is called for a past date and for today
+    THEN past puzzles should be immutable and today's should expire at midnight.
+    """
+    now = datetime.datetime(2025, 8, 1, 23, 59, 0)
+    assert puzzle_cache_control(datetime.date(2025, 7, 31), now) == (
+        f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    )
+    assert puzzle_cache_control(datetime.date(2025, 8, 1), now) == "public, max-age=60"
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, "identity"),
+        ("gzip, deflate", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0, gzip", "gzip"),
+        ("gzip;q=0.5, br;q=0.1", "br"),
+        ("*", "br"),
+        ("identity", "identity"),
+    ],
+)
+def test_choose_encoding(accept_encoding, expected):
+    """
+    GIVEN various Accept-Encoding headers
+    WHEN choose_encoding is called with brotli and gzip available
+    THEN it should pick brotli over gzip whenever it's allowed, and never a refused coding.
+    """
+    assert choose_encoding(accept_encoding, ["identity", "gzip", "br"]) == expected
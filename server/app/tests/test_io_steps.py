@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from app.io_steps import Pause, Steps, run, run_async
+
+
+class Failure(Exception):
+    pass
+
+
+def flow(log: list[str], call) -> Steps[str]:
+    """Makes one call, logging how it ended and the cleanup call its `finally` block makes."""
+    try:
+        result = yield call
+        log.append(f"result {result}")
+        return result
+    except Failure:
+        log.append("failed")
+        return "recovered"
+    finally:
+        log.append(f"cleanup {(yield 'cleanup')}")
+
+
+def test_run_sends_results_back():
+    """
+    GIVEN a flow whose call has already been made by a sync client
+    WHEN it's run
+    THEN the result should be sent straight back, and the cleanup should run.
+    """
+    log: list[str] = []
+
+    assert run(flow(log, "value")) == "value"
+    assert log == ["result value", "cleanup cleanup"]
+
+
+def test_run_async_throws_errors_into_the_flow():
+    """
+    GIVEN a flow whose async call fails
+    WHEN it's run with run_async
+    THEN the error should be thrown into the flow, which can handle it and still clean up.
+    """
+    log: list[str] = []
+
+    async def fail():
+        raise Failure
+
+    assert asyncio.run(run_async(flow(log, fail()))) == "recovered"
+    assert log == ["failed", "cleanup cleanup"]
+
+
+def test_run_async_abandons_the_flow_when_cancelled():
+    """
+    GIVEN a flow waiting on an async call
+    WHEN its task is cancelled
+    THEN the cancellation should propagate rather than reach the flow's handlers, and the flow
+    should be closed, with its cleanup run but its cleanup call dropped.
+    """
+    log: list[str] = []
+
+    async def main():
+        task = asyncio.create_task(run_async(flow(log, asyncio.sleep(10))))
+        await asyncio.sleep(0)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(main())
+    assert log == ["cleanup None"]
+
+
+def test_pauses_are_slept_in_both_drivers():
+    """
+    GIVEN a flow that pauses
+    WHEN it's run by both drivers
+    THEN it should resume after the pause with nothing sent back.
+    """
+
+    def pausing() -> Steps[object]:
+        return (yield Pause(0))
+
+    assert run(pausing()) is None
+    assert asyncio.run(run_async(pausing())) is None
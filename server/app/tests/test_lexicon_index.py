@@ -0,0 +1,151 @@
+import mmap
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+
+from app.lexicon_index import (
+    LexiconIndex,
+    LexiconIndexError,
+    compile_lexicon_index,
+    get_lexicon_index,
+)
+from app.settings import get_settings
+from app.wordlist import words_by_length
+
+FULL = {3: ["ACT", "CAT", "DOG", "GOD", "TAC"], 4: ["BIRD", "COAT", "TACO"], 5: ["HORSE"]}
+COMMON = {3: ["CAT", "DOG"], 4: ["TACO"]}
+
+
+@pytest.fixture(name="index")
+def index_fixture() -> LexiconIndex:
+    return LexiconIndex.from_words(FULL, COMMON)
+
+
+@pytest.fixture(autouse=True)
+def clear_get_lexicon_index_cache():
+    """Some tests replace the index file, so don't let a mapped one leak into other tests."""
+    get_lexicon_index.cache_clear()
+    yield
+    get_lexicon_index.cache_clear()
+
+
+def test_lexicon_index_membership(index: LexiconIndex):
+    """
+    GIVEN an index compiled from a few words
+    WHEN words are looked up
+    THEN only those words should be found, in any case.
+    """
+    assert "CAT" in index
+    assert "bird" in index
+    assert "COW" not in index
+    assert "CATS" not in index
+    assert "TCA" not in index
+    assert "C-T" not in index
+    assert "" not in index
+    assert len(index) == 9
+
+
+def test_lexicon_index_anagram_lookups(index: LexiconIndex):
+    """
+    GIVEN an index with several sets of anagrams
+    WHEN anagrams are looked up
+    THEN all of them should be found, alphabetically, and only common ones if asked.
+    """
+    assert index.anagrams("tca") == ["ACT", "CAT", "TAC"]
+    assert index.anagrams("ACT", common=True) == ["CAT"]
+    assert index.anagrams("OCTA") == ["COAT", "TACO"]
+    assert index.anagrams("XYZ") == []
+    assert index.lookup("ACT") == "ACT"
+    assert index.lookup("DGO") == "DOG"
+    assert index.lookup("ABC") is None
+    assert index.is_common("taco")
+    assert not index.is_common("COAT")
+
+
+def test_lexicon_index_words_within(index: LexiconIndex):
+    """
+    GIVEN an index and some tiles
+    WHEN the words the tiles can spell are looked up
+    THEN every word using a sub-multiset of the tiles should be found, shortest first.
+    """
+    tiles = "TACOGDX"
+    expected = [
+        word for bucket in FULL.values() for word in bucket if not Counter(word) - Counter(tiles)
+    ]
+
+    within = index.words_within(tiles)
+
+    assert sorted(within) == sorted(expected)
+    assert [len(word) for word in within] == sorted(len(word) for word in within)
+    assert index.words_within(tiles, lengths=[4]) == ["COAT", "TACO"]
+    assert index.words_within(tiles, lengths=[4], common=True) == ["TACO"]
+    assert index.words_within(tiles, lengths=[7]) == []
+
+
+def test_lexicon_index_rejects_other_files():
+    """
+    GIVEN bytes that aren't a compiled index, or one cut short
+    WHEN they're opened
+    THEN a LexiconIndexError should be raised.
+    """
+    data = compile_lexicon_index(FULL, COMMON, "0" * 64)
+
+    with pytest.raises(LexiconIndexError):
+        LexiconIndex(b"not an index at all, but long enough to have a header in it")
+    with pytest.raises(LexiconIndexError):
+        LexiconIndex(data[: len(data) // 2])
+
+
+def test_get_lexicon_index_compiles_and_maps_the_word_lists():
+    """
+    GIVEN the real word lists, and no compiled index yet
+    WHEN the index is requested
+    THEN it should be compiled to the configured path, memory-mapped, and contain every word.
+    """
+    path = get_settings().lexicon_index_path
+    path.unlink(missing_ok=True)
+
+    index = get_lexicon_index()
+
+    assert path.exists()
+    assert isinstance(index.buffer, mmap.mmap)
+    config_directory = get_settings().config_directory
+    full_words = words_by_length((config_directory / "words-full.txt").read_text())
+    common_words = words_by_length((config_directory / "words-common.txt").read_text())
+    assert len(index) == sum(len(words) for words in full_words.values())
+    assert all(word in index for words in full_words.values() for word in words)
+    assert all(index.is_common(word) for words in common_words.values() for word in words)
+    assert "ZYZZYVA" not in index
+
+
+def test_get_lexicon_index_recompiles_stale_or_corrupt_files():
+    """
+    GIVEN a compiled index from other word lists, or a corrupt one
+    WHEN the index is requested
+    THEN it should be compiled again from the current word lists.
+    """
+    path = get_settings().lexicon_index_path
+    for stale in (compile_lexicon_index(FULL, COMMON, "0" * 64), b"garbage"):
+        path.write_bytes(stale)
+        get_lexicon_index.cache_clear()
+
+        index = get_lexicon_index()
+
+        assert index.version == get_lexicon_index.version
+        assert "AAH" in index
+
+
+def test_get_lexicon_index_falls_back_to_memory_if_it_cannot_write():
+    """
+    GIVEN no compiled index, and a path that can't be written to
+    WHEN the index is requested
+    THEN it should be compiled in memory instead.
+    """
+    get_settings().lexicon_index_path.unlink(missing_ok=True)
+
+    with patch("app.lexicon_index.write_lexicon_index", side_effect=PermissionError("read-only")):
+        index = get_lexicon_index()
+
+    assert isinstance(index.buffer, bytes)
+    assert "AAH" in index
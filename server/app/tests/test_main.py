@@ -1,6 +1,7 @@
 """Tests for API endpoints found in main.py"""
 
 import datetime
+import json
 from unittest.mock import patch
 
 import yaml
@@ -8,7 +9,13 @@ from fastapi.testclient import TestClient
 from sqlalchemy.exc import NoResultFound
 from sqlmodel import Session
 
+from app import crud
+from app.cache import get_redis_client
+from app.crud import redis_key_for_date
+from app.main import app
 from app.models import PuzzleWithDate, Tile
+from app.puzzle_generator import generate_puzzle
+from app.settings import Settings
 
 ###########################
 # get_puzzle__by_date tests
@@ -40,6 +47,60 @@ def test_get_puzzle_success(session: Session, client: TestClient):
     assert data["targetSolution"] == [[{"id": "tile-1", "letter": "A", "value": 1}]]
 
 
+def test_get_puzzle_serves_cached_json_verbatim(client: TestClient, fake_redis):
+    """
+    GIVEN a puzzle is already cached in Redis
+    WHEN a GET request is made to /api/puzzle/{date}
+    THEN the cached JSON should be returned byte-for-byte as the response body.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    cached = PuzzleWithDate(
+        date=test_date,
+        initial_racks=[[Tile(id="tile-1", letter="B", value=2)]],
+        target_solution=[[Tile(id="tile-1", letter="B", value=2)]],
+    ).model_dump_json()
+    fake_redis.set(redis_key_for_date(test_date), cached)
+    app.dependency_overrides[get_redis_client] = lambda: fake_redis
+
+    response = client.get(f"/api/puzzle/{test_date.isoformat()}")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == cached.encode()
+    assert response.json()["initialRacks"] == [[{"id": "tile-1", "letter": "B", "value": 2}]]
+
+
+def test_get_past_puzzle_is_cacheable_and_supports_if_none_match(
+    session: Session, client: TestClient
+):
+    """
+    GIVEN a puzzle for a past date
+    WHEN it is requested, and then requested again with its ETag in If-None-Match
+    THEN the first response should be immutable with an ETag, and the second a bodyless 304.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    racks = [[Tile(id="tile-1", letter="A", value=1)]]
+    session.add(PuzzleWithDate(date=test_date, initial_racks=racks, target_solution=racks))
+    session.commit()
+
+    response = client.get(f"/api/puzzle/{test_date.isoformat()}")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+
+    revalidated = client.get(
+        f"/api/puzzle/{test_date.isoformat()}", headers={"If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+    changed = client.get(
+        f"/api/puzzle/{test_date.isoformat()}", headers={"If-None-Match": '"stale"'}
+    )
+    assert changed.status_code == 200
+
+
 def test_get_puzzle_not_found(client: TestClient):
     """
     GIVEN no puzzle exists for a specific date
@@ -73,6 +134,131 @@ def test_get_puzzle_future_date(client: TestClient):
     assert "No spoilers!" in response.json()["detail"]
 
 
+###################
+# get_puzzles tests
+###################
+
+
+def add_puzzles(session: Session, dates: list[datetime.date]):
+    racks = [[Tile(id="tile-1", letter="A", value=1)]]
+    for date in dates:
+        session.add(PuzzleWithDate(date=date, initial_racks=racks, target_solution=racks))
+    session.commit()
+    session.expunge_all()
+
+
+def test_get_puzzles_returns_range_in_order(session: Session, client: TestClient):
+    """
+    GIVEN puzzles for some dates in a past range
+    WHEN a GET request is made to /api/puzzles with that range
+    THEN it should return the existing puzzles in date order, as an immutable response.
+    """
+    add_puzzles(session, [datetime.date(2025, 8, 3), datetime.date(2025, 8, 1)])
+
+    response = client.get("/api/puzzles", params={"start": "2025-08-01", "end": "2025-08-04"})
+
+    assert response.status_code == 200
+    assert [puzzle["date"] for puzzle in response.json()] == ["2025-08-01", "2025-08-03"]
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["etag"]
+
+
+def test_get_puzzles_defaults_end_to_today(session: Session, client: TestClient):
+    """
+    GIVEN a puzzle for today
+    WHEN a GET request is made to /api/puzzles with only a start date
+    THEN the range should end today, and the response should not be immutable.
+    """
+    today = datetime.date.today()
+    add_puzzles(session, [today])
+
+    response = client.get("/api/puzzles", params={"start": today.isoformat()})
+
+    assert response.status_code == 200
+    assert [puzzle["date"] for puzzle in response.json()] == [today.isoformat()]
+    assert "immutable" not in response.headers["cache-control"]
+
+
+def test_get_puzzles_rejects_bad_ranges(client: TestClient):
+    """
+    GIVEN a range ending in the future, a reversed range, or one that's too long
+    WHEN a GET request is made to /api/puzzles
+    THEN it should return a 403 for the spoiler, and a 400 for the others.
+    """
+    today = datetime.date.today()
+    tomorrow = today + datetime.timedelta(days=1)
+
+    spoiler = client.get(
+        "/api/puzzles", params={"start": today.isoformat(), "end": tomorrow.isoformat()}
+    )
+    assert spoiler.status_code == 403
+    assert "No spoilers!" in spoiler.json()["detail"]
+
+    reversed_range = client.get("/api/puzzles", params={"start": "2025-08-02", "end": "2025-08-01"})
+    assert reversed_range.status_code == 400
+
+    too_long = client.get("/api/puzzles", params={"start": "2000-01-01", "end": "2025-08-01"})
+    assert too_long.status_code == 400
+
+
+def test_stream_puzzles_returns_ndjson(session: Session, client: TestClient):
+    """
+    GIVEN puzzles for some dates in a long past range
+    WHEN a GET request is made to /api/puzzles/stream
+    THEN it should stream one puzzle per line, in date order, beyond /api/puzzles's limit.
+    """
+    add_puzzles(session, [datetime.date(2020, 1, 1), datetime.date(2025, 8, 1)])
+
+    response = client.get(
+        "/api/puzzles/stream", params={"start": "2019-01-01", "end": "2025-08-01"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert [json.loads(line)["date"] for line in lines] == ["2020-01-01", "2025-08-01"]
+
+
+def test_stream_puzzles_clamps_range_to_existing_puzzles(session: Session, client: TestClient):
+    """
+    GIVEN puzzles for a few days
+    WHEN the stream is requested from the year 1
+    THEN only the days that have puzzles should be looked up, in a single batch.
+    """
+    add_puzzles(session, [datetime.date(2025, 8, 1), datetime.date(2025, 8, 3)])
+
+    with patch("app.crud.get_puzzle_jsons_for_dates", wraps=crud.get_puzzle_jsons_for_dates) as spy:
+        response = client.get(
+            "/api/puzzles/stream", params={"start": "0001-01-01", "end": "2025-08-05"}
+        )
+
+    assert response.status_code == 200
+    assert [json.loads(line)["date"] for line in response.text.splitlines()] == [
+        "2025-08-01",
+        "2025-08-03",
+    ]
+    spy.assert_called_once()
+    assert spy.call_args.args[1] == [datetime.date(2025, 8, day) for day in (1, 2, 3)]
+
+
+def test_stream_puzzles_limits_clamped_range(session: Session, client: TestClient):
+    """
+    GIVEN puzzles spanning longer than the stream's limit, and no puzzles at all
+    WHEN the stream is requested
+    THEN a range still too long once clamped should get a 400, and an empty archive nothing.
+    """
+    empty = client.get("/api/puzzles/stream", params={"start": "0001-01-01"})
+    add_puzzles(session, [datetime.date(2025, 8, 1), datetime.date(2025, 9, 1)])
+
+    with patch("app.route_helpers.get_settings", return_value=Settings(puzzles_stream_max_days=7)):
+        too_long = client.get("/api/puzzles/stream", params={"start": "0001-01-01"})
+        within = client.get("/api/puzzles/stream", params={"start": "2025-08-26"})
+
+    assert empty.status_code == 200 and empty.text == ""
+    assert too_long.status_code == 400
+    assert [json.loads(line)["date"] for line in within.text.splitlines()] == ["2025-09-01"]
+
+
 #########################
 # get_todays_puzzle tests
 #########################
@@ -102,6 +288,26 @@ def test_get_todays_puzzle_success(session: Session, client: TestClient):
     assert data["targetSolution"] == [[{"id": "tile-1", "letter": "T", "value": 1}]]
 
 
+def test_get_todays_puzzle_expires_at_midnight(session: Session, client: TestClient):
+    """
+    GIVEN a puzzle for today
+    WHEN a GET request is made to /api/puzzle/today
+    THEN it should be cacheable, but not immutable and not past the next local midnight.
+    """
+    today = datetime.date.today()
+    racks = [[Tile(id="tile-1", letter="T", value=1)]]
+    session.add(PuzzleWithDate(date=today, initial_racks=racks, target_solution=racks))
+    session.commit()
+
+    response = client.get("/api/puzzle/today")
+
+    cache_control = response.headers["cache-control"]
+    assert cache_control.startswith("public, max-age=")
+    assert "immutable" not in cache_control
+    assert 0 <= int(cache_control.removeprefix("public, max-age=")) <= 25 * 60 * 60
+    assert response.headers["etag"]
+
+
 def test_get_todays_puzzle_not_found(client: TestClient):
     """
     GIVEN no puzzle exists for today
@@ -113,6 +319,148 @@ def test_get_todays_puzzle_not_found(client: TestClient):
     assert "Puzzle not found" in response.json()["detail"]
 
 
+#######################
+# get_cache_stats tests
+#######################
+
+
+def test_get_cache_stats_reports_each_tier(session: Session, client: TestClient):
+    """
+    GIVEN a puzzle that has been requested twice
+    WHEN a GET request is made to /cache/stats
+    THEN it should report one miss and one hit for the in-process tier, and not be under /api
+        (which is public).
+    """
+    test_date = datetime.date(2025, 8, 1)
+    racks = [[Tile(id="tile-1", letter="A", value=1)]]
+    session.add(PuzzleWithDate(date=test_date, initial_racks=racks, target_solution=racks))
+    session.commit()
+
+    client.get(f"/api/puzzle/{test_date.isoformat()}")
+    client.get(f"/api/puzzle/{test_date.isoformat()}")
+    response = client.get("/cache/stats")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["local"]["hits"] == 1
+    assert data["local"]["misses"] == 1
+    assert data["local"]["size"] == 1
+    assert data["redis"] == {"hits": 0, "misses": 0, "hitRate": 0.0}
+    assert client.get("/api/cache/stats").status_code == 404
+
+
+#####################
+# score_puzzle tests
+#####################
+
+
+def add_generated_puzzle(session: Session, date: datetime.date) -> list[list[str]]:
+    """Saves a generated puzzle, and returns the tile ids of its target solution."""
+    puzzle = generate_puzzle(date.isoformat())
+    session.add(
+        PuzzleWithDate(
+            date=date, initial_racks=puzzle.initial_racks, target_solution=puzzle.target_solution
+        )
+    )
+    session.commit()
+    session.expunge_all()
+    return [[tile.id for tile in rack] for rack in puzzle.target_solution]
+
+
+def test_score_puzzle_scores_target_solution(session: Session, client: TestClient):
+    """
+    GIVEN a generated puzzle
+    WHEN its target solution is submitted to /api/puzzle/{date}/score
+    THEN every rack should be valid, and the total should equal the target score.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    racks = add_generated_puzzle(session, test_date)
+
+    response = client.post(f"/api/puzzle/{test_date.isoformat()}/score", json={"racks": racks})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert all(rack["valid"] for rack in data["racks"])
+    assert data["totalScore"] == data["targetScore"] > 0
+
+
+def test_score_puzzle_errors(session: Session, client: TestClient):
+    """
+    GIVEN a puzzle
+    WHEN a submission uses a tile that isn't in it, or is for a missing or future puzzle
+    THEN it should return a 422, 404, or 403 respectively.
+    """
+    test_date = datetime.date(2025, 8, 1)
+    add_generated_puzzle(session, test_date)
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    body = {"racks": [["tile-99"], [], [], []]}
+
+    assert client.post(f"/api/puzzle/{test_date.isoformat()}/score", json=body).status_code == 422
+    assert client.post("/api/puzzle/2025-08-02/score", json=body).status_code == 404
+    assert client.post(f"/api/puzzle/{tomorrow.isoformat()}/score", json=body).status_code == 403
+
+
+def test_score_puzzles_batch(session: Session, client: TestClient):
+    """
+    GIVEN puzzles for two dates
+    WHEN submissions for both, and for a missing date, are posted to /api/puzzles/score
+    THEN each should get its result or error, in order.
+    """
+    dates = [datetime.date(2025, 8, 1), datetime.date(2025, 8, 3)]
+    racks = [add_generated_puzzle(session, date) for date in dates]
+    submissions = [
+        {"date": dates[1].isoformat(), "racks": racks[1]},
+        {"date": "2025-08-02", "racks": racks[0]},
+        {"date": dates[0].isoformat(), "racks": racks[0]},
+    ]
+
+    response = client.post("/api/puzzles/score", json={"submissions": submissions})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["date"] for item in results] == ["2025-08-03", "2025-08-02", "2025-08-01"]
+    assert results[0]["result"]["totalScore"] == results[0]["result"]["targetScore"]
+    assert results[1]["result"] is None and "not found" in results[1]["error"]
+    assert results[2]["error"] is None
+
+
+####################
+# get_wordlist tests
+####################
+
+
+def test_get_wordlist_serves_precompressed_body(client: TestClient):
+    """
+    GIVEN a client that accepts brotli
+    WHEN a GET request is made to /api/wordlist
+    THEN it should get the brotli body, with an ETag that must be revalidated.
+    """
+    response = client.get("/api/wordlist", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["cache-control"] == "public, no-cache"
+    assert "Accept-Encoding" in response.headers["vary"]
+    data = response.json()
+    assert response.headers["etag"] == f'"{data["version"]}-br"'
+    assert data["buckets"]["3"].startswith("0AAH")
+
+
+def test_get_wordlist_revalidates_with_etag(client: TestClient):
+    """
+    GIVEN a client that has already downloaded the gzipped word list
+    WHEN it requests it again with the ETag in If-None-Match
+    THEN it should get a bodyless 304.
+    """
+    headers = {"Accept-Encoding": "gzip"}
+    etag = client.get("/api/wordlist", headers=headers).headers["etag"]
+
+    response = client.get("/api/wordlist", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
 ##################
 # get_config tests
 ##################
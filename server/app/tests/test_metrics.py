@@ -0,0 +1,209 @@
+import datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError as RedisConnectionError
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from app import crud
+from app.metrics import (
+    Counter,
+    Histogram,
+    Sampled,
+    generation_run_metrics,
+    instrument_engine,
+    puzzle_dates,
+    query_duration,
+    query_errors,
+    redis_errors,
+    request_duration,
+    write_textfile,
+)
+from app.scripts.generate_puzzles import generate_daily_puzzles
+from app.settings import Settings
+
+
+def sample_value(body: str, sample: str) -> float:
+    """Returns the value of the sample line starting with `sample` (its name and labels)."""
+    for line in body.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{sample} not found")
+
+
+###############
+# Metric tests
+###############
+
+
+def test_histogram_renders_cumulative_buckets():
+    """
+    GIVEN a histogram with a few observations, including one beyond every bucket
+    WHEN it is rendered
+    THEN each bucket should count the values up to its bound, with the sum and count at the end.
+    """
+    histogram = Histogram("test_seconds", "A test.", labels=("route",), buckets=(0.1, 1.0))
+    series = histogram.series("/a")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        series.observe(value)
+
+    assert list(histogram.render()) == [
+        "# HELP test_seconds A test.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{route="/a",le="0.1"} 2',
+        'test_seconds_bucket{route="/a",le="1.0"} 3',
+        'test_seconds_bucket{route="/a",le="+Inf"} 4',
+        'test_seconds_sum{route="/a"} 3.65',
+        'test_seconds_count{route="/a"} 4',
+    ]
+    assert histogram.series("/a") is series
+
+
+def test_counters_render_labels():
+    """
+    GIVEN a counter with fixed label values, and a sampled metric with an awkward label value
+    WHEN they are rendered
+    THEN every label value should be present, escaped where necessary.
+    """
+    counter = Counter("test_total", "A test.", "result", ("hit", "miss"))
+    counter.inc("hit")
+    counter.inc("hit", 2)
+    sampled = Sampled("test_state", "A test.", lambda: {'say "hi"': 1}, label="state")
+
+    assert list(counter.samples()) == ['test_total{result="hit"} 3', 'test_total{result="miss"} 0']
+    assert list(sampled.samples()) == ['test_state{state="say \\"hi\\""} 1']
+    with pytest.raises(KeyError):
+        counter.inc("error")
+
+
+def test_instrument_engine_times_statements(session: Session):
+    """
+    GIVEN an instrumented engine
+    WHEN statements are executed, one of which fails
+    THEN each should be timed, and the failure counted.
+    """
+    engine = session.get_bind()
+    instrument_engine(engine)
+    instrument_engine(engine)  # Instrumenting twice changes nothing.
+    count = sum(query_duration._only.counts)
+    errors = query_errors.values[None]
+
+    session.exec(text("SELECT 1"))  # type: ignore[call-overload]
+    with pytest.raises(OperationalError):
+        session.exec(text("SELECT * FROM no_such_table"))  # type: ignore[call-overload]
+
+    assert sum(query_duration._only.counts) == count + 1
+    assert query_errors.values[None] == errors + 1
+
+
+########################
+# Instrumentation tests
+########################
+
+
+def test_metrics_endpoint_reports_requests_by_route(client: TestClient):
+    """
+    GIVEN requests to a parameterized route
+    WHEN a GET request is made to /metrics
+    THEN it should be in the Prometheus text format, with the requests counted under the route's
+        template, and the thread pool's state.
+    """
+    sample = 'lexo_http_request_duration_seconds_count{method="GET",route="/api/puzzle/{date}"}'
+    before = sum(request_duration.series("GET", "/api/puzzle/{date}").counts)
+
+    client.get("/api/puzzle/2025-08-01")
+    client.get("/api/puzzle/2025-08-02")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert sample_value(response.text, sample) == before + 2
+    assert sample_value(response.text, 'lexo_threadpool_threads{state="capacity"}') > 0
+    assert "# TYPE lexo_redis_lookups_total counter" in response.text
+
+
+def test_redis_errors_are_counted(session: Session):
+    """
+    GIVEN a Redis client that fails
+    WHEN a puzzle is looked up
+    THEN the error should be counted, and still raised.
+    """
+    redis_client = MagicMock()
+    redis_client.get.side_effect = RedisConnectionError("down")
+    errors = redis_errors.values["get"]
+
+    with pytest.raises(RedisConnectionError):
+        crud.get_puzzle_by_date(session, datetime.date(2025, 8, 1), redis_client=redis_client)
+
+    assert redis_errors.values["get"] == errors + 1
+
+
+@patch("app.scripts.generate_puzzles.get_session")
+def test_generate_daily_puzzles_counts_dates(mock_get_session, session: Session):
+    """
+    GIVEN one existing puzzle
+    WHEN puzzles are generated for it and the next two days
+    THEN two dates should be counted as inserted, and one as skipped.
+    """
+    mock_get_session.side_effect = lambda: iter([session])
+    generate_daily_puzzles(datetime.date(2025, 8, 1), datetime.date(2025, 8, 1))
+    before = dict(puzzle_dates.values)
+
+    generate_daily_puzzles(datetime.date(2025, 8, 1), datetime.date(2025, 8, 3))
+
+    assert puzzle_dates.values["inserted"] == before["inserted"] + 2
+    assert puzzle_dates.values["skipped"] == before["skipped"] + 1
+    assert puzzle_dates.values["raced"] == before["raced"]
+
+
+def test_write_textfile_replaces_the_file(tmp_path: Path):
+    """
+    GIVEN a run's metrics written to a textfile directory
+    WHEN another run's metrics are written
+    THEN the file should hold only the second run's samples, with no temporary files left.
+    """
+    write_textfile(
+        tmp_path, "generation", generation_run_metrics(1.5, {"inserted": 2}, finished=100)
+    )
+
+    path = write_textfile(
+        tmp_path, "generation", generation_run_metrics(2.5, {"inserted": 3}, finished=200)
+    )
+
+    body = path.read_text()
+    assert path == tmp_path / "generation.prom"
+    assert "# TYPE lexo_puzzle_generation_last_run_duration_seconds gauge" in body
+    assert sample_value(body, "lexo_puzzle_generation_last_run_duration_seconds") == 2.5
+    assert sample_value(body, "lexo_puzzle_generation_last_run_timestamp_seconds") == 200
+    assert sample_value(body, 'lexo_puzzle_generation_last_run_dates{outcome="inserted"}') == 3
+    assert [p.name for p in tmp_path.iterdir()] == ["generation.prom"]
+
+
+@patch("app.scripts.generate_puzzles.get_settings")
+@patch("app.scripts.generate_puzzles.get_session")
+def test_generate_daily_puzzles_writes_textfile(
+    mock_get_session, mock_get_settings, session: Session, tmp_path: Path
+):
+    """
+    GIVEN a metrics textfile directory, and one existing puzzle
+    WHEN puzzles are generated for it and the next two days
+    THEN the run's outcomes should be written for node_exporter.
+    """
+    mock_get_session.side_effect = lambda: iter([session])
+    mock_get_settings.return_value = Settings(
+        metrics_textfile_directory=tmp_path / "textfile",
+        puzzle_export_directory=tmp_path / "export",
+    )
+    generate_daily_puzzles(datetime.date(2025, 8, 1), datetime.date(2025, 8, 1))
+
+    generate_daily_puzzles(datetime.date(2025, 8, 1), datetime.date(2025, 8, 3))
+
+    body = (tmp_path / "textfile" / "lexo_puzzle_generation.prom").read_text()
+    assert sample_value(body, 'lexo_puzzle_generation_last_run_dates{outcome="inserted"}') == 2
+    assert sample_value(body, 'lexo_puzzle_generation_last_run_dates{outcome="skipped"}') == 1
+    assert sample_value(body, 'lexo_puzzle_generation_last_run_dates{outcome="raced"}') == 0
+    assert sample_value(body, "lexo_puzzle_generation_last_run_duration_seconds") > 0
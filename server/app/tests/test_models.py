@@ -0,0 +1,92 @@
+import datetime
+
+from sqlalchemy import inspect
+from sqlmodel import Session
+
+from app.models import PuzzleWithDate, Tile, hydrate_racks, tile_from_stored_dict
+from app.puzzle_generator import generate_puzzle
+
+
+def test_tile_from_stored_dict_matches_validated_tile():
+    """
+    GIVEN a tile dict as stored in the database
+    WHEN it is hydrated without validation
+    THEN the result should equal, and serialize the same as, a validated Tile.
+    """
+    data = {"id": "tile-3", "letter": "Q", "value": 10}
+
+    tile = tile_from_stored_dict(data)
+
+    assert isinstance(tile, Tile)
+    assert tile == Tile.model_validate(data)
+    assert tile.model_dump_json() == Tile.model_validate(data).model_dump_json()
+    assert tile.model_fields_set == {"id", "letter", "value"}
+
+    # The tile mustn't share its dict with the stored row.
+    tile.value = 1
+    assert data["value"] == 10
+
+
+def test_tile_from_stored_dict_validates_unexpected_data():
+    """
+    GIVEN a stored tile dict with the wrong types
+    WHEN it is hydrated
+    THEN it should fall back to validation, coercing the values.
+    """
+    tile = tile_from_stored_dict({"id": "tile-3", "letter": "Q", "value": "10"})
+
+    assert tile.value == 10
+
+
+def test_hydrate_racks_handles_empty_racks_and_tiles():
+    """
+    GIVEN racks that are empty, or already hold Tile instances
+    WHEN they are hydrated
+    THEN empty racks should be kept and Tiles passed through unchanged.
+    """
+    tile = Tile(id="tile-1", letter="A", value=1)
+
+    assert hydrate_racks([[]]) == [[]]
+    assert hydrate_racks([[tile], []])[0][0] is tile
+
+
+def test_loaded_puzzle_has_tiles_and_is_not_modified(session: Session):
+    """
+    GIVEN a puzzle stored in the database
+    WHEN it is loaded
+    THEN its racks should be Tiles equal to the originals, and loading shouldn't mark it dirty.
+    """
+    date = datetime.date(2025, 8, 15)
+    puzzle = generate_puzzle(date.isoformat())
+    session.add(
+        PuzzleWithDate(
+            date=date, initial_racks=puzzle.initial_racks, target_solution=puzzle.target_solution
+        )
+    )
+    session.commit()
+    session.expunge_all()
+
+    loaded = session.get(PuzzleWithDate, date)
+
+    assert loaded is not None
+    assert loaded.initial_racks == puzzle.initial_racks
+    assert loaded.target_solution == puzzle.target_solution
+    assert not inspect(loaded).modified
+    assert not session.dirty
+
+
+def test_puzzle_with_empty_rack_loads(session: Session):
+    """
+    GIVEN a stored puzzle whose first rack is empty
+    WHEN it is loaded
+    THEN it should load without error.
+    """
+    date = datetime.date(2025, 8, 15)
+    session.add(PuzzleWithDate(date=date, initial_racks=[[]], target_solution=[[]]))
+    session.commit()
+    session.expunge_all()
+
+    loaded = session.get(PuzzleWithDate, date)
+
+    assert loaded is not None
+    assert loaded.initial_racks == [[]]
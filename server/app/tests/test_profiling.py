@@ -0,0 +1,172 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.profiling import (
+    WORKER_THREAD_NAME,
+    ProfilingMiddleware,
+    SamplingProfiler,
+    collapse_stack,
+)
+
+
+def busy_wait(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def profiled_app(profiler: SamplingProfiler, **options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, **options)
+
+    @app.get("/slow")
+    def slow():
+        busy_wait(0.1)
+        return {}
+
+    @app.get("/fast")
+    def fast():
+        return {}
+
+    return app
+
+
+def read_stacks(path: Path) -> dict[str, int]:
+    lines = path.read_text().splitlines()
+    return {stack: int(count) for stack, count in (line.rsplit(" ", 1) for line in lines)}
+
+
+#########################
+# SamplingProfiler tests
+#########################
+
+
+def test_collapse_stack_lists_frames_outermost_first():
+    """
+    GIVEN the current thread's frame, and that of a thread waiting for an event
+    WHEN their stacks are collapsed
+    THEN the current one should end with this test, and the waiting one should be idle.
+    """
+    event = threading.Event()
+    waiting = threading.Thread(target=event.wait)
+    waiting.start()
+    try:
+        time.sleep(0.01)
+        frames = sys._current_frames()
+        stack = collapse_stack(frames[threading.get_ident()])
+        idle = collapse_stack(frames[waiting.ident])  # type: ignore[index]
+    finally:
+        event.set()
+        waiting.join()
+
+    assert stack is not None
+    assert stack.endswith(
+        "app.tests.test_profiling:test_collapse_stack_lists_frames_outermost_first"
+    )
+    assert idle is None
+
+
+def test_sample_counts_busy_request_threads_and_dump_resets(tmp_path: Path):
+    """
+    GIVEN a busy thread named like a thread pool worker, and another busy thread
+    WHEN the profiler samples, and is then dumped twice
+    THEN only the worker's stack should be written, and the second dump should have nothing.
+    """
+    profiler = SamplingProfiler(interval=0.001)
+    done = threading.Event()
+
+    def spin():
+        while not done.is_set():
+            busy_wait(0.001)
+
+    worker = threading.Thread(target=spin, name=WORKER_THREAD_NAME)
+    other = threading.Thread(target=spin, name="Something else")
+    worker.start()
+    other.start()
+    try:
+        for _ in range(5):
+            profiler.sample()
+    finally:
+        done.set()
+        worker.join()
+        other.join()
+
+    path = profiler.dump(tmp_path)
+
+    assert path is not None
+    stacks = read_stacks(path)
+    assert sum(stacks.values()) == 5
+    assert all("test_profiling:" in stack and "spin" in stack for stack in stacks)
+    assert profiler.dump(tmp_path) is None
+
+
+############################
+# ProfilingMiddleware tests
+############################
+
+
+def test_middleware_profiles_requests_by_path(tmp_path: Path):
+    """
+    GIVEN the middleware profiling a path prefix
+    WHEN a slow request to that path and a request to another are made
+    THEN the slow endpoint should appear in the dumped stacks, and sampling should stop after.
+    """
+    profiler = SamplingProfiler(interval=0.001)
+    client = TestClient(profiled_app(profiler, paths=("/slow",)))
+
+    client.get("/fast")
+    assert profiler._thread is None
+    client.get("/slow")
+
+    assert profiler._active == 0
+    path = profiler.dump(tmp_path)
+    assert path is not None
+    stacks = read_stacks(path)
+    assert any("profiled_app.<locals>.slow;app.tests.test_profiling:busy_wait" in s for s in stacks)
+
+
+def test_middleware_picks_requests_by_header_and_rate():
+    """
+    GIVEN middleware picking by header, and by a sample rate of 0 and 1
+    WHEN requests are checked
+    THEN they should be picked only with the header set to the token, or always at a rate of 1.
+    """
+    app = FastAPI()
+    profiler = SamplingProfiler(interval=0.001)
+    by_header = ProfilingMiddleware(app, profiler=profiler, header="X-Profile", token="s3cret")
+    never = ProfilingMiddleware(app, profiler=profiler, sample_rate=0.0)
+    always = ProfilingMiddleware(app, profiler=profiler, sample_rate=1.0)
+    plain = {"type": "http", "path": "/api/config", "headers": [(b"accept", b"*/*")]}
+    flagged = {**plain, "headers": [(b"x-profile", b"s3cret")]}
+
+    assert by_header.should_profile(flagged)
+    assert not by_header.should_profile(plain)
+    assert not never.should_profile(flagged)
+    assert always.should_profile(plain)
+
+
+def test_middleware_ignores_header_without_the_token():
+    """
+    GIVEN middleware picking by header, with and without a token configured
+    WHEN requests carry the header with a wrong value, an empty one, or the right one
+    THEN only the right value should be picked, and nothing without a configured token.
+    """
+    app = FastAPI()
+    profiler = SamplingProfiler(interval=0.001)
+    with_token = ProfilingMiddleware(app, profiler=profiler, header="X-Profile", token="s3cret")
+    without_token = ProfilingMiddleware(app, profiler=profiler, header="X-Profile")
+
+    def request(value: bytes) -> dict:
+        return {"type": "http", "path": "/api/config", "headers": [(b"x-profile", value)]}
+
+    assert not with_token.should_profile(request(b"wrong"))
+    assert not with_token.should_profile(request(b""))
+    assert not with_token.should_profile(request(b"s3cre"))
+    assert with_token.should_profile(request(b"s3cret"))
+    assert not without_token.should_profile(request(b""))
+    assert not without_token.should_profile(request(b"1"))
@@ -1,12 +1,23 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
 from unittest.mock import mock_open, patch
 
 import pytest
 import yaml
 
+from app.config import get_puzzle_lexicon
 from app.models import Puzzle, Tile
 from app.puzzle_generator import generate_puzzle
-from app.settings import get_settings
+from app.settings import Settings, get_settings
+
+
+@pytest.fixture(autouse=True)
+def clear_get_puzzle_lexicon_cache():
+    """Several tests mock out the config files, so don't let a cached lexicon leak between them."""
+    get_puzzle_lexicon.cache_clear()
+    yield
+    get_puzzle_lexicon.cache_clear()
 
 
 def flatten_racks(racks: list[list[Tile]]) -> list[Tile]:
@@ -32,6 +43,73 @@ def test_generate_puzzle_with_seed_is_deterministic():
     assert puzzle1 != puzzle3
 
 
+@patch(
+    "app.puzzle_generator.get_settings",
+    return_value=Settings(puzzle_generation_salt="default-salt-for-dev"),
+)
+def test_generate_puzzle_matches_previously_generated_puzzles(mock_get_settings):
+    """
+    GIVEN a date seed and salt that puzzles have already been generated and stored for
+    WHEN generate_puzzle is called with that seed
+    THEN it should reproduce the stored puzzle exactly.
+
+    The expected values were produced by the original implementation, which seeded the global
+    `random` module; switching to a private generator must not change existing puzzles.
+    """
+    puzzle = generate_puzzle(seed="2025-08-15")
+
+    words = ["".join(tile.letter for tile in rack) for rack in puzzle.target_solution]
+    ids = [[int(tile.id.split("-")[1]) for tile in rack] for rack in puzzle.target_solution]
+    assert words == ["NUT", "FORK", "BATHS", "CHORUS"]
+    assert ids == [
+        [4, 2, 17],
+        [13, 11, 10, 12],
+        [15, 7, 14, 16, 1],
+        [5, 3, 6, 8, 9, 18],
+    ]
+
+
+def test_generate_puzzle_does_not_touch_global_random_state():
+    """
+    GIVEN the global random module has been seeded
+    WHEN generate_puzzle is called with a seed
+    THEN the global random sequence should be unaffected, and vice versa.
+    """
+    random.seed(1234)
+    expected = [random.random() for _ in range(3)]
+
+    random.seed(1234)
+    puzzle = generate_puzzle(seed=42)
+    assert [random.random() for _ in range(3)] == expected
+
+    random.seed(99)
+    assert generate_puzzle(seed=42) == puzzle
+
+
+def test_generate_puzzle_is_deterministic_across_threads():
+    """
+    GIVEN many seeds generated concurrently in a thread pool
+    WHEN comparing against the same seeds generated sequentially
+    THEN every puzzle should be identical.
+    """
+    seeds = [f"2025-09-{day:02}" for day in range(1, 29)]
+    sequential = [generate_puzzle(seed=seed) for seed in seeds]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        concurrent = list(executor.map(lambda seed: generate_puzzle(seed=seed), seeds))
+
+    assert concurrent == sequential
+
+
+def test_generate_puzzle_uses_provided_rng():
+    """
+    GIVEN an explicit random.Random instance
+    WHEN generate_puzzle is called with it
+    THEN the puzzle should be drawn from that generator.
+    """
+    assert generate_puzzle(rng=random.Random(7)) == generate_puzzle(rng=random.Random(7))
+
+
 def test_generate_puzzle_structure_and_tile_count():
     """
     GIVEN a call to generate_puzzle_logic
@@ -0,0 +1,111 @@
+import datetime
+
+import pytest
+
+from app.lexicon_index import LexiconIndex
+from app.models import DatedScoreSubmission, PuzzleWithDate, Tile
+from app.scoring import (
+    InvalidSubmission,
+    score_batch,
+    score_submission,
+    scoring_puzzle_from_json,
+)
+
+MULTIPLIERS = {3: 6, 4: 5, 5: 4, 6: 3}
+LEXICON = LexiconIndex.from_words({3: ["CAT"], 4: ["BIRD"]})
+
+
+def make_puzzle(date: datetime.date = datetime.date(2025, 8, 1)):
+    """A puzzle whose tiles spell CAT and BIRD (plus nothing) in the first two racks."""
+    tiles = [
+        Tile(id=f"tile-{n}", letter=letter, value=value)
+        for n, (letter, value) in enumerate(
+            [("C", 2), ("A", 1), ("T", 1), ("B", 2), ("I", 1), ("R", 1), ("D", 2)], start=1
+        )
+    ]
+    racks = [tiles[:3], tiles[3:], [], []]
+    puzzle_json = PuzzleWithDate(
+        date=date, initial_racks=racks, target_solution=racks
+    ).model_dump_json()
+    return scoring_puzzle_from_json(puzzle_json)
+
+
+def test_score_submission_scores_valid_words():
+    """
+    GIVEN a submission spelling the target words
+    WHEN it is scored
+    THEN valid racks should score their tile values times their multiplier, matching the target.
+    """
+    puzzle = make_puzzle()
+    racks = [["tile-1", "tile-2", "tile-3"], ["tile-4", "tile-5", "tile-6", "tile-7"], [], []]
+
+    result = score_submission(puzzle, racks, multipliers=MULTIPLIERS, lexicon=LEXICON)
+
+    assert [rack.word for rack in result.racks] == ["CAT", "BIRD", "", ""]
+    assert [rack.valid for rack in result.racks] == [True, True, False, False]
+    assert result.total_score == 4 * 6 + 6 * 5
+    assert result.target_score == result.total_score
+    assert result.date == datetime.date(2025, 8, 1)
+
+
+def test_score_submission_gives_zero_for_invalid_words():
+    """
+    GIVEN a submission with a non-word and a word in a rack of the wrong length
+    WHEN it is scored
+    THEN those racks should be invalid and score nothing.
+    """
+    puzzle = make_puzzle()
+    racks = [["tile-3", "tile-2", "tile-1"], [], ["tile-4", "tile-5", "tile-6", "tile-7"], []]
+
+    result = score_submission(puzzle, racks, multipliers=MULTIPLIERS, lexicon=LEXICON)
+
+    assert result.racks[0].word == "TAC"
+    assert not result.racks[0].valid and result.racks[0].base_score == 0
+    assert not result.racks[2].valid
+    assert result.total_score == 0
+
+
+@pytest.mark.parametrize(
+    "racks, message",
+    [
+        ([["tile-1"], [], []], "Expected 4 racks"),
+        ([["tile-99"], [], [], []], "not in this puzzle"),
+        ([["tile-1", "tile-1"], [], [], []], "more than once"),
+        ([["tile-1"], ["tile-1"], [], []], "more than once"),
+    ],
+)
+def test_score_submission_rejects_bad_tiles(racks, message):
+    """
+    GIVEN a submission with the wrong number of racks, an unknown tile, or a reused tile
+    WHEN it is scored
+    THEN it should raise InvalidSubmission.
+    """
+    with pytest.raises(InvalidSubmission, match=message):
+        score_submission(make_puzzle(), racks, multipliers=MULTIPLIERS, lexicon=LEXICON)
+
+
+def test_score_batch_reports_errors_per_submission():
+    """
+    GIVEN a batch with a valid submission, an invalid one, one for a missing puzzle, and one for
+    the future
+    WHEN it is scored
+    THEN each should get its own result or error, in order.
+    """
+    date = datetime.date(2025, 8, 1)
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    submissions = [
+        DatedScoreSubmission(date=date, racks=[["tile-1", "tile-2", "tile-3"], [], [], []]),
+        DatedScoreSubmission(date=date, racks=[["tile-99"], [], [], []]),
+        DatedScoreSubmission(date=datetime.date(2025, 8, 2), racks=[[], [], [], []]),
+        DatedScoreSubmission(date=tomorrow, racks=[[], [], [], []]),
+    ]
+
+    response = score_batch(
+        submissions, {date: make_puzzle(date)}, multipliers=MULTIPLIERS, lexicon=LEXICON
+    )
+
+    results = response.results
+    assert results[0].result is not None and results[0].result.total_score == 24
+    assert results[1].error is not None and "not in this puzzle" in results[1].error
+    assert results[2].error is not None and "not found" in results[2].error
+    assert results[3].error == "No spoilers!"
@@ -0,0 +1,155 @@
+import random
+from collections import Counter
+
+import pytest
+
+from app.config import get_game_rules_file
+from app.puzzle_generator import generate_puzzle
+from app.settings import get_settings
+from app.solver import AnagramIndex, get_anagram_index, signature, solve_puzzle
+from app.wordlist import words_by_length
+
+MULTIPLIERS = {3: 6, 4: 5, 5: 4, 6: 3}
+
+
+def tiles_for(letters: str, values: dict[str, int] | None = None) -> list[tuple[str, int]]:
+    values = values or {}
+    return [(letter, values.get(letter, 1)) for letter in letters]
+
+
+def brute_force_max_score(tiles, *, multipliers, index: AnagramIndex) -> int:
+    """Tries every combination of words (or no word) for the four racks."""
+    values = dict(tiles)
+    tile_counts = Counter(letter for letter, _ in tiles)
+    options = [
+        [
+            (Counter(word), sum(values[letter] for letter in word) * multipliers[length])
+            for word in index.words_by_signature.get(length, {}).values()
+            if Counter(word) <= tile_counts
+        ]
+        for length in (3, 4, 5, 6)
+    ]
+
+    def best_from(rack: int, available: Counter) -> int:
+        if rack == len(options):
+            return 0
+        best = best_from(rack + 1, available)
+        for counts, score in options[rack]:
+            if counts <= available:
+                best = max(best, score + best_from(rack + 1, available - counts))
+        return best
+
+    return best_from(0, tile_counts)
+
+
+def test_anagram_index_keeps_first_word_per_signature():
+    """
+    GIVEN words that are anagrams of each other
+    WHEN an AnagramIndex is built
+    THEN each signature should map to the first of them, by length.
+    """
+    index = AnagramIndex.from_words({3: ["ACT", "CAT"], 4: ["STOP"]}, "v1")
+
+    assert signature("CAT") == "ACT"
+    assert index.lookup("ACT") == "ACT"
+    assert index.lookup("OPST") == "STOP"
+    assert index.lookup("ACTS") is None
+
+
+def test_solve_puzzle_finds_full_arrangement():
+    """
+    GIVEN tiles that spell one word of each length
+    WHEN the puzzle is solved
+    THEN all four words should be used.
+    """
+    index = AnagramIndex.from_words({3: ["CAT"], 4: ["BIRD"], 5: ["HORSE"], 6: ["MONKEY"]}, "v1")
+
+    solution = solve_puzzle(tiles_for("CATBIRDHORSEMONKEY"), multipliers=MULTIPLIERS, index=index)
+
+    assert solution.words == ("CAT", "BIRD", "HORSE", "MONKEY")
+    assert solution.score == 3 * 6 + 4 * 5 + 5 * 4 + 6 * 3
+
+
+def test_solve_puzzle_can_leave_racks_without_words():
+    """
+    GIVEN tiles where using a valuable letter in a short word beats spelling every rack
+    WHEN the puzzle is solved
+    THEN the better, partial arrangement should win.
+    """
+    index = AnagramIndex.from_words({3: ["ZAP", "CAT"], 6: ["ZAPPED"]}, "v1")
+    tiles = tiles_for("ZAPCATPED", {"Z": 10})
+
+    solution = solve_puzzle(tiles, multipliers=MULTIPLIERS, index=index)
+
+    # ZAP scores (10 + 1 + 1) * 6 = 72, whereas ZAPPED scores (10 + 5) * 3 = 45.
+    assert solution.words == ("ZAP", None, None, None)
+    assert solution.score == 72
+
+
+def test_solve_puzzle_with_no_words():
+    """
+    GIVEN tiles that don't spell any word
+    WHEN the puzzle is solved
+    THEN the best score should be zero.
+    """
+    index = AnagramIndex.from_words({3: ["CAT"]}, "v1")
+
+    solution = solve_puzzle(tiles_for("XYZ"), multipliers=MULTIPLIERS, index=index)
+
+    assert solution.score == 0
+    assert solution.words == (None, None, None, None)
+
+
+def test_solve_puzzle_rejects_inconsistent_values():
+    """
+    GIVEN two tiles with the same letter but different values
+    WHEN the puzzle is solved
+    THEN it should raise a ValueError.
+    """
+    index = AnagramIndex.from_words({3: ["CAT"]}, "v1")
+
+    with pytest.raises(ValueError):
+        solve_puzzle([("A", 1), ("A", 2)], multipliers=MULTIPLIERS, index=index)
+
+
+@pytest.mark.parametrize("seed", ["2025-08-01", "2025-08-02", "2025-08-03"])
+def test_solve_puzzle_matches_brute_force(seed: str):
+    """
+    GIVEN a generated puzzle and a sample of the full word list
+    WHEN the puzzle is solved
+    THEN the score should match trying every combination of words.
+    """
+    words = words_by_length((get_settings().config_directory / "words-full.txt").read_text())
+    rng = random.Random(seed)
+    sample = {length: rng.sample(bucket, min(len(bucket), 400)) for length, bucket in words.items()}
+    puzzle = generate_puzzle(seed)
+    # Make sure the puzzle's own words are in the sample, so there's something to find.
+    for rack in puzzle.target_solution:
+        sample[len(rack)].append("".join(tile.letter for tile in rack))
+    index = AnagramIndex.from_words({k: sorted(v) for k, v in sample.items()}, "sample")
+    tiles = [(tile.letter, tile.value) for rack in puzzle.initial_racks for tile in rack]
+
+    solution = solve_puzzle(tiles, multipliers=MULTIPLIERS, index=index)
+
+    assert solution.score == brute_force_max_score(tiles, multipliers=MULTIPLIERS, index=index)
+
+
+def test_solve_puzzle_beats_or_matches_target_solution():
+    """
+    GIVEN a generated puzzle and the full word list
+    WHEN the puzzle is solved
+    THEN the best score should be at least the target solution's, and its words should be legal.
+    """
+    puzzle = generate_puzzle("2025-08-01")
+    multipliers = get_game_rules_file()["multipliers"]
+    index = get_anagram_index()
+    tiles = [(tile.letter, tile.value) for rack in puzzle.initial_racks for tile in rack]
+    target_score = sum(
+        sum(tile.value for tile in rack) * multipliers[len(rack)] for rack in puzzle.target_solution
+    )
+
+    solution = solve_puzzle(tiles, multipliers=multipliers, index=index)
+
+    assert solution.score >= target_score
+    for length, word in zip((3, 4, 5, 6), solution.words):
+        assert word is None or index.lookup(signature(word)) is not None and len(word) == length
@@ -0,0 +1,183 @@
+import asyncio
+import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session
+from typer.testing import CliRunner
+
+from app.cache import LocalCache
+from app.crud import get_puzzle_json_by_date, redis_key_for_date
+from app.scripts.warm_cache import app, prewarm_before_midnight, warm_cache
+
+runner = CliRunner()
+
+
+##################
+# warm_cache tests
+##################
+
+
+def test_warm_cache_writes_existing_puzzles_in_range(session: Session, fake_redis, add_puzzles):
+    """
+    GIVEN puzzles for some dates in and around a range
+    WHEN warm_cache is called for the range
+    THEN exactly the puzzles in the range should be in Redis, serialized as the API serves them.
+    """
+    add_puzzles(
+        datetime.date(2025, 8, 1),
+        datetime.date(2025, 8, 2),
+        datetime.date(2025, 8, 4),
+        datetime.date(2025, 8, 10),
+        letter="A",
+    )
+
+    warmed = warm_cache(session, fake_redis, datetime.date(2025, 8, 2), datetime.date(2025, 8, 5))
+
+    assert warmed == 2
+    assert sorted(fake_redis.keys("puzzle:*")) == ["puzzle:2025-08-02", "puzzle:2025-08-04"]
+    # A later miss for a different date stores exactly the same format.
+    expected = get_puzzle_json_by_date(session, datetime.date(2025, 8, 1), redis_client=fake_redis)
+    assert expected is not None
+    assert fake_redis.get("puzzle:2025-08-02") == expected.replace("2025-08-01", "2025-08-02")
+
+
+def test_warm_cache_fills_local_cache_and_pins_today(session: Session, fake_redis, add_puzzles):
+    """
+    GIVEN today's and yesterday's puzzles
+    WHEN warm_cache is called with a local cache
+    THEN both should be in the local cache, with today's pinned.
+    """
+    today = datetime.date.today()
+    yesterday = today - datetime.timedelta(days=1)
+    add_puzzles(yesterday, today)
+    local_cache = LocalCache(max_entries=1, ttl_seconds=60)
+
+    warm_cache(session, fake_redis, yesterday, today, local_cache=local_cache)
+
+    assert local_cache.get(redis_key_for_date(today)) is not None
+    assert local_cache.get(redis_key_for_date(yesterday)) is not None
+
+
+def test_warm_cache_with_no_puzzles_does_nothing(session: Session, fake_redis):
+    """
+    GIVEN no puzzles in the range
+    WHEN warm_cache is called
+    THEN nothing should be written.
+    """
+    assert (
+        warm_cache(session, fake_redis, datetime.date(2025, 8, 1), datetime.date(2025, 8, 7)) == 0
+    )
+    assert fake_redis.keys("*") == []
+
+
+################################
+# prewarm_before_midnight tests
+################################
+
+
+def test_prewarm_before_midnight_warms_tomorrow_inside_the_window():
+    """
+    GIVEN local midnight is closer than the pre-warm window
+    WHEN prewarm_before_midnight runs
+    THEN it should warm tomorrow's puzzle straight away, then wait until after midnight.
+    """
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        raise asyncio.CancelledError
+
+    with (
+        patch("app.scripts.warm_cache.seconds_until_local_midnight", return_value=60),
+        patch("app.scripts.warm_cache.warm_dates", return_value=1) as mock_warm_dates,
+        patch("app.scripts.warm_cache.asyncio.sleep", side_effect=fake_sleep),
+        pytest.raises(asyncio.CancelledError),
+    ):
+        asyncio.run(prewarm_before_midnight(5))
+
+    mock_warm_dates.assert_called_once_with(tomorrow, tomorrow)
+    assert sleeps == [61]
+
+
+def test_prewarm_before_midnight_sleeps_until_the_window():
+    """
+    GIVEN local midnight is an hour away and the window is 5 minutes
+    WHEN prewarm_before_midnight runs
+    THEN it should sleep for 55 minutes before warming anything.
+    """
+
+    async def fake_sleep(delay):
+        raise asyncio.CancelledError
+
+    with (
+        patch("app.scripts.warm_cache.seconds_until_local_midnight", return_value=3600),
+        patch("app.scripts.warm_cache.warm_dates") as mock_warm_dates,
+        patch("app.scripts.warm_cache.asyncio.sleep", side_effect=fake_sleep) as mock_sleep,
+        pytest.raises(asyncio.CancelledError),
+    ):
+        asyncio.run(prewarm_before_midnight(5))
+
+    mock_sleep.assert_called_once_with(3300)
+    mock_warm_dates.assert_not_called()
+
+
+###########
+# CLI tests
+###########
+
+
+@patch("app.scripts.warm_cache.get_redis_client")
+@patch("app.scripts.warm_cache.get_session")
+def test_cli_default_warms_week_ending_tomorrow(
+    mock_get_session, mock_get_redis_client, session: Session, fake_redis, add_puzzles
+):
+    """
+    GIVEN puzzles from 8 days ago through tomorrow
+    WHEN the CLI is run with no options
+    THEN the 7 days ending tomorrow should be warmed.
+    """
+    mock_get_session.return_value = iter([session])
+    mock_get_redis_client.return_value = fake_redis
+    today = datetime.date.today()
+    add_puzzles(*(today + datetime.timedelta(days=n) for n in range(-7, 2)))
+
+    result = runner.invoke(app, [])
+
+    assert result.exit_code == 0
+    assert len(fake_redis.keys("puzzle:*")) == 7
+    assert fake_redis.get(redis_key_for_date(today - datetime.timedelta(days=5))) is not None
+    assert fake_redis.get(redis_key_for_date(today - datetime.timedelta(days=6))) is None
+
+
+@patch("app.scripts.warm_cache.get_redis_client")
+@patch("app.scripts.warm_cache.get_session")
+def test_cli_with_start_and_end_options(
+    mock_get_session, mock_get_redis_client, session: Session, fake_redis, add_puzzles
+):
+    """
+    GIVEN puzzles for a few dates
+    WHEN the CLI is run with --start and --end
+    THEN that inclusive range should be warmed.
+    """
+    mock_get_session.return_value = iter([session])
+    mock_get_redis_client.return_value = fake_redis
+    add_puzzles(*(datetime.date(2025, 8, day) for day in range(1, 6)))
+
+    result = runner.invoke(app, ["--start", "2025-08-02", "--end", "2025-08-03"])
+
+    assert result.exit_code == 0
+    assert sorted(fake_redis.keys("puzzle:*")) == ["puzzle:2025-08-02", "puzzle:2025-08-03"]
+
+
+@patch("app.scripts.warm_cache.get_redis_client", return_value=None)
+def test_cli_without_redis_fails(mock_get_redis_client):
+    """
+    GIVEN no Redis is configured
+    WHEN the CLI is run
+    THEN it should exit with an error.
+    """
+    result = runner.invoke(app, [])
+
+    assert result.exit_code == 1
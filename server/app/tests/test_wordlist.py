@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from app.settings import get_settings
+from app.wordlist import decode_bucket, encode_bucket, encode_wordlist, get_wordlist
+
+
+def test_encode_bucket_front_codes_words():
+    """
+    GIVEN a sorted list of same-length words
+    WHEN it is encoded
+    THEN each word should be the number of letters shared with the previous one, then the rest.
+    """
+    assert encode_bucket(["CAB", "CAT", "COT", "DOG"]) == "0CAB2T1OT0DOG"
+    assert decode_bucket(3, "0CAB2T1OT0DOG") == ["CAB", "CAT", "COT", "DOG"]
+
+
+def test_encode_wordlist_buckets_normalizes_and_dedupes():
+    """
+    GIVEN a word list file with mixed case, blank lines and duplicates
+    WHEN it is encoded
+    THEN the words should be upper-cased, de-duplicated, sorted and bucketed by length.
+    """
+    document = encode_wordlist("dog\n\ncat\nBIRD\nCat\n", "v1")
+
+    assert document == {"version": "v1", "wordCount": 3, "buckets": {"3": "0CAT0DOG", "4": "0BIRD"}}
+
+
+def test_encode_wordlist_rejects_long_words():
+    """
+    GIVEN a word too long for a one-digit shared prefix
+    WHEN the list is encoded
+    THEN it should raise a ValueError.
+    """
+    with pytest.raises(ValueError):
+        encode_wordlist("ABCDEFGHIJK\n", "v1")
+
+
+def test_get_wordlist_round_trips_the_full_list():
+    """
+    GIVEN the real words-full.txt
+    WHEN it is encoded by get_wordlist and decoded again
+    THEN every word should come back, and the version should be stable.
+    """
+    words = get_wordlist()
+    document = json.loads(words.bodies["identity"])
+    decoded = {
+        word
+        for length, bucket in document["buckets"].items()
+        for word in decode_bucket(int(length), bucket)
+    }
+
+    with open(get_settings().config_directory / "words-full.txt", encoding="utf-8") as f:
+        expected = {line.strip().upper() for line in f if line.strip()}
+    assert decoded == expected
+    assert document["wordCount"] == len(expected)
+    assert document["version"] == words.version
+    assert get_wordlist().version == words.version
@@ -0,0 +1,106 @@
+"""
+The full list of legal words (`config/words-full.txt`), encoded compactly for /api/wordlist.
+
+Words are upper-cased, grouped by length, sorted, and front-coded: each word is written as one
+digit giving how many leading letters it shares with the previous word in its bucket, followed by
+the rest of its letters.  Since every word in a bucket has the same length, no separators are
+needed, and a bucket is a single string:
+
+    {"version": "...", "wordCount": 4, "buckets": {"3": "0CAT2B0DOG", "4": "0BIRD"}}
+
+decodes to CAT, CAB, DOG and BIRD.  The document is serialized and compressed (gzip and brotli)
+once per version of the file, so requests just pick the right bytes.
+"""
+
+import gzip
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+import brotli
+
+from app.config import RULES_CHECK_INTERVAL, config_file_cache
+
+
+def encode_bucket(words: list[str]) -> str:
+    """Front-codes a sorted list of words of the same length, as described above."""
+    parts = []
+    previous = ""
+    for word in words:
+        shared = 0
+        for a, b in zip(previous, word):
+            if a != b:
+                break
+            shared += 1
+        # A word can't share all of its letters with the previous one, since there are no
+        # duplicates, so a single digit is enough for any word of up to 10 letters.
+        parts.append(str(shared) + word[shared:])
+        previous = word
+    return "".join(parts)
+
+
+def decode_bucket(length: int, encoded: str) -> list[str]:
+    """Reverses encode_bucket for a bucket of words with `length` letters."""
+    words = []
+    previous = ""
+    position = 0
+    while position < len(encoded):
+        shared = int(encoded[position])
+        suffix_length = length - shared
+        word = previous[:shared] + encoded[position + 1 : position + 1 + suffix_length]
+        words.append(word)
+        previous = word
+        position += 1 + suffix_length
+    return words
+
+
+def words_by_length(words_text: str) -> dict[int, list[str]]:
+    """
+    Parses a word list file into sorted, de-duplicated, upper-cased words, grouped by length (in
+    increasing order).  Blank lines are dropped.
+    """
+    buckets: dict[int, set[str]] = {}
+    for line in words_text.splitlines():
+        word = line.strip().upper()
+        if word:
+            buckets.setdefault(len(word), set()).add(word)
+    return {length: sorted(buckets[length]) for length in sorted(buckets)}
+
+
+def encode_wordlist(words_text: str, version: str) -> dict:
+    """Builds the /api/wordlist document for the contents of a word list file."""
+    buckets = words_by_length(words_text)
+    if any(length > 10 for length in buckets):
+        raise ValueError("Words longer than 10 letters can't be front-coded with one digit.")
+
+    return {
+        "version": version,
+        "wordCount": sum(len(words) for words in buckets.values()),
+        "buckets": {str(length): encode_bucket(words) for length, words in buckets.items()},
+    }
+
+
+@dataclass(frozen=True)
+class WordList:
+    """The encoded word list, serialized and precompressed, keyed by content coding."""
+
+    version: str
+    bodies: Mapping[str, bytes]
+
+
+@config_file_cache("words-full.txt", check_interval=RULES_CHECK_INTERVAL)
+def get_wordlist(words_text: str, *, version: str) -> WordList:
+    """
+    Returns the encoded full word list, with a version derived from the file's contents.  The
+    bodies are keyed by Content-Encoding ("identity", "gzip" and "br").
+    """
+    short_version = version[:16]
+    body = json.dumps(encode_wordlist(words_text, short_version), separators=(",", ":")).encode()
+    return WordList(
+        version=short_version,
+        bodies={
+            "identity": body,
+            "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+            "br": brotli.compress(body, quality=11),
+        },
+    )
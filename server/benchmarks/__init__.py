@@ -0,0 +1,4 @@
+"""
+Ad-hoc performance benchmarks for the server.  These aren't run as part of the test suite; run
+each module directly from the server directory, e.g. `python -m benchmarks.async_mode --help`.
+"""
@@ -0,0 +1,221 @@
+"""
+Compares the sync and async API modes (see `Settings.async_mode`) under concurrent load.
+
+For each mode, this starts a uvicorn worker against a scratch SQLite database seeded with a run of
+puzzles, then fires requests at it from many concurrent clients, the way the site gets hit just
+after midnight.  It reports throughput and latency percentiles for each mode.
+
+    uv run python -m benchmarks.async_mode --concurrency 500 --requests 20000
+
+The in-process cache is disabled by default so that every request reaches SQLite (or Redis, if
+--redis-url is given); pass --local-cache to measure the fully-warm path instead.
+"""
+
+import asyncio
+import datetime
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Annotated
+
+import httpx
+import typer
+
+SERVER_DIRECTORY = Path(__file__).parent.parent
+
+
+@dataclass
+class Result:
+    mode: str
+    requests: int
+    errors: int
+    elapsed: float
+    latencies: list[float]
+
+    def summary(self) -> str:
+        latencies = sorted(self.latencies) or [0.0]
+
+        def percentile(p: float) -> float:
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+        return (
+            f"{self.mode:>5}: {self.requests / self.elapsed:8.1f} req/s  "
+            f"p50 {percentile(0.50):7.1f} ms  p99 {percentile(0.99):7.1f} ms  "
+            f"mean {statistics.fmean(latencies) * 1000:7.1f} ms  errors {self.errors}"
+        )
+
+
+def seed_database(database_url: str, days: int, end: datetime.date | None = None):
+    """
+    Creates the tables in a scratch database and fills in the `days` days of puzzles up to `end`
+    (by default, today).
+    """
+    env = {**os.environ, "DATABASE_URL": database_url}
+    end = end or datetime.date.today()
+    start = end - datetime.timedelta(days=days - 1)
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "app.scripts.generate_puzzles",
+            "--start",
+            start.isoformat(),
+            "--end",
+            end.isoformat(),
+        ],
+        cwd=SERVER_DIRECTORY,
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, env: dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=SERVER_DIRECTORY,
+        env=env,
+    )
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get("/api/puzzle/today")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {base_url} did not start within {timeout}s")
+
+
+async def run_load(
+    base_url: str, paths: list[str], concurrency: int, total: int
+) -> tuple[int, float, list[float]]:
+    """Sends `total` GETs for random `paths` from `concurrency` clients at once."""
+    latencies: list[float] = []
+    errors = 0
+    remaining = total
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+
+        async def worker():
+            nonlocal errors, remaining
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(random.choice(paths))
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return errors, elapsed, latencies
+
+
+def benchmark_mode(
+    async_mode: bool,
+    database_url: str,
+    paths: list[str],
+    concurrency: int,
+    total: int,
+    redis_url: str | None,
+    local_cache: bool,
+) -> Result:
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "ASYNC_MODE": str(async_mode),
+        "ENVIRONMENT": "prod",
+        "LOCAL_CACHE_MAX_ENTRIES": "256" if local_cache else "0",
+    }
+    if redis_url:
+        env["REDIS_URL"] = redis_url
+    else:
+        env.pop("REDIS_URL", None)
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port, env)
+    try:
+        asyncio.run(wait_until_ready(base_url))
+        # A short warm-up so that both modes start with open connections and a primed cache.
+        asyncio.run(run_load(base_url, paths, min(concurrency, 10), 100))
+        errors, elapsed, latencies = asyncio.run(run_load(base_url, paths, concurrency, total))
+    finally:
+        server.terminate()
+        server.wait()
+
+    return Result(
+        mode="async" if async_mode else "sync",
+        requests=total,
+        errors=errors,
+        elapsed=elapsed,
+        latencies=latencies,
+    )
+
+
+def main(
+    concurrency: Annotated[int, typer.Option(help="Number of simultaneous clients.")] = 200,
+    requests: Annotated[int, typer.Option(help="Total requests per mode.")] = 5000,
+    days: Annotated[int, typer.Option(help="Number of past puzzles to seed and request.")] = 30,
+    redis_url: Annotated[
+        str | None, typer.Option(help="Redis to use as the shared cache (none by default).")
+    ] = None,
+    local_cache: Annotated[
+        bool, typer.Option(help="Enable the in-process cache tier in the server.")
+    ] = False,
+):
+    """
+    Benchmark the API in sync and async modes.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'benchmark.sqlite3'}"
+        seed_database(database_url, days)
+
+        today = datetime.date.today()
+        paths = ["/api/puzzle/today"] + [
+            f"/api/puzzle/{(today - datetime.timedelta(days=n)).isoformat()}"
+            for n in range(1, days)
+        ]
+
+        print(f"{requests} requests, {concurrency} concurrent clients, {len(paths)} puzzles")
+        for async_mode in (False, True):
+            result = benchmark_mode(
+                async_mode, database_url, paths, concurrency, requests, redis_url, local_cache
+            )
+            print(result.summary())
+
+
+if __name__ == "__main__":
+    typer.run(main)
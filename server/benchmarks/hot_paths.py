@@ -0,0 +1,320 @@
+"""
+Times the server's hot paths in-process, and compares the results with a stored baseline.
+
+    uv run python -m benchmarks.hot_paths --output baseline.json
+    uv run python -m benchmarks.hot_paths --baseline baseline.json --threshold 0.25
+
+It measures:
+
+- `generate_puzzle`, cold (with the word list and rules reloaded first) and warm;
+- `generate_daily_puzzles` over 1, 30 and 3650 days, each into an empty database;
+- `crud.get_puzzle_by_date` on a Redis hit, a Redis miss, and with no Redis, using fakeredis;
+- `crud.get_game_rules`;
+- every API endpoint, through an in-process ASGI client (no network, no uvicorn), with the
+  in-process cache enabled but no Redis, as a worker sees it once it's warm.
+
+Each benchmark runs a number of rounds, and its time per call is the median over the rounds (the
+minimum and maximum are recorded too).  Results are written as JSON:
+
+    {"environment": {...}, "benchmarks": {"name": {"median_ms": ..., "min_ms": ...}, ...}}
+
+With --baseline, each benchmark's median is compared with the baseline's, and any that got more
+than --threshold slower (as a fraction, so 0.25 is 25%) are flagged as regressions, in which case
+the exit status is 1.  Timings vary between machines, so only compare runs from the same one.
+"""
+
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Annotated
+from unittest.mock import patch
+
+import fakeredis
+import httpx
+import sentry_sdk
+import typer
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app import crud
+from app.cache import get_local_cache, get_redis_client
+from app.config import get_puzzle_lexicon
+from app.database import custom_serializer, get_session
+from app.main import app
+from app.puzzle_generator import generate_puzzle
+from app.scripts.generate_puzzles import generate_daily_puzzles, insert_puzzles
+from app.settings import get_settings
+
+SERVER_DIRECTORY = Path(__file__).parent.parent
+
+# How many days of past puzzles (up to today) to seed the database with.
+SEEDED_DAYS = 60
+
+
+@dataclass
+class Benchmark:
+    name: str
+    run: Callable[[], object]
+    # Called before each round, untimed.
+    setup: Callable[[], object] | None = None
+    calls_per_round: int = 1
+    rounds: int = 7
+
+    def measure(self) -> dict:
+        timings = []
+        for _ in range(self.rounds):
+            if self.setup:
+                self.setup()
+            started = time.perf_counter()
+            for _ in range(self.calls_per_round):
+                self.run()
+            timings.append((time.perf_counter() - started) / self.calls_per_round)
+        return {
+            "median_ms": statistics.median(timings) * 1000,
+            "min_ms": min(timings) * 1000,
+            "max_ms": max(timings) * 1000,
+            "rounds": self.rounds,
+            "calls_per_round": self.calls_per_round,
+        }
+
+
+def memory_engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+        json_serializer=custom_serializer,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def seed_database(db: Session, dates: list[datetime.date]):
+    insert_puzzles(db, [(date, generate_puzzle(date.isoformat())) for date in dates])
+    db.commit()
+
+
+def generation_benchmarks() -> Iterator[Benchmark]:
+    yield Benchmark(
+        "generate_puzzle (cold)",
+        lambda: generate_puzzle("2025-01-01"),
+        setup=get_puzzle_lexicon.cache_clear,
+        rounds=15,
+    )
+    seeds = itertools.cycle([f"2025-01-{day:02}" for day in range(1, 32)])
+    yield Benchmark(
+        "generate_puzzle (warm)", lambda: generate_puzzle(next(seeds)), calls_per_round=500
+    )
+
+    # generate_daily_puzzles gets its session from get_session(); give it an empty database for
+    # each round.
+    session: Session | None = None
+
+    def fresh_database():
+        nonlocal session
+        if session is not None:
+            session.close()
+        session = Session(memory_engine())
+
+    start = datetime.date(2100, 1, 1)
+    # Patched while each benchmark is measured, since this is a generator.
+    with patch("app.scripts.generate_puzzles.get_session", side_effect=lambda: iter([session])):
+        for days, rounds in ((1, 15), (30, 7), (3650, 3)):
+            end = start + datetime.timedelta(days=days - 1)
+            yield Benchmark(
+                f"generate_daily_puzzles ({days} days)",
+                lambda end=end: generate_daily_puzzles(start, end),
+                setup=fresh_database,
+                rounds=rounds,
+            )
+
+
+def crud_benchmarks(db: Session, dates: list[datetime.date]) -> Iterator[Benchmark]:
+    date = dates[-2]
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    crud.get_puzzle_by_date(db, date, redis_client=redis_client)
+    yield Benchmark(
+        "crud.get_puzzle_by_date (Redis hit)",
+        lambda: crud.get_puzzle_by_date(db, date, redis_client=redis_client),
+        calls_per_round=500,
+    )
+
+    # Every date once per round, each a miss that then fills Redis.
+    cycle = itertools.cycle(dates)
+    yield Benchmark(
+        "crud.get_puzzle_by_date (Redis miss)",
+        lambda: crud.get_puzzle_by_date(db, next(cycle), redis_client=redis_client),
+        setup=redis_client.flushall,
+        calls_per_round=len(dates),
+    )
+    yield Benchmark(
+        "crud.get_puzzle_by_date (no Redis)",
+        lambda: crud.get_puzzle_by_date(db, date),
+        calls_per_round=500,
+    )
+    yield Benchmark("crud.get_game_rules", lambda: crud.get_game_rules(db), calls_per_round=2000)
+
+
+def endpoint_benchmarks(db: Session, dates: list[datetime.date]) -> Iterator[Benchmark]:
+    app.dependency_overrides[get_session] = lambda: db
+    app.dependency_overrides[get_redis_client] = lambda: None
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    def racks(date: datetime.date) -> list[list[str]]:
+        puzzle = generate_puzzle(date.isoformat())
+        return [[tile.id for tile in rack] for rack in puzzle.target_solution]
+
+    date = dates[-2].isoformat()
+    month = {"start": dates[-30].isoformat(), "end": dates[-1].isoformat()}
+    # Named by route, so that results from different days can be compared.
+    requests = [
+        ("GET", "/api/puzzle/today", "/api/puzzle/today", {}),
+        ("GET", "/api/puzzle/{date}", f"/api/puzzle/{date}", {}),
+        ("GET", "/api/puzzles", "/api/puzzles", {"params": month}),
+        ("GET", "/api/puzzles/stream", "/api/puzzles/stream", {"params": month}),
+        ("GET", "/api/wordlist", "/api/wordlist", {"headers": {"Accept-Encoding": "br, gzip"}}),
+        (
+            "POST",
+            "/api/puzzle/{date}/score",
+            f"/api/puzzle/{date}/score",
+            {"json": {"racks": racks(dates[-2])}},
+        ),
+        (
+            "POST",
+            "/api/puzzles/score",
+            "/api/puzzles/score",
+            {
+                "json": {
+                    "submissions": [{"date": d.isoformat(), "racks": racks(d)} for d in dates[-30:]]
+                }
+            },
+        ),
+        ("GET", "/api/config", "/api/config", {}),
+        ("GET", "/cache/stats", "/cache/stats", {}),
+    ]
+    try:
+        for method, route, path, options in requests:
+
+            def send(method=method, path=path, options=options) -> httpx.Response:
+                return loop.run_until_complete(client.request(method, path, **options))
+
+            response = send()
+            if response.status_code != 200:
+                raise RuntimeError(f"{method} {path} returned {response.status_code}")
+            yield Benchmark(f"{method} {route}", send, calls_per_round=50)
+    finally:
+        loop.run_until_complete(client.aclose())
+        loop.close()
+        app.dependency_overrides.clear()
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SERVER_DIRECTORY,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Prints each benchmark against the baseline, and returns the names of the regressions."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:>45}: {result['median_ms']:10.3f} ms  (not in baseline)")
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:>45}: {result['median_ms']:10.3f} ms  vs {before['median_ms']:10.3f} ms  "
+            f"{change:+7.1%}{flag}"
+        )
+    return regressions
+
+
+def main(
+    output: Annotated[
+        Path | None, typer.Option(help="Write the results to this JSON file.")
+    ] = None,
+    baseline: Annotated[
+        Path | None, typer.Option(help="Compare the results with this earlier JSON file.")
+    ] = None,
+    threshold: Annotated[
+        float, typer.Option(min=0, help="Flag benchmarks more than this fraction slower.")
+    ] = 0.25,
+    only: Annotated[
+        list[str] | None,
+        typer.Option(help="Only run benchmarks whose names contain this (repeatable)."),
+    ] = None,
+):
+    """
+    Benchmark the server's hot paths.
+    """
+    baseline_results = json.loads(baseline.read_text())["benchmarks"] if baseline else None
+    # Only the caches each benchmark sets up for itself.
+    get_settings().redis_url = None
+    get_redis_client.cache_clear()
+    get_local_cache.cache_clear()
+    # Importing app.main set Sentry up; don't report every request made here.
+    sentry_sdk.init(dsn=None)
+
+    today = datetime.date.today()
+    dates = [today - datetime.timedelta(days=n) for n in range(SEEDED_DAYS - 1, -1, -1)]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{Path(tmp) / 'benchmark.sqlite3'}", json_serializer=custom_serializer
+        )
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as db:
+            seed_database(db, dates)
+            groups = [generation_benchmarks(), crud_benchmarks(db, dates)]
+            groups.append(endpoint_benchmarks(db, dates))
+            for benchmark in itertools.chain.from_iterable(groups):
+                if only and not any(text in benchmark.name for text in only):
+                    continue
+                results[benchmark.name] = result = benchmark.measure()
+                if baseline_results is None:
+                    print(f"{benchmark.name:>45}: {result['median_ms']:10.3f} ms")
+
+    if output:
+        output.write_text(
+            json.dumps({"environment": environment(), "benchmarks": results}, indent=2) + "\n"
+        )
+    if baseline_results is not None:
+        regressions = compare(results, baseline_results, threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {threshold:.0%}.")
+            raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,118 @@
+"""
+Measures the cost of turning stored puzzle rows back into Tile objects (see
+`PuzzleWithDate.convert_racks_to_tile_instances`), on a scratch SQLite database.
+
+    uv run python -m benchmarks.hydration --rows 10000
+
+It times, over every row in the table:
+
+- reading the raw JSON columns, with no hydration at all (the floor);
+- the old hydration, which built a `TypeAdapter(Tile)` per row and validated every tile;
+- the current hydration, `hydrate_racks`, which trusts the stored dicts;
+- a full ORM load of `PuzzleWithDate`, which is what the API actually does on a cache miss.
+"""
+
+import datetime
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Annotated
+
+import typer
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlmodel import Session, SQLModel, col, select
+
+from app.models import PuzzleWithDate, Tile, hydrate_racks
+from app.puzzle_generator import generate_puzzle
+from app.scripts.generate_puzzles import puzzle_row
+
+# Distinct puzzles to generate; the rows cycle through them, since generating 10,000 takes a while
+# and doesn't change what's being measured.
+DISTINCT_PUZZLES = 100
+
+
+def seed_database(db: Session, rows: int):
+    start = datetime.date(2000, 1, 1)
+    puzzles = [
+        generate_puzzle((start + datetime.timedelta(days=n)).isoformat())
+        for n in range(min(rows, DISTINCT_PUZZLES))
+    ]
+    values = [
+        puzzle_row(start + datetime.timedelta(days=n), puzzles[n % len(puzzles)])
+        for n in range(rows)
+    ]
+    db.exec(insert(PuzzleWithDate), params=values)  # type: ignore[call-overload]
+    db.commit()
+
+
+def legacy_hydrate(racks: list[list[dict]]) -> list[list[Tile]]:
+    """The hydration the reconstructor used to do for each row."""
+    adapter = TypeAdapter(Tile)
+    if isinstance(racks[0][0], dict):
+        return [[adapter.validate_python(tile) for tile in rack] for rack in racks]
+    return racks  # type: ignore[return-value]
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(
+    rows: Annotated[int, typer.Option(help="Number of puzzle rows to seed.")] = 10_000,
+    repeat: Annotated[
+        int, typer.Option(help="Runs of each measurement; the best is reported.")
+    ] = 3,
+):
+    """
+    Benchmark puzzle row hydration.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'benchmark.sqlite3'}")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as db:
+            seed_database(db, rows)
+
+        raw_statement = select(
+            col(PuzzleWithDate.initial_racks), col(PuzzleWithDate.target_solution)
+        )
+
+        def read_raw():
+            with Session(engine) as db:
+                return db.exec(raw_statement).all()
+
+        raw_rows = read_raw()
+
+        def hydrate_all(hydrate: Callable[[list[list[dict]]], list[list[Tile]]]):
+            for initial_racks, target_solution in raw_rows:
+                hydrate(initial_racks)
+                hydrate(target_solution)
+
+        def orm_load():
+            with Session(engine) as db:
+                return db.exec(select(PuzzleWithDate)).all()
+
+        measurements = {
+            "read raw JSON columns": best_of(repeat, read_raw),
+            "legacy hydration (TypeAdapter per row)": best_of(
+                repeat, lambda: hydrate_all(legacy_hydrate)
+            ),
+            "trusted hydration (hydrate_racks)": best_of(
+                repeat, lambda: hydrate_all(hydrate_racks)
+            ),
+            "full ORM load": best_of(repeat, orm_load),
+        }
+
+        print(f"{rows} rows, best of {repeat}")
+        for name, elapsed in measurements.items():
+            print(f"{name:>40}: {elapsed * 1000:9.1f} ms  {elapsed / rows * 1e6:8.1f} µs/row")
+
+
+if __name__ == "__main__":
+    typer.run(main)
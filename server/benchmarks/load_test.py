@@ -0,0 +1,353 @@
+"""
+A load generator for the API, for reproducing the traffic around local midnight, when
+/api/puzzle/today switches to the next day's puzzle and every open page fetches it at once.
+
+For each scenario, this starts a uvicorn worker against a scratch SQLite database seeded with a run
+of puzzles (as benchmarks.async_mode does), runs simulated users against it, and reports each
+endpoint's latency percentiles, throughput and error rate.  The scenarios are:
+
+- steady: --users users polling /api/puzzle/today, each waiting --think seconds (on average)
+  between requests;
+- archive: --users users browsing random past puzzles at /api/puzzle/{date};
+- healthcheck: --users pollers hitting /api/config every --think seconds, like load balancer and
+  uptime checks;
+- rollover: the steady scenario, with the server's clock set so that local midnight falls halfway
+  through the run, plus --users more users who each fetch /api/puzzle/today once just after it
+  (spread over --spread seconds), the way open pages refresh when their countdown runs out.
+
+    uv run python -m benchmarks.load_test --scenario rollover --users 500 --fake-redis
+    uv run python -m benchmarks.load_test --redis-url redis://localhost:6379/1 --output load.json
+
+The server runs with TZ set to --timezone (America/Chicago, as in production), except in the
+rollover scenario, which gives it a fixed UTC offset that puts midnight where it's wanted.  Requests
+for /api/puzzle/today in the --window seconds after midnight are reported separately, and any
+response to one sent after midnight that still has the previous day's puzzle is counted as stale.
+
+Without --redis-url or --fake-redis the server runs without Redis.  --fake-redis serves an
+in-memory fakeredis over TCP from this process, so no Redis needs to be running, at the cost of
+sharing this process's CPU with the load generator.  Point --redis-url at a scratch database, since
+the server fills it with puzzles.
+"""
+
+import asyncio
+import datetime
+import json
+import math
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Coroutine
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Annotated
+from zoneinfo import ZoneInfo
+
+import httpx
+import typer
+from fakeredis import TcpFakeServer
+
+from benchmarks.async_mode import free_port, seed_database, start_server, wait_until_ready
+
+SCENARIOS = ("steady", "archive", "healthcheck", "rollover")
+
+# How long the server gets to start up before midnight in the rollover scenario.
+STARTUP_ALLOWANCE = 15.0
+
+TODAY = "/api/puzzle/today"
+ROLLOVER = "/api/puzzle/today (after midnight)"
+ARCHIVE = "/api/puzzle/{date}"
+CONFIG = "/api/config"
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    stale: int = 0
+
+    def summary(self, elapsed: float) -> dict:
+        latencies = sorted(self.latencies) or [0.0]
+
+        def percentile(p: float) -> float:
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+        requests = len(self.latencies)
+        return {
+            "requests": requests,
+            "throughput": requests / elapsed,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "mean_ms": statistics.fmean(latencies) * 1000,
+            "error_rate": self.errors / requests if requests else 0.0,
+            "stale": self.stale,
+        }
+
+
+@dataclass
+class LoadRun:
+    """What the simulated users share: the client, when to stop, and the results so far."""
+
+    client: httpx.AsyncClient
+    # Wall-clock times (time.time()), since midnight is a wall-clock event.
+    deadline: float
+    archive_dates: list[datetime.date]
+    midnight: float | None = None
+    window: float = 5.0
+    # The server's date before midnight, which /api/puzzle/today shouldn't return after it.
+    stale_date: str | None = None
+    stats: dict[str, EndpointStats] = field(default_factory=lambda: defaultdict(EndpointStats))
+
+    async def get(self, path: str, label: str):
+        sent_at = time.time()
+        after_midnight = self.midnight is not None and sent_at >= self.midnight
+        if label == TODAY and after_midnight and sent_at < self.midnight + self.window:
+            label = ROLLOVER
+        stats = self.stats[label]
+
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(path)
+        except httpx.HTTPError:
+            response = None
+        stats.latencies.append(time.perf_counter() - started)
+
+        if response is None or response.status_code != 200:
+            stats.errors += 1
+        elif path == TODAY and after_midnight and response.json()["date"] == self.stale_date:
+            stats.stale += 1
+
+
+async def today_user(run: LoadRun, think: float):
+    await asyncio.sleep(random.uniform(0, think))
+    while time.time() < run.deadline:
+        await run.get(TODAY, TODAY)
+        await asyncio.sleep(random.expovariate(1 / think))
+
+
+async def archive_user(run: LoadRun, think: float):
+    await asyncio.sleep(random.uniform(0, think))
+    while time.time() < run.deadline:
+        date = random.choice(run.archive_dates)
+        await run.get(f"/api/puzzle/{date.isoformat()}", ARCHIVE)
+        await asyncio.sleep(random.expovariate(1 / think))
+
+
+async def healthcheck_poller(run: LoadRun, interval: float):
+    next_poll = time.time() + random.uniform(0, interval)
+    while next_poll < run.deadline:
+        await asyncio.sleep(next_poll - time.time())
+        await run.get(CONFIG, CONFIG)
+        next_poll += interval
+
+
+async def midnight_user(run: LoadRun, spread: float):
+    assert run.midnight is not None
+    await asyncio.sleep(run.midnight + random.uniform(0, spread) - time.time())
+    await run.get(TODAY, TODAY)
+
+
+def scenario_users(
+    scenario: str, run: LoadRun, users: int, think: float, spread: float
+) -> list[Coroutine]:
+    if scenario == "archive":
+        return [archive_user(run, think) for _ in range(users)]
+    if scenario == "healthcheck":
+        return [healthcheck_poller(run, think) for _ in range(users)]
+    steady = [today_user(run, think) for _ in range(users)]
+    if scenario == "rollover":
+        return steady + [midnight_user(run, spread) for _ in range(users)]
+    return steady
+
+
+def rollover_timezone(midnight: float) -> tuple[str, datetime.timezone]:
+    """
+    Returns a POSIX TZ string for a fixed UTC offset at which local midnight falls at `midnight`
+    (a whole number of seconds since the epoch), and the same offset as a timezone.
+    """
+    seconds_after_utc_midnight = int(midnight) % 86400
+    offset = -seconds_after_utc_midnight
+    if offset < -43200:
+        offset += 86400
+    # POSIX offsets are hours west of UTC, so their sign is the opposite of the usual one.
+    hours, rest = divmod(abs(offset), 3600)
+    minutes, seconds = divmod(rest, 60)
+    sign = "-" if offset >= 0 else "+"
+    tz = f"ROLLOVER{sign}{hours:02}:{minutes:02}:{seconds:02}"
+    return tz, datetime.timezone(datetime.timedelta(seconds=offset))
+
+
+def start_fake_redis() -> tuple[str, TcpFakeServer]:
+    port = free_port()
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}/0", server
+
+
+async def drive(
+    base_url: str, scenario: str, run_args: dict, users: int, think: float, spread: float
+) -> tuple[LoadRun, float]:
+    concurrency = users * 2 if scenario == "rollover" else users
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        run = LoadRun(client=client, **run_args)
+        started = time.time()
+        await asyncio.gather(*scenario_users(scenario, run, users, think, spread))
+        elapsed = time.time() - started
+    return run, elapsed
+
+
+def run_scenario(
+    scenario: str,
+    base_env: dict[str, str],
+    *,
+    users: int,
+    think: float,
+    duration: float,
+    days: int,
+    timezone: str,
+    spread: float,
+    window: float,
+) -> dict:
+    midnight = None
+    if scenario == "rollover":
+        midnight = math.ceil(time.time() + STARTUP_ALLOWANCE + duration / 2)
+        tz, server_timezone = rollover_timezone(midnight)
+    else:
+        tz, server_timezone = timezone, ZoneInfo(timezone)
+    today = datetime.datetime.now(server_timezone).date()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port, {**base_env, "TZ": tz})
+    try:
+        asyncio.run(wait_until_ready(base_url))
+        if midnight is None:
+            deadline = time.time() + duration
+        else:
+            if time.time() >= midnight - duration / 2:
+                raise RuntimeError("The server took too long to start, and missed midnight.")
+            # Centre the run on midnight.
+            time.sleep(midnight - duration / 2 - time.time())
+            deadline = midnight + duration / 2
+        run_args = {
+            "deadline": deadline,
+            "archive_dates": [today - datetime.timedelta(days=n) for n in range(1, days)],
+            "midnight": midnight,
+            "window": window,
+            "stale_date": today.isoformat(),
+        }
+        print(f"{scenario}: {users} users for {duration:.0f} s (TZ={tz})")
+        run, elapsed = asyncio.run(drive(base_url, scenario, run_args, users, think, spread))
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {label: stats.summary(elapsed) for label, stats in sorted(run.stats.items())}
+    print(
+        f"{'endpoint':>36} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>7} {'stale':>6}"
+    )
+    for label, summary in report.items():
+        print(
+            f"{label:>36} {summary['requests']:9} {summary['throughput']:8.1f} "
+            f"{summary['p50_ms']:8.1f} {summary['p95_ms']:8.1f} {summary['p99_ms']:8.1f} "
+            f"{summary['error_rate']:7.1%} {summary['stale']:6}"
+        )
+    return {"timezone": tz, "elapsed": elapsed, "endpoints": report}
+
+
+def main(
+    scenario: Annotated[
+        list[str] | None,
+        typer.Option(help=f"Scenario to run (repeatable; default all): {', '.join(SCENARIOS)}."),
+    ] = None,
+    users: Annotated[int, typer.Option(min=1, help="Simulated users (or pollers).")] = 200,
+    think: Annotated[
+        float, typer.Option(min=0.01, help="Mean seconds between each user's requests.")
+    ] = 1.0,
+    duration: Annotated[float, typer.Option(min=1, help="Seconds to run each scenario.")] = 30.0,
+    days: Annotated[int, typer.Option(min=2, help="Number of past puzzles to browse.")] = 60,
+    timezone: Annotated[
+        str, typer.Option(help="The server's timezone, except when rolling over.")
+    ] = "America/Chicago",
+    spread: Annotated[
+        float, typer.Option(help="Seconds over which the users arrive after midnight.")
+    ] = 2.0,
+    window: Annotated[
+        float, typer.Option(help="Seconds after midnight to report /api/puzzle/today separately.")
+    ] = 5.0,
+    redis_url: Annotated[
+        str | None, typer.Option(help="Redis to use as the shared cache (none by default).")
+    ] = None,
+    fake_redis: Annotated[
+        bool, typer.Option(help="Serve an in-memory fakeredis to use as the shared cache.")
+    ] = False,
+    async_mode: Annotated[bool, typer.Option(help="Run the server in async mode.")] = False,
+    local_cache: Annotated[
+        bool, typer.Option(help="Enable the in-process cache tier in the server.")
+    ] = True,
+    output: Annotated[
+        Path | None, typer.Option(help="Write the results to this JSON file.")
+    ] = None,
+):
+    """
+    Load-test the API, including across a simulated midnight.
+    """
+    scenarios = scenario or list(SCENARIOS)
+    for name in scenarios:
+        if name not in SCENARIOS:
+            raise typer.BadParameter(f"Unknown scenario {name!r}", param_hint="--scenario")
+
+    fake_redis_server = None
+    if fake_redis:
+        redis_url, fake_redis_server = start_fake_redis()
+
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            database_url = f"sqlite:///{Path(tmp) / 'load_test.sqlite3'}"
+            # Enough days that every timezone's today, and tomorrow, is there.
+            utc_today = datetime.datetime.now(datetime.UTC).date()
+            seed_database(database_url, days + 3, end=utc_today + datetime.timedelta(days=2))
+
+            base_env = {
+                **os.environ,
+                "DATABASE_URL": database_url,
+                "ASYNC_MODE": str(async_mode),
+                "ENVIRONMENT": "prod",
+            }
+            if not local_cache:
+                base_env["LOCAL_CACHE_MAX_ENTRIES"] = "0"
+            if redis_url:
+                base_env["REDIS_URL"] = redis_url
+            else:
+                base_env.pop("REDIS_URL", None)
+
+            for name in scenarios:
+                results[name] = run_scenario(
+                    name,
+                    base_env,
+                    users=users,
+                    think=think,
+                    duration=duration,
+                    days=days,
+                    timezone=timezone,
+                    spread=spread,
+                    window=window,
+                )
+    finally:
+        if fake_redis_server:
+            fake_redis_server.shutdown()
+
+    if output:
+        options = {"users": users, "think": think, "duration": duration, "async_mode": async_mode}
+        output.write_text(json.dumps({"options": options, "scenarios": results}, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    typer.run(main)